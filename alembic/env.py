@@ -8,6 +8,8 @@ from alembic import context
 
 from src.core.config import settings
 from src.db.base import Base
+from src.auth.models import AuthEvent  # noqa
+from src.core.models import IdempotencyKey  # noqa
 from src.users.models import User  # noqa
 
 # this is the Alembic Config object, which provides
@@ -28,6 +30,12 @@ target_metadata = Base.metadata
 # Use the database URL from environment variables
 database_url = os.getenv('DATABASE_URL')
 
+# Every migration runs in its own transaction, so helpers in src.db.migrations
+# can commit between steps and a failure only rolls back the current one. DDL
+# gives up after lock_timeout instead of queueing behind long-running queries
+# (and blocking everything queued behind it).
+LOCK_TIMEOUT = f"SET lock_timeout = {int(settings.MIGRATION_LOCK_TIMEOUT_MS)}"
+
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode."""
     context.configure(
@@ -35,8 +43,10 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        transaction_per_migration=True,
     )
 
+    context.execute(LOCK_TIMEOUT)
     with context.begin_transaction():
         context.run_migrations()
 
@@ -45,9 +55,14 @@ def run_migrations_online() -> None:
     connectable = create_engine(database_url, poolclass=pool.NullPool)
 
     with connectable.connect() as connection:
+        # Session-level, so it also applies in autocommit blocks
+        connection.exec_driver_sql(LOCK_TIMEOUT)
+        connection.commit()
+
         context.configure(
             connection=connection,
-            target_metadata=target_metadata
+            target_metadata=target_metadata,
+            transaction_per_migration=True,
         )
 
         with context.begin_transaction():
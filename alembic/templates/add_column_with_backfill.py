@@ -0,0 +1,49 @@
+"""Example: add a NOT NULL column to a large table in small steps
+
+1. Add the column as nullable without a default (metadata-only change).
+2. Deploy code that writes the column for new and updated rows.
+3. Backfill existing rows in committed, throttled batches. If it is
+   interrupted, re-running the migration resumes with the remaining rows.
+4. Make the column NOT NULL without scanning the table under a lock.
+
+Steps 1 and 3-4 are usually separate revisions so step 2 can be deployed in
+between. Copy into alembic/versions/ and fill in the revision identifiers.
+
+Revision ID: 0000add_column
+Revises:
+Create Date: 2024-01-01 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from src.db.migrations import add_not_null, backfill, set_lock_timeout
+
+# revision identifiers, used by Alembic.
+revision: str = "0000add_column"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Only needs the ACCESS EXCLUSIVE lock for an instant, but must not wait
+    # for it behind long-running queries
+    set_lock_timeout(2000)
+    op.add_column("users", sa.Column("display_name", sa.String(), nullable=True))
+
+    backfill(
+        "users",
+        values="display_name = coalesce(first_name, split_part(email, '@', 1))",
+        where="display_name IS NULL",
+        batch_size=1000,
+        pause_seconds=0.1,
+    )
+
+    add_not_null("users", "display_name")
+
+
+def downgrade() -> None:
+    op.drop_column("users", "display_name")
@@ -0,0 +1,34 @@
+"""Example: add an index to a large table without blocking writes
+
+Copy into alembic/versions/ (or start from ``alembic revision``) and fill in
+the revision identifiers.
+
+Revision ID: 0000add_index
+Revises:
+Create Date: 2024-01-01 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from src.db.migrations import create_index_concurrently, drop_index_concurrently
+
+# revision identifiers, used by Alembic.
+revision: str = "0000add_index"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Runs outside the migration transaction; re-running after a failed build
+    # drops the invalid index and tries again
+    create_index_concurrently(
+        "users_created_at_idx",
+        "users",
+        ["created_at"],
+        where="is_active",
+    )
+
+
+def downgrade() -> None:
+    drop_index_concurrently("users_created_at_idx")
@@ -0,0 +1,110 @@
+"""Cold start cost: import time of the app and OpenAPI schema generation.
+
+Usage:
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --json startup.json --max-import-ms 1500
+
+``import src.main`` runs in a fresh interpreter under ``-X importtime``; the
+slowest modules by cumulative time are listed so regressions can be traced
+to an import. With ``--json`` the numbers are written out to be tracked
+between builds, and ``--max-import-ms`` makes the run fail above a budget.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+
+
+@dataclass
+class ImportTiming:
+    module: str
+    self_ms: float
+    cumulative_ms: float
+    depth: int
+
+
+def measure_imports(module: str = "src.main") -> list[ImportTiming]:
+    """Import a module in a fresh interpreter and parse ``-X importtime``."""
+    env = {"JWT_SECRET": "benchmark", **os.environ}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+
+    timings = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        timings.append(ImportTiming(
+            module=name.strip(),
+            self_ms=int(self_us) / 1000,
+            cumulative_ms=int(cumulative_us) / 1000,
+            depth=(len(name) - len(name.lstrip()) - 1) // 2,
+        ))
+    return timings
+
+
+def measure_openapi() -> dict[str, float]:
+    """Time generating the OpenAPI schema against loading a prebuilt one."""
+    from src.core.openapi import build_schema, load_cached_schema
+    from src.main import app
+
+    start = time.perf_counter()
+    schema = build_schema(app)
+    generate_ms = (time.perf_counter() - start) * 1000
+
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as file:
+        json.dump(schema, file)
+    try:
+        start = time.perf_counter()
+        load_cached_schema(app, file.name)
+        load_ms = (time.perf_counter() - start) * 1000
+    finally:
+        os.unlink(file.name)
+
+    return {"openapi_generate_ms": generate_ms, "openapi_cached_ms": load_ms}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--max-import-ms", type=float)
+    args = parser.parse_args()
+
+    timings = measure_imports()
+    total_ms = sum(timing.cumulative_ms for timing in timings if timing.depth == 0)
+    os.environ.setdefault("JWT_SECRET", "benchmark")
+    openapi = measure_openapi()
+
+    print(f"{'module':<50}{'self':>10}{'cumulative':>14}")
+    for timing in sorted(timings, key=lambda t: t.cumulative_ms, reverse=True)[:args.top]:
+        print(f"{timing.module:<50}{timing.self_ms:>7.1f} ms{timing.cumulative_ms:>11.1f} ms")
+    print()
+    print(f"total import time       {total_ms:8.1f} ms")
+    print(f"OpenAPI schema, build   {openapi['openapi_generate_ms']:8.1f} ms")
+    print(f"OpenAPI schema, cached  {openapi['openapi_cached_ms']:8.1f} ms")
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump({
+                "import_ms": total_ms,
+                **openapi,
+                "modules": [asdict(timing) for timing in timings],
+            }, file, indent=2)
+
+    if args.max_import_ms is not None and total_ms > args.max_import_ms:
+        print(f"Import time above budget of {args.max_import_ms:.0f} ms", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
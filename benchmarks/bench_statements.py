@@ -0,0 +1,89 @@
+"""Per-call cost of preparing the hot user statements for execution.
+
+Usage:
+    python -m benchmarks.bench_statements --iterations 20000
+
+No database is needed: each variant goes through the same compile step an
+``AsyncSession.execute`` call does with the asyncpg dialect (build the
+statement, compute its cache key, look it up in the compiled cache and
+compile on a miss), which is the Python-side overhead paid before asyncpg
+sends anything over the wire.
+
+- ``inline, no cache``: statement rebuilt per call with literal values and
+  compiled every time (``query_cache_size=0``).
+- ``inline, cached``: statement rebuilt per call, compiled form reused.
+- ``prebuilt, cached``: module-level statement from ``src.users.service``
+  with bound parameters, as the service executes it now.
+"""
+import argparse
+import time
+from typing import Callable
+from uuid import uuid4
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql.asyncpg import dialect as asyncpg_dialect
+from sqlalchemy.util import LRUCache
+
+from src.users import service
+from src.users.models import User
+
+_dialect = asyncpg_dialect()
+
+
+def _compile(statement, compiled_cache: LRUCache | None) -> None:
+    # What Connection._execute_clauseelement does before executing
+    statement._compile_w_cache(
+        dialect=_dialect,
+        compiled_cache=compiled_cache,
+        column_keys=[],
+        for_executemany=False,
+        schema_translate_map=None,
+    )
+
+
+def measure_us(build: Callable[[], object], cached: bool, iterations: int) -> float:
+    """Return the mean time in microseconds of building and compiling a statement."""
+    compiled_cache = LRUCache(500) if cached else None
+    _compile(build(), compiled_cache)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        _compile(build(), compiled_cache)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    user_id = uuid4()
+    fields = service._user_columns(service.USER_FIELDS)
+    cases = {
+        "get_by_id": (
+            lambda: select(*fields).where(User.id == user_id),
+            lambda: service._select_by_id(service.USER_FIELDS),
+        ),
+        "get_by_email": (
+            lambda: select(User).where(User.email == "user@example.com"),
+            lambda: service._SELECT_BY_EMAIL,
+        ),
+        "get_multi": (
+            lambda: select(*fields).offset(0).limit(100),
+            lambda: service._select_page(service.USER_FIELDS),
+        ),
+    }
+
+    print(f"{'statement':<14}{'inline, no cache':>18}{'inline, cached':>16}{'prebuilt, cached':>18}")
+    for name, (inline, prebuilt) in cases.items():
+        timings = (
+            measure_us(inline, False, args.iterations),
+            measure_us(inline, True, args.iterations),
+            measure_us(prebuilt, True, args.iterations),
+        )
+        print(f"{name:<14}" + "".join(
+            f"{timing:>{width}.1f} us" for timing, width in zip(timings, (15, 13, 15))
+        ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+import asyncio
+import logging
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Callable
+from uuid import UUID
+
+from sqlalchemy import insert
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.auth.models import AuthEvent
+from src.core.config import settings
+from src.db.base import AsyncSessionLocal
+from src.users import service as users_service
+
+logger = logging.getLogger(__name__)
+
+LOGIN_SUCCEEDED = "login_succeeded"
+LOGIN_FAILED = "login_failed"
+
+_EMAIL_LENGTH = AuthEvent.__table__.c.email.type.length
+_IP_ADDRESS_LENGTH = AuthEvent.__table__.c.ip_address.type.length
+
+
+def _column_value(value: str | None, length: int) -> str | None:
+    """Fit client-supplied text into a column (Postgres also rejects NUL)."""
+    return None if value is None else value.replace("\x00", "")[:length]
+
+
+def _is_row_error(exc: Exception) -> bool:
+    """Whether a failed write was caused by the data rather than the database."""
+    return isinstance(exc, DBAPIError) and not exc.connection_invalidated
+
+
+@dataclass
+class AuthEventRecord:
+    """An auth event waiting to be written."""
+    type: str
+    email: str
+    user_id: UUID | None = None
+    reason: str | None = None
+    ip_address: str | None = None
+    created_at: datetime = field(default_factory=datetime.utcnow)
+
+
+class AuthEventWriter:
+    """Buffers auth events in memory and writes them in batches.
+
+    ``record`` never waits: logins don't pay for a database round trip. A
+    background task started from the application lifespan writes a batch
+    with one multi-row INSERT (and updates ``users.last_login_at`` in the
+    same transaction) whenever ``batch_size`` events are buffered or
+    ``flush_seconds`` have passed. When the database can't keep up and the
+    buffer is full, new events are dropped and counted instead of growing
+    memory or slowing logins down. Buffered events are written on stop.
+    """
+
+    def __init__(
+        self,
+        max_buffered: int = settings.AUTH_EVENTS_QUEUE_SIZE,
+        batch_size: int = settings.AUTH_EVENTS_BATCH_SIZE,
+        flush_seconds: float = settings.AUTH_EVENTS_FLUSH_SECONDS,
+        session_factory: Callable[[], AsyncSession] = AsyncSessionLocal
+    ):
+        self.max_buffered = max_buffered
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.session_factory = session_factory
+        self.written = 0
+        self.dropped = 0  # buffer full
+        self.failed = 0  # lost in a failed write
+        self._buffer: deque[AuthEventRecord] = deque()
+        self._batch_ready = asyncio.Event()
+        self._stopping = False
+        self._task: asyncio.Task | None = None
+
+    @property
+    def buffered(self) -> int:
+        return len(self._buffer)
+
+    def record(self, event: AuthEventRecord) -> None:
+        """Buffer an event; ignored unless the writer is running.
+
+        The email (whatever was sent as username) and IP address are cut to
+        fit their columns, so no login attempt can fail a batch.
+        """
+        if self._task is None:
+            return
+        if len(self._buffer) >= self.max_buffered:
+            self.dropped += 1
+            return
+        event.email = _column_value(event.email, _EMAIL_LENGTH)
+        event.ip_address = _column_value(event.ip_address, _IP_ADDRESS_LENGTH)
+        self._buffer.append(event)
+        if len(self._buffer) >= self.batch_size:
+            self._batch_ready.set()
+
+    def start(self) -> None:
+        """Start writing in the background."""
+        self._stopping = False
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Write what is still buffered and stop the background task."""
+        if self._task is None:
+            return
+        # Not cancelled, so a batch being written is not lost
+        self._stopping = True
+        self._batch_ready.set()
+        await self._task
+        self._task = None
+
+    async def flush(self) -> None:
+        """Write up to one batch of buffered events."""
+        batch = [
+            self._buffer.popleft()
+            for _ in range(min(self.batch_size, len(self._buffer)))
+        ]
+        if not batch:
+            return
+        try:
+            await self._write(batch)
+            self.written += len(batch)
+            return
+        except Exception as exc:
+            if len(batch) == 1 or not _is_row_error(exc):
+                self.failed += len(batch)
+                logger.exception("Failed to write %d auth events", len(batch))
+                return
+            logger.warning("Failed to write %d auth events, retrying one at a time",
+                           len(batch), exc_info=True)
+
+        # One bad row fails the whole INSERT: write the others on their own
+        for index, event in enumerate(batch):
+            try:
+                await self._write([event])
+                self.written += 1
+            except Exception as exc:
+                self.failed += 1
+                logger.exception("Failed to write auth event %r", event)
+                if not _is_row_error(exc):
+                    # The database itself is failing, not this row
+                    self.failed += len(batch) - index - 1
+                    return
+
+    async def _write(self, batch: list[AuthEventRecord]) -> None:
+        last_logins: dict[UUID, datetime] = {}
+        for event in batch:
+            if event.type == LOGIN_SUCCEEDED and event.user_id is not None:
+                last_logins[event.user_id] = max(
+                    event.created_at, last_logins.get(event.user_id, event.created_at)
+                )
+
+        async with self.session_factory() as db:
+            await db.execute(insert(AuthEvent), [asdict(event) for event in batch])
+            if last_logins:
+                await users_service.record_logins(db, last_logins)
+            await db.commit()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._batch_ready.wait(), timeout=self.flush_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._batch_ready.clear()
+            while self._buffer:
+                await self.flush()
+            if self._stopping:
+                return
+
+
+auth_event_writer = AuthEventWriter()
@@ -0,0 +1,101 @@
+"""Pick password hash costs for a target login latency on this host.
+
+Usage:
+    python -m src.auth.calibrate --target-ms 250
+    python -m src.auth.calibrate --scheme argon2 --target-ms 250
+
+Run it on the same hardware as the API and copy the printed settings into
+``.env``. The highest cost whose median hash time stays within the target is
+chosen, but never less than the recommended minimum for the scheme.
+"""
+import argparse
+import statistics
+import time
+from typing import Callable
+
+from src.auth.utils import build_pwd_context
+from src.core.config import settings
+
+MIN_BCRYPT_ROUNDS = 10
+MAX_BCRYPT_ROUNDS = 16
+MIN_ARGON2_TIME_COST = 2
+MAX_ARGON2_TIME_COST = 20
+
+_SAMPLE_PASSWORD = "calibration-password"
+
+
+def measure_hash_ms(hash_fn: Callable[[str], str], samples: int = 3) -> float:
+    """Return the median time in milliseconds of hashing a password."""
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        hash_fn(_SAMPLE_PASSWORD)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def calibrate_bcrypt(target_ms: float, samples: int = 3) -> tuple[int, list[tuple[int, float]]]:
+    """Find bcrypt rounds for the target latency."""
+    chosen = MIN_BCRYPT_ROUNDS
+    timings = []
+    for rounds in range(MIN_BCRYPT_ROUNDS, MAX_BCRYPT_ROUNDS + 1):
+        context = build_pwd_context(schemes=["bcrypt"], bcrypt_rounds=rounds)
+        elapsed = measure_hash_ms(context.hash, samples)
+        timings.append((rounds, elapsed))
+        if elapsed > target_ms:
+            break
+        chosen = rounds
+    return chosen, timings
+
+
+def calibrate_argon2(
+    target_ms: float,
+    memory_cost: int = settings.ARGON2_MEMORY_COST,
+    parallelism: int = settings.ARGON2_PARALLELISM,
+    samples: int = 3
+) -> tuple[int, list[tuple[int, float]]]:
+    """Find the argon2 time cost for the target latency at fixed memory."""
+    chosen = MIN_ARGON2_TIME_COST
+    timings = []
+    for time_cost in range(MIN_ARGON2_TIME_COST, MAX_ARGON2_TIME_COST + 1):
+        context = build_pwd_context(
+            schemes=["argon2"],
+            argon2_time_cost=time_cost,
+            argon2_memory_cost=memory_cost,
+            argon2_parallelism=parallelism,
+        )
+        elapsed = measure_hash_ms(context.hash, samples)
+        timings.append((time_cost, elapsed))
+        if elapsed > target_ms:
+            break
+        chosen = time_cost
+    return chosen, timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scheme", choices=["bcrypt", "argon2"], default="bcrypt")
+    parser.add_argument("--target-ms", type=float, default=250.0)
+    parser.add_argument("--samples", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.scheme == "bcrypt":
+        chosen, timings = calibrate_bcrypt(args.target_ms, args.samples)
+        setting = f"BCRYPT_ROUNDS={chosen}"
+    else:
+        chosen, timings = calibrate_argon2(args.target_ms, samples=args.samples)
+        setting = f"ARGON2_TIME_COST={chosen}"
+
+    for cost, elapsed in timings:
+        print(f"{args.scheme} cost={cost:<3} {elapsed:8.1f} ms")
+    print()
+    # Keep the current schemes so existing hashes still verify (and get rehashed)
+    schemes = [args.scheme] + [
+        scheme for scheme in settings.PASSWORD_HASH_SCHEMES if scheme != args.scheme
+    ]
+    print("PASSWORD_HASH_SCHEMES=[" + ", ".join(f'"{scheme}"' for scheme in schemes) + "]")
+    print(setting)
+
+
+if __name__ == "__main__":
+    main()
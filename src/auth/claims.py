@@ -0,0 +1,95 @@
+import time
+from collections import OrderedDict
+from typing import Any
+from uuid import UUID
+
+from src.core.config import settings
+from src.users import events
+
+# Claims tokens carry what most routes need to authorize a request, so the
+# user row does not have to be loaded. They are only trusted for
+# AUTH_CLAIMS_TTL_SECONDS after issue and never after a change to the user
+# (or a resync) was seen; in both cases the user is loaded from the database
+# as with a plain token. Changes made by other workers are only seen through
+# the user event listener, so claims are not trusted while it isn't
+# connected (or USER_EVENTS_LISTEN is off). What remains is the delay of a
+# NOTIFY, during which a demoted user can still pass a claims check.
+
+
+def build_claims(user: dict[str, Any], read_at: float) -> dict[str, Any]:
+    """Claims embedded in access tokens when claims tokens are enabled.
+
+    ``read_at`` is a time before ``user`` was read, so a change seen while
+    the token was being issued (e.g. during the password check) still
+    invalidates its claims.
+    """
+    updated_at = user.get("updated_at")
+    return {
+        "iat": read_at,
+        "is_active": user["is_active"],
+        "is_superuser": user["is_superuser"],
+        "ver": updated_at.isoformat() if updated_at else None,
+    }
+
+
+class ClaimsRevocations:
+    """Tracks when users last changed, to reject claims issued before.
+
+    Fed by user change events from this worker and, via LISTEN/NOTIFY, from
+    the others. Changes before this process started are unknown, so claims
+    issued before then are not trusted either.
+    """
+
+    def __init__(self, ttl_seconds: float = settings.AUTH_CLAIMS_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._changed_at: OrderedDict[UUID, float] = OrderedDict()
+        self._resynced_at = time.time()
+
+    def on_user_event(self, action: str, user_ids: list[UUID]) -> None:
+        now = time.time()
+        if action == events.USERS_RESYNC:
+            self._resynced_at = now
+            self._changed_at.clear()
+            return
+
+        for user_id in user_ids:
+            self._changed_at[user_id] = now
+            self._changed_at.move_to_end(user_id)
+        # Claims issued before the oldest entries have expired by now
+        while self._changed_at and next(iter(self._changed_at.values())) < now - self.ttl_seconds:
+            self._changed_at.popitem(last=False)
+
+    def is_current(self, user_id: UUID, issued_at: float) -> bool:
+        """Whether claims issued at ``issued_at`` postdate every known change."""
+        changed_at = max(self._resynced_at, self._changed_at.get(user_id, 0.0))
+        return issued_at > changed_at
+
+
+revocations = ClaimsRevocations()
+events.subscribe(revocations.on_user_event)
+
+
+def principal_from_claims(payload: dict[str, Any]) -> dict[str, Any] | None:
+    """The caller described by a token's claims, or None if they can't be trusted."""
+    if not settings.AUTH_CLAIMS_TOKENS_ENABLED or "ver" not in payload:
+        return None
+    if not events.is_listening():
+        return None
+
+    issued_at = payload.get("iat")
+    if issued_at is None or issued_at + revocations.ttl_seconds < time.time():
+        return None
+
+    try:
+        user_id = UUID(payload["user_id"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    if not revocations.is_current(user_id, issued_at):
+        return None
+
+    return {
+        "id": user_id,
+        "is_active": payload["is_active"],
+        "is_superuser": payload["is_superuser"],
+        "version": payload["ver"],
+    }
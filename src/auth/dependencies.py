@@ -6,6 +6,7 @@ from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.auth.claims import principal_from_claims
 from src.core.config import settings
 from src.core.exceptions import (
     AuthTokenExpiredException,
@@ -17,11 +18,8 @@ from src.users import service as users_service
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
 
-async def get_current_user(
-    token: Annotated[str, Depends(oauth2_scheme)],
-    db: Annotated[AsyncSession, Depends(get_db)]
-) -> dict:
-    """Dependency to get current authenticated user from JWT token."""
+def decode_token(token: str) -> dict:
+    """Decode and validate an access token, returning its payload."""
     try:
         payload = jwt.decode(
             token,
@@ -40,6 +38,10 @@ async def get_current_user(
     except JWTError:
         raise AuthTokenInvalidException()
 
+    return payload
+
+
+async def _load_active_user(db: AsyncSession, user_id: str) -> dict:
     user = await users_service.get_by_id(db, user_id)
     if not user:
         raise UserNotFoundException()
@@ -50,6 +52,35 @@ async def get_current_user(
     return user
 
 
+async def get_current_user(
+    token: Annotated[str, Depends(oauth2_scheme)],
+    db: Annotated[AsyncSession, Depends(get_db)]
+) -> dict:
+    """Dependency to get current authenticated user from JWT token."""
+    payload = decode_token(token)
+    return await _load_active_user(db, payload["user_id"])
+
+
+async def get_current_principal(
+    token: Annotated[str, Depends(oauth2_scheme)],
+    db: Annotated[AsyncSession, Depends(get_db)]
+) -> dict:
+    """Dependency to get the caller's ``id``, ``is_active`` and ``is_superuser``.
+
+    Fresh claims tokens (see ``src.auth.claims``) are trusted without a
+    database lookup; otherwise this falls back to the full user. Use
+    ``get_current_user`` on routes that change data or need the profile.
+    """
+    payload = decode_token(token)
+    principal = principal_from_claims(payload)
+    if principal is None:
+        return await _load_active_user(db, payload["user_id"])
+
+    if not principal["is_active"]:
+        raise AuthTokenInvalidException(detail="Inactive user")
+    return principal
+
+
 async def get_current_active_superuser(
     current_user: Annotated[dict, Depends(get_current_user)]
 ) -> dict:
@@ -57,3 +88,12 @@ async def get_current_active_superuser(
     if not current_user["is_superuser"]:
         raise AuthTokenInvalidException(detail="Not enough permissions")
     return current_user
+
+
+async def get_current_superuser_principal(
+    principal: Annotated[dict, Depends(get_current_principal)]
+) -> dict:
+    """Like ``get_current_active_superuser`` but trusting fresh claims tokens."""
+    if not principal["is_superuser"]:
+        raise AuthTokenInvalidException(detail="Not enough permissions")
+    return principal
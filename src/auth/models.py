@@ -0,0 +1,23 @@
+from datetime import datetime
+from uuid import uuid4
+
+from sqlalchemy import Column, DateTime, String
+from sqlalchemy.dialects.postgresql import UUID
+
+from src.db.base import Base
+
+
+class AuthEvent(Base):
+    __tablename__ = "auth_events"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid4)
+    type = Column(String(32), nullable=False)
+    email = Column(String(255), nullable=False)
+    # No foreign key: events are kept after the user is deleted
+    user_id = Column(UUID(as_uuid=True), index=True)
+    reason = Column(String(32))
+    ip_address = Column(String(45))
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<AuthEvent {self.type} {self.email}>"
@@ -1,11 +1,12 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.auth import service
 from src.auth.dependencies import get_current_user
+from src.core.ratelimit import form_field, rate_limit
 from src.core.schemas import ResponseModel
 from src.db.base import get_db
 from src.users.schemas import Token, UserResponse
@@ -13,8 +14,17 @@ from src.users.schemas import Token, UserResponse
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 
-@router.post("/token", response_model=Token)
+@router.post(
+    "/token",
+    response_model=Token,
+    # Before the password is checked, so guessing doesn't cost bcrypt time
+    dependencies=[
+        Depends(rate_limit("auth_token:ip")),
+        Depends(rate_limit("auth_token:email", form_field("username"))),
+    ]
+)
 async def login(
+    request: Request,
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
     db: Annotated[AsyncSession, Depends(get_db)]
 ) -> dict:
@@ -23,6 +33,7 @@ async def login(
         db=db,
         email=form_data.username,  # OAuth2 form uses username field for email
         password=form_data.password,
+        ip_address=request.client.host if request.client else None,
     )
     return token
 
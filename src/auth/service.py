@@ -1,45 +1,96 @@
+import time
 from datetime import timedelta
 from typing import Any
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.auth.utils import create_access_token, verify_password
+from src.auth.audit import (
+    LOGIN_FAILED,
+    LOGIN_SUCCEEDED,
+    AuthEventRecord,
+    auth_event_writer,
+)
+from src.auth.claims import build_claims
+from src.auth.utils import create_access_token, verify_and_update_password
 from src.core.config import settings
 from src.core.exceptions import AuthFailedException
+from src.db.base import release_connection
 from src.users import service as users_service
 
 
+def _record_failure(
+    email: str,
+    reason: str,
+    user: dict[str, Any] | None,
+    ip_address: str | None
+) -> None:
+    auth_event_writer.record(AuthEventRecord(
+        type=LOGIN_FAILED,
+        email=email,
+        user_id=user["id"] if user else None,
+        reason=reason,
+        ip_address=ip_address,
+    ))
+
+
 async def authenticate_user(
     db: AsyncSession,
     email: str,
-    password: str
+    password: str,
+    ip_address: str | None = None
 ) -> dict[str, Any]:
-    """Authenticate user with email and password."""
+    """Authenticate user with email and password.
+
+    Failed attempts are recorded as auth events (written in the background).
+    """
     user = await users_service.get_by_email(db, email)
     
     if not user:
+        _record_failure(email, "unknown_email", None, ip_address)
         raise AuthFailedException()
     
-    if not verify_password(password, user["hashed_password"]):
+    # Don't hold a pool connection while verifying the password
+    await release_connection(db)
+    verified, new_hash = verify_and_update_password(password, user["hashed_password"])
+    if not verified:
+        _record_failure(email, "bad_password", user, ip_address)
         raise AuthFailedException()
     
     if not user["is_active"]:
+        _record_failure(email, "inactive", user, ip_address)
         raise AuthFailedException(detail="Inactive user")
     
+    # Upgrade hashes made with an old scheme or cost while we know the password
+    if new_hash:
+        await users_service.update_password_hash(db, user["id"], new_hash)
+        user["hashed_password"] = new_hash
+    
     return user
 
 
 async def login(
     db: AsyncSession,
     email: str,
-    password: str
+    password: str,
+    ip_address: str | None = None
 ) -> dict[str, str]:
     """Login user and return access token."""
-    user = await authenticate_user(db, email, password)
+    read_at = time.time()
+    user = await authenticate_user(db, email, password, ip_address)
+    auth_event_writer.record(AuthEventRecord(
+        type=LOGIN_SUCCEEDED,
+        email=email,
+        user_id=user["id"],
+        ip_address=ip_address,
+    ))
+    
+    token_data = {"user_id": str(user["id"])}
+    if settings.AUTH_CLAIMS_TOKENS_ENABLED:
+        token_data.update(build_claims(user, read_at))
     
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"user_id": str(user["id"])},
+        data=token_data,
         expires_delta=access_token_expires
     )
     
@@ -10,16 +10,96 @@ class Settings(BaseSettings):
     # Database
     DATABASE_URL: PostgresDsn = "postgresql://postgres:postgres@db:5432/fastapi_db"
     ASYNC_DATABASE_URL: PostgresDsn = "postgresql+asyncpg://postgres:postgres@db:5432/fastapi_db"
+    DB_QUERY_CACHE_SIZE: int = 500  # compiled statements cached by SQLAlchemy
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = 100  # per connection, 0 behind pgbouncer
+
+    # Migrations (see src.db.migrations)
+    MIGRATION_LOCK_TIMEOUT_MS: int = 5000
+    MIGRATION_BACKFILL_BATCH_SIZE: int = 1000
+    MIGRATION_BACKFILL_PAUSE_SECONDS: float = 0.1
     
     # JWT
     JWT_SECRET: str
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # Embed is_active/is_superuser in tokens so most routes skip the user lookup.
+    # Only used while the user event listener is connected (USER_EVENTS_LISTEN),
+    # otherwise another worker's demotion or deactivation would go unseen
+    AUTH_CLAIMS_TOKENS_ENABLED: bool = False
+    AUTH_CLAIMS_TTL_SECONDS: int = 300  # claims older than this are re-checked in the DB
+    # Login audit log, written in batches in the background
+    AUTH_EVENTS_ENABLED: bool = True
+    AUTH_EVENTS_QUEUE_SIZE: int = 10000  # events beyond this are dropped
+    AUTH_EVENTS_BATCH_SIZE: int = 500
+    AUTH_EVENTS_FLUSH_SECONDS: float = 1.0
+    
+    # Password hashing (first scheme is used for new hashes, the rest are
+    # still verified and rehashed on login). Tune costs with
+    # `python -m src.auth.calibrate`.
+    PASSWORD_HASH_SCHEMES: List[str] = ["bcrypt"]
+    BCRYPT_ROUNDS: int = 12
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST: int = 65536  # KiB
+    ARGON2_PARALLELISM: int = 4
     
     # App
     APP_NAME: str = "FastAPI App Template"
     ENVIRONMENT: str = "development"
     DEBUG: bool = True
+    DOCS_ENABLED: bool = True  # /docs, /redoc and /openapi.json
+    OPENAPI_SCHEMA_FILE: str | None = None  # built by `python -m src.core.openapi`
+    
+    # Request deadlines, also applied to SQL as statement_timeout
+    REQUEST_TIMEOUT_MS: int = 10000
+    REQUEST_TIMEOUT_MAX_MS: int = 60000  # upper limit for X-Request-Timeout-Ms
+    
+    # SQL instrumentation
+    SQL_QUERY_BUDGET: int = 10
+    SQL_REPEATED_QUERY_THRESHOLD: int = 5
+    SLOW_QUERY_THRESHOLD_MS: float = 200.0
+    SLOW_QUERY_LOG_SIZE: int = 100
+    SLOW_QUERY_EXPLAIN_SAMPLE_RATE: float = 0.0  # 0-1, EXPLAIN ANALYZE re-runs the query
+    SLOW_QUERY_EXPLAIN_TIMEOUT_MS: int = 5000
+    
+    # Profiler (superusers can always profile with the X-Profile header)
+    PROFILER_SAMPLE_RATE: float = 0.0  # 0-1 fraction of all requests
+    PROFILER_INTERVAL_MS: float = 5.0
+    PROFILER_MAX_PROFILES: int = 20
+    
+    # Rate limits per rule as "<count>/<second|minute|hour|day>", shared by
+    # all workers on a host with the shared_memory backend
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "shared_memory"  # "shared_memory" or "memory" (per worker)
+    RATE_LIMIT_SHM_PATH: str | None = None  # file prefix, defaults to /dev/shm
+    RATE_LIMIT_SLOTS: int = 65536  # buckets kept, 24 bytes each
+    RATE_LIMIT_LOCK_STRIPES: int = 64
+    RATE_LIMITS: dict[str, str] = {
+        "auth_token:ip": "30/minute",
+        "auth_token:email": "10/minute",
+    }
+
+    # Memory diagnostics (tracing can also be started at runtime by superusers)
+    MEMORY_TRACING_ENABLED: bool = False  # start tracemalloc at startup
+    MEMORY_TRACE_FRAMES: int = 10  # stack frames kept per allocation
+    MEMORY_MAX_SNAPSHOTS: int = 10
+    MEMORY_ROUTE_SAMPLE_RATE: float = 0.1  # 0-1 fraction of requests, only while tracing
+
+    # Users
+    USERS_BATCH_GET_MAX_IDS: int = 100
+    USERS_BULK_PATCH_MAX_ITEMS: int = 1000
+    # Serialised GET /users pages, invalidated by user change events
+    USERS_LIST_CACHE_ENABLED: bool = True
+    USERS_LIST_CACHE_MAX_BYTES: int = 16 * 1024 * 1024
+    USERS_LIST_CACHE_TTL_SECONDS: float = 30.0  # bounds staleness of unseen changes
+    USER_EVENTS_CHANNEL: str = "user_changes"
+    USER_EVENTS_NOTIFY: bool = True  # NOTIFY other workers of user writes
+    USER_EVENTS_LISTEN: bool = True  # LISTEN for other workers' user writes
+    
+    # Idempotency
+    IDEMPOTENCY_ENABLED: bool = True
+    IDEMPOTENCY_BACKEND: str = "memory"  # "memory" or "database"
+    IDEMPOTENCY_CACHE_SIZE: int = 10000
+    IDEMPOTENCY_TTL_SECONDS: int = 86400
     
     # CORS
     CORS_ORIGINS: List[AnyHttpUrl] = []
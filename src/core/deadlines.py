@@ -0,0 +1,145 @@
+import asyncio
+import time
+from contextvars import ContextVar
+from typing import Awaitable, Callable, TypeVar
+
+from fastapi import Request, Response
+from sqlalchemy import event, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, SessionTransaction
+from starlette.middleware.base import RequestResponseEndpoint
+
+from src.core.config import settings
+from src.core.exceptions import DeadlineExceededException
+
+T = TypeVar("T")
+
+TIMEOUT_HEADER = "X-Request-Timeout-Ms"
+
+# SQLSTATE of statements cancelled by statement_timeout
+QUERY_CANCELED = "57014"
+
+_TIMEOUT_SET_AT_KEY = "statement_timeout_set_at"
+
+# apply_deadline renews a statement_timeout set longer ago than this
+_TIMEOUT_DRIFT_SECONDS = 0.05
+
+# time.monotonic() by which the current request must be answered
+_deadline: ContextVar[float | None] = ContextVar("request_deadline", default=None)
+
+
+def get_remaining() -> float | None:
+    """Seconds left until the current request's deadline, or None without one."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def check_deadline() -> None:
+    """Raise a 504 if the current request's deadline has passed."""
+    remaining = get_remaining()
+    if remaining is not None and remaining <= 0:
+        raise DeadlineExceededException()
+
+
+async def within_deadline(awaitable: Awaitable[T]) -> T:
+    """Await something, giving up with a 504 when the request's deadline passes.
+
+    Not for database work on the request's session: cancelling it halfway
+    through a statement leaves the session unusable. Use ``apply_deadline``.
+    """
+    remaining = get_remaining()
+    if remaining is None:
+        return await awaitable
+    try:
+        return await asyncio.wait_for(awaitable, timeout=max(remaining, 0))
+    except asyncio.TimeoutError:
+        raise DeadlineExceededException()
+
+
+def _statement_timeout_sql(remaining: float) -> str:
+    return f"SET LOCAL statement_timeout = {max(int(remaining * 1000), 1)}"
+
+
+async def apply_deadline(db: AsyncSession) -> None:
+    """Make the session's next statements stop at the request's deadline.
+
+    Every transaction starts with a ``statement_timeout`` of the time left,
+    but each statement may run that long from when it starts; before a
+    statement that could take a while, this renews the timeout with what is
+    left now. Postgres cancels the statement at the deadline (a 504), and
+    the session stays usable. Raises the 504 right away if the deadline has
+    already passed.
+    """
+    check_deadline()
+    remaining = get_remaining()
+    set_at = db.info.get(_TIMEOUT_SET_AT_KEY)
+    # Outside a transaction, the one started next sets the timeout itself
+    if remaining is None or set_at is None or not db.in_transaction():
+        return
+    if time.monotonic() - set_at > _TIMEOUT_DRIFT_SECONDS:
+        await db.execute(text(_statement_timeout_sql(remaining)))
+        db.info[_TIMEOUT_SET_AT_KEY] = time.monotonic()
+
+
+def _timeout_seconds(request: Request, timeout_ms: int) -> float:
+    """The route's timeout, or the one asked for in the header within limits."""
+    try:
+        requested_ms = int(request.headers.get(TIMEOUT_HEADER, 0))
+    except ValueError:
+        requested_ms = 0
+    if requested_ms > 0:
+        timeout_ms = min(requested_ms, max(timeout_ms, settings.REQUEST_TIMEOUT_MAX_MS))
+    return timeout_ms / 1000
+
+
+async def request_deadline_middleware(
+    request: Request,
+    call_next: RequestResponseEndpoint
+) -> Response:
+    """Give every request a deadline of ``REQUEST_TIMEOUT_MS``.
+
+    Clients can ask for a different one with ``X-Request-Timeout-Ms`` (up to
+    ``REQUEST_TIMEOUT_MAX_MS``), routes with the ``request_timeout``
+    dependency.
+    """
+    request.state.started_at = time.monotonic()
+    token = _deadline.set(
+        request.state.started_at + _timeout_seconds(request, settings.REQUEST_TIMEOUT_MS)
+    )
+    try:
+        return await call_next(request)
+    finally:
+        _deadline.reset(token)
+
+
+def request_timeout(timeout_ms: int) -> Callable[[Request], Awaitable[None]]:
+    """Dependency factory setting a route's own deadline.
+
+    Use as ``dependencies=[Depends(request_timeout(60000))]``. The deadline
+    still counts from the start of the request.
+    """
+    async def set_deadline(request: Request) -> None:
+        # Async so it runs in the endpoint's context rather than a thread
+        started_at = getattr(request.state, "started_at", time.monotonic())
+        _deadline.set(started_at + _timeout_seconds(request, timeout_ms))
+
+    return set_deadline
+
+
+@event.listens_for(Session, "after_begin")
+def _apply_statement_timeout(
+    session: Session,
+    transaction: SessionTransaction,
+    connection: Connection
+) -> None:
+    # Postgres cancels statements still running at the deadline (SQLSTATE
+    # 57014), so the connection goes back to the pool instead of being held
+    # for a client that gave up
+    remaining = get_remaining()
+    if remaining is None or connection.dialect.name != "postgresql":
+        return
+    if remaining <= 0:
+        raise DeadlineExceededException()
+    connection.exec_driver_sql(_statement_timeout_sql(remaining))
+    session.info[_TIMEOUT_SET_AT_KEY] = time.monotonic()
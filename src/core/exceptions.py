@@ -6,7 +6,8 @@ class DetailedHTTPException(HTTPException):
     DETAIL = "Server error"
 
     def __init__(self, **kwargs):
-        super().__init__(status_code=self.STATUS_CODE, detail=self.DETAIL, **kwargs)
+        kwargs.setdefault("detail", self.DETAIL)
+        super().__init__(status_code=self.STATUS_CODE, **kwargs)
 
 
 class NotFoundException(DetailedHTTPException):
@@ -34,6 +35,26 @@ class UnprocessableEntityException(DetailedHTTPException):
     DETAIL = "Unprocessable entity"
 
 
+class TooManyRequestsException(DetailedHTTPException):
+    STATUS_CODE = status.HTTP_429_TOO_MANY_REQUESTS
+    DETAIL = "Too many requests, try again later"
+
+
+class GatewayTimeoutException(DetailedHTTPException):
+    STATUS_CODE = status.HTTP_504_GATEWAY_TIMEOUT
+    DETAIL = "Gateway timeout"
+
+
+# Request exceptions
+class DeadlineExceededException(GatewayTimeoutException):
+    DETAIL = "Request deadline exceeded"
+
+
+# Diagnostics exceptions
+class MemoryTracingNotStartedException(BadRequestException):
+    DETAIL = "Memory tracing is not started"
+
+
 # Auth exceptions
 class AuthFailedException(UnauthorizedException):
     DETAIL = "Incorrect email or password"
@@ -54,3 +75,7 @@ class UserNotFoundException(NotFoundException):
 
 class UserAlreadyExistsException(BadRequestException):
     DETAIL = "User with this email already exists"
+
+
+class InvalidFieldsException(UnprocessableEntityException):
+    DETAIL = "Invalid fields requested"
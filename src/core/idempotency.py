@@ -0,0 +1,258 @@
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+from fastapi import Request, status
+from fastapi.responses import JSONResponse, Response
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
+from starlette.types import ASGIApp
+
+from src.core.config import settings
+from src.core.models import IdempotencyKey
+from src.db.base import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+
+# Headers that are recomputed when a stored response is replayed
+_SKIPPED_HEADERS = {"content-length", "date", "server-timing"}
+
+
+@dataclass
+class StoredResponse:
+    """A response captured for an idempotency key."""
+    fingerprint: str
+    status_code: int
+    headers: list[tuple[str, str]]
+    body: bytes
+    created_at: float = field(default_factory=time.time)
+
+
+class MemoryIdempotencyStore:
+    """Per-process LRU store of responses with a TTL."""
+
+    def __init__(
+        self,
+        max_size: int = settings.IDEMPOTENCY_CACHE_SIZE,
+        ttl_seconds: int = settings.IDEMPOTENCY_TTL_SECONDS
+    ):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, StoredResponse] = OrderedDict()
+
+    async def get(self, key: str) -> StoredResponse | None:
+        """Get a stored response, or None if missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.time() - entry.created_at > self.ttl_seconds:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    async def set(self, key: str, response: StoredResponse) -> None:
+        """Store a response, evicting the least recently used entries."""
+        self._entries[key] = response
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+
+class DatabaseIdempotencyStore(MemoryIdempotencyStore):
+    """Store backed by the ``idempotency_keys`` table with an LRU in front.
+
+    The table makes stored responses visible to every worker and survive
+    restarts. Database errors are logged and treated as cache misses so that
+    a broken store never fails the request itself.
+    """
+
+    async def get(self, key: str) -> StoredResponse | None:
+        entry = await super().get(key)
+        if entry is not None:
+            return entry
+
+        cutoff = datetime.utcnow() - timedelta(seconds=self.ttl_seconds)
+        query = select(IdempotencyKey).where(
+            IdempotencyKey.key == key,
+            IdempotencyKey.created_at >= cutoff,
+        )
+        try:
+            async with AsyncSessionLocal() as db:
+                record = (await db.execute(query)).scalar_one_or_none()
+        except Exception:
+            logger.exception("Failed to read idempotency key")
+            return None
+
+        if record is None:
+            return None
+
+        entry = StoredResponse(
+            fingerprint=record.fingerprint,
+            status_code=record.status_code,
+            headers=[tuple(header) for header in record.headers],
+            body=record.body,
+            created_at=record.created_at.timestamp(),
+        )
+        await super().set(key, entry)
+        return entry
+
+    async def set(self, key: str, response: StoredResponse) -> None:
+        await super().set(key, response)
+
+        query = insert(IdempotencyKey).values(
+            key=key,
+            fingerprint=response.fingerprint,
+            status_code=response.status_code,
+            headers=[list(header) for header in response.headers],
+            body=response.body,
+        ).on_conflict_do_nothing(index_elements=[IdempotencyKey.key])
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(query)
+                await db.commit()
+        except Exception:
+            logger.exception("Failed to store idempotency key")
+
+
+def get_idempotency_store() -> MemoryIdempotencyStore:
+    """Create the store configured by IDEMPOTENCY_BACKEND."""
+    if settings.IDEMPOTENCY_BACKEND == "database":
+        return DatabaseIdempotencyStore()
+    return MemoryIdempotencyStore()
+
+
+def _error_response(status_code: int, message: str) -> JSONResponse:
+    return JSONResponse(
+        status_code=status_code,
+        content={
+            "success": False,
+            "message": message,
+            "data": None
+        }
+    )
+
+
+class IdempotencyMiddleware(BaseHTTPMiddleware):
+    """Replay stored responses for retried requests with an Idempotency-Key.
+
+    Keys are scoped to the method, path and Authorization header, so two
+    clients can't read each other's responses. A key reused with a different
+    body is rejected. Concurrent duplicates of a request that is still being
+    handled in this process wait for its result instead of running the
+    handler again. Server errors (5xx) are not stored, so they can be
+    retried; when the first request fails, one of its waiters retries it.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        store: MemoryIdempotencyStore | None = None,
+        methods: tuple[str, ...] = ("POST",)
+    ):
+        super().__init__(app)
+        self.store = store or get_idempotency_store()
+        self.methods = methods
+        self._in_flight: dict[str, asyncio.Future] = {}
+
+    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
+        idempotency_key = request.headers.get(IDEMPOTENCY_HEADER)
+        if request.method not in self.methods or idempotency_key is None:
+            return await call_next(request)
+
+        if not idempotency_key or len(idempotency_key) > MAX_KEY_LENGTH:
+            return _error_response(
+                status.HTTP_400_BAD_REQUEST,
+                f"{IDEMPOTENCY_HEADER} must be 1-{MAX_KEY_LENGTH} characters"
+            )
+
+        key = hashlib.sha256(
+            "\n".join((
+                request.method,
+                request.url.path,
+                request.headers.get("Authorization", ""),
+                idempotency_key,
+            )).encode()
+        ).hexdigest()
+        fingerprint = hashlib.sha256(await request.body()).hexdigest()
+
+        # A duplicate of a request running in this process waits for it; if
+        # it fails, the first waiter to wake runs the request again and the
+        # others keep waiting
+        while (in_flight := self._in_flight.get(key)) is not None:
+            stored = await asyncio.shield(in_flight)
+            if stored is not None:
+                return self._replay(stored, fingerprint)
+        return await self._call_and_store(request, call_next, key, fingerprint)
+
+    @staticmethod
+    def _replay(stored: StoredResponse, fingerprint: str) -> Response:
+        if stored.fingerprint != fingerprint:
+            return _error_response(
+                status.HTTP_422_UNPROCESSABLE_ENTITY,
+                f"{IDEMPOTENCY_HEADER} was already used with a different request body"
+            )
+
+        response = Response(content=stored.body, status_code=stored.status_code)
+        response.raw_headers = [
+            (b"content-length", str(len(stored.body)).encode("latin-1")),
+            *(
+                (name.encode("latin-1"), value.encode("latin-1"))
+                for name, value in stored.headers
+            ),
+            (REPLAYED_HEADER.lower().encode("latin-1"), b"true"),
+        ]
+        return response
+
+    async def _call_and_store(
+        self,
+        request: Request,
+        call_next: RequestResponseEndpoint,
+        key: str,
+        fingerprint: str
+    ) -> Response:
+        # Registered before the first await, so duplicates arriving while the
+        # store is read (a query with the database backend) wait as well
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        stored = None
+        try:
+            stored = await self.store.get(key)
+            if stored is not None:
+                return self._replay(stored, fingerprint)
+
+            response = await call_next(request)
+            body = b"".join([chunk async for chunk in response.body_iterator])
+            if response.status_code < 500:
+                stored = StoredResponse(
+                    fingerprint=fingerprint,
+                    status_code=response.status_code,
+                    headers=[
+                        (name, value) for name, value in response.headers.items()
+                        if name not in _SKIPPED_HEADERS
+                    ],
+                    body=body,
+                )
+                await self.store.set(key, stored)
+        finally:
+            # Waiters that get None (a server error or an exception, which
+            # isn't stored) retry the request
+            future.set_result(stored)
+            del self._in_flight[key]
+
+        buffered = Response(
+            content=body,
+            status_code=response.status_code,
+            background=response.background,
+        )
+        buffered.raw_headers = response.raw_headers
+        return buffered
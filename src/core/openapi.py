@@ -0,0 +1,96 @@
+"""Write the OpenAPI schema to a file, to be served without generating it.
+
+Usage:
+    python -m src.core.openapi openapi.json
+
+Generating the schema walks every route and builds the JSON schemas of all
+``ResponseModel[...]`` specialisations, which otherwise happens on the first
+request to ``/docs`` in every worker. The Docker image runs this at build
+time; ``OPENAPI_SCHEMA_FILE`` points the app at the written file.
+"""
+import argparse
+import hashlib
+import json
+import logging
+from pathlib import Path
+from typing import Any
+
+from fastapi import FastAPI
+from fastapi.routing import APIRoute
+
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_FINGERPRINT_KEY = "x-schema-fingerprint"
+
+# Settings read into models at import time that end up in the schema (e.g.
+# as maxItems); a deployment overriding one can't serve a schema built with
+# the defaults
+_SCHEMA_SETTINGS = ("USERS_BATCH_GET_MAX_IDS", "USERS_BULK_PATCH_MAX_ITEMS")
+
+
+def schema_fingerprint(app: FastAPI) -> str:
+    """Hash of what the schema is built from, to detect one built for other code.
+
+    Covers the routes, the app's metadata and ``_SCHEMA_SETTINGS`` rather
+    than the models' JSON schemas, which would cost most of generating it.
+    """
+    routes = sorted(
+        (route.path, sorted(route.methods), route.name)
+        for route in app.routes
+        if isinstance(route, APIRoute) and route.include_in_schema
+    )
+    inputs = {
+        "routes": routes,
+        "info": [app.title, app.version, app.description, app.summary],
+        "settings": {name: getattr(settings, name) for name in _SCHEMA_SETTINGS},
+    }
+    return hashlib.sha256(json.dumps(inputs, default=str).encode()).hexdigest()
+
+
+def build_schema(app: FastAPI) -> dict[str, Any]:
+    """Generate the app's OpenAPI schema, ignoring any cached one."""
+    app.openapi_schema = None
+    schema = app.openapi()
+    schema["info"][_FINGERPRINT_KEY] = schema_fingerprint(app)
+    return schema
+
+
+def load_cached_schema(app: FastAPI, path: str) -> bool:
+    """Serve the schema in ``path`` instead of generating it.
+
+    Returns False, and the schema is generated as usual, if the file is
+    missing or was built for different routes, app metadata or settings.
+    """
+    try:
+        schema = json.loads(Path(path).read_text())
+    except (OSError, ValueError) as exc:
+        logger.warning("Not using cached OpenAPI schema %s: %s", path, exc)
+        return False
+
+    if schema.get("info", {}).get(_FINGERPRINT_KEY) != schema_fingerprint(app):
+        logger.warning(
+            "Not using cached OpenAPI schema %s: built for other routes or settings", path
+        )
+        return False
+
+    app.openapi_schema = schema
+    return True
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("output", nargs="?", default="openapi.json")
+    args = parser.parse_args()
+
+    # Imported here so --help works without configured settings
+    from src.main import app
+
+    schema = build_schema(app)
+    Path(args.output).write_text(json.dumps(schema, separators=(",", ":")))
+    print(f"Wrote OpenAPI schema with {len(schema['paths'])} paths to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
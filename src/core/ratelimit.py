@@ -0,0 +1,291 @@
+import fcntl
+import hashlib
+import logging
+import math
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+from fastapi import Request
+
+from src.core.config import settings
+from src.core.exceptions import TooManyRequestsException
+
+logger = logging.getLogger(__name__)
+
+_PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """A token bucket holding ``capacity`` tokens, refilled over ``period_seconds``."""
+    capacity: int
+    period_seconds: float
+
+    @property
+    def refill_per_second(self) -> float:
+        return self.capacity / self.period_seconds
+
+    @classmethod
+    def parse(cls, value: str) -> "RateLimit":
+        """Parse a limit written as ``"<count>/<second|minute|hour|day>"``."""
+        count, _, period = value.partition("/")
+        try:
+            capacity = int(count)
+            period_seconds = _PERIODS[period.strip().rstrip("s")]
+        except (KeyError, ValueError):
+            capacity = 0
+        if capacity <= 0:
+            raise ValueError(f"Invalid rate limit {value!r}, expected e.g. '5/minute'")
+        return cls(capacity, period_seconds)
+
+
+def _take(
+    tokens: float,
+    updated_at: float,
+    now: float,
+    limit: RateLimit
+) -> tuple[float, float]:
+    """Refill a bucket and take a token: (tokens left, seconds to wait or 0)."""
+    tokens = min(limit.capacity, tokens + max(now - updated_at, 0) * limit.refill_per_second)
+    if tokens >= 1:
+        return tokens - 1, 0.0
+    return tokens, (1 - tokens) / limit.refill_per_second
+
+
+class RateLimitBackend:
+    """Where token buckets are kept.
+
+    ``hit`` is a coroutine so that a network backend (e.g. Redis running the
+    same refill-and-take as a script) can be added without changing callers.
+    """
+
+    async def hit(self, key: str, limit: RateLimit) -> float:
+        """Take a token for ``key``; seconds until one is available, or 0 if taken."""
+        raise NotImplementedError
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """Per-process buckets, only correct with a single worker."""
+
+    def __init__(self, max_keys: int = settings.RATE_LIMIT_SLOTS):
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    async def hit(self, key: str, limit: RateLimit) -> float:
+        now = time.time()
+        tokens, updated_at = self._buckets.pop(key, (limit.capacity, now))
+        tokens, retry_after = _take(tokens, updated_at, now, limit)
+        self._buckets[key] = (tokens, now)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return retry_after
+
+
+# Slot layout: key hash (0 = empty), tokens, time of last update
+_SLOT = struct.Struct("<Qdd")
+_HEADER = struct.Struct("<QQ")
+_MAGIC = 0x524C494D49543031  # "RLIMIT01"
+_PROBES = 8
+
+
+def default_shm_path() -> str:
+    """A file in /dev/shm (memory-backed on Linux), else the temp directory."""
+    directory = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(directory, f"{settings.APP_NAME.lower().replace(' ', '-')}-rate-limits")
+
+
+class SharedMemoryRateLimitBackend(RateLimitBackend):
+    """Buckets in a memory-mapped file shared by all workers on a host.
+
+    The file is a fixed-size open-addressing hash table of slots. Slots are
+    split into stripes, each guarded by an ``fcntl`` lock on one byte of the
+    file, so workers only contend when they update keys in the same stripe.
+    A key is looked up in a few slots of its stripe; when all of them hold
+    other keys, the least recently updated one is reused, which at worst
+    gives that key a full bucket again.
+
+    The layout is part of the file name (``<path>-<stripes>x<slots per
+    stripe>``), so workers configured differently, e.g. during a rolling
+    deploy, use separate files. A file mapped by other workers is never
+    resized: that would crash them with SIGBUS.
+    """
+
+    def __init__(
+        self,
+        path: str | None = None,
+        slots: int = settings.RATE_LIMIT_SLOTS,
+        stripes: int = settings.RATE_LIMIT_LOCK_STRIPES
+    ):
+        self.stripes = stripes
+        self.slots_per_stripe = max(slots // stripes, _PROBES)
+        base_path = path or settings.RATE_LIMIT_SHM_PATH or default_shm_path()
+        self.path = f"{base_path}-{self.stripes}x{self.slots_per_stripe}"
+        self.size = _HEADER.size + self.stripes * self.slots_per_stripe * _SLOT.size
+        # fcntl locks don't exclude threads of the same process
+        self._thread_lock = threading.Lock()
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            self._initialize()
+            self._mmap = mmap.mmap(self._fd, self.size)
+        except BaseException:
+            os.close(self._fd)
+            raise
+
+    def _initialize(self) -> None:
+        # Only a new (empty) file is sized; anything else must already match
+        fcntl.lockf(self._fd, fcntl.LOCK_EX)
+        try:
+            expected = _HEADER.pack(_MAGIC, self.stripes * self.slots_per_stripe)
+            file_size = os.fstat(self._fd).st_size
+            if file_size == 0:
+                os.ftruncate(self._fd, self.size)
+                os.pwrite(self._fd, expected, 0)
+            elif file_size != self.size or os.pread(self._fd, _HEADER.size, 0) != expected:
+                raise RuntimeError(
+                    f"Rate limit file {self.path} has another layout, remove it "
+                    "once no worker is using it"
+                )
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN)
+
+    def close(self) -> None:
+        self._mmap.close()
+        os.close(self._fd)
+
+    async def hit(self, key: str, limit: RateLimit) -> float:
+        # Synchronous: a few microseconds under the lock, never across an await
+        key_hash = int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little")
+        key_hash = key_hash or 1
+        stripe = key_hash % self.stripes
+        first = (key_hash // self.stripes) % self.slots_per_stripe
+        offsets = [
+            _HEADER.size
+            + (stripe * self.slots_per_stripe + (first + probe) % self.slots_per_stripe)
+            * _SLOT.size
+            for probe in range(_PROBES)
+        ]
+
+        with self._thread_lock:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, 1, stripe)
+            try:
+                now = time.time()
+                offset, tokens, updated_at = self._find_slot(key_hash, offsets, limit, now)
+                tokens, retry_after = _take(tokens, updated_at, now, limit)
+                _SLOT.pack_into(self._mmap, offset, key_hash, tokens, now)
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, stripe)
+        return retry_after
+
+    def _find_slot(
+        self,
+        key_hash: int,
+        offsets: list[int],
+        limit: RateLimit,
+        now: float
+    ) -> tuple[int, float, float]:
+        """The key's slot with its bucket, or a slot to put a new bucket in."""
+        reuse, reuse_updated_at = offsets[0], math.inf
+        for offset in offsets:
+            slot_hash, tokens, updated_at = _SLOT.unpack_from(self._mmap, offset)
+            if slot_hash == key_hash:
+                return offset, tokens, updated_at
+            # Empty slots first, then the least recently updated
+            if slot_hash == 0:
+                updated_at = -1.0
+            if updated_at < reuse_updated_at:
+                reuse, reuse_updated_at = offset, updated_at
+        return reuse, limit.capacity, now
+
+
+def get_rate_limit_backend() -> RateLimitBackend:
+    """Create the backend configured by RATE_LIMIT_BACKEND."""
+    if settings.RATE_LIMIT_BACKEND == "shared_memory":
+        return SharedMemoryRateLimitBackend()
+    return MemoryRateLimitBackend()
+
+
+class RateLimiter:
+    """Applies the limits configured in RATE_LIMITS, by rule name."""
+
+    def __init__(
+        self,
+        limits: dict[str, str] = settings.RATE_LIMITS,
+        backend_factory: Callable[[], RateLimitBackend] = get_rate_limit_backend
+    ):
+        self.limits = {rule: RateLimit.parse(value) for rule, value in limits.items()}
+        self._backend_factory = backend_factory
+        self._backend: RateLimitBackend | None = None
+
+    def start(self) -> None:
+        """Create the backend, from the lifespan so a broken one fails startup."""
+        self._backend = self._backend_factory()
+
+    @property
+    def backend(self) -> RateLimitBackend:
+        # Created in the worker process, on first use if not started
+        if self._backend is None:
+            self.start()
+        return self._backend
+
+    async def check(self, rule: str, key: str) -> None:
+        """Take a token from ``key``'s bucket for ``rule``, or raise a 429.
+
+        Rules without a configured limit are not limited. Errors taking a
+        token are logged and let the request through, but a backend that
+        can't be created raises: failing open on every request would turn
+        the limits off with only a log line to show for it.
+        """
+        limit = self.limits.get(rule)
+        if limit is None or not settings.RATE_LIMIT_ENABLED:
+            return
+        backend = self.backend
+        try:
+            retry_after = await backend.hit(f"{rule}:{key}", limit)
+        except Exception:
+            logger.exception("Rate limit backend failed")
+            return
+        if retry_after > 0:
+            raise TooManyRequestsException(
+                headers={"Retry-After": str(math.ceil(retry_after))}
+            )
+
+
+rate_limiter = RateLimiter()
+
+
+async def client_ip(request: Request) -> str | None:
+    """Rate limit key: the client's address."""
+    return request.client.host if request.client else None
+
+
+def form_field(name: str) -> Callable[[Request], Awaitable[str | None]]:
+    """Rate limit key: a form field, case-insensitive."""
+    async def key(request: Request) -> str | None:
+        value = (await request.form()).get(name)
+        return value.strip().lower() if isinstance(value, str) and value else None
+
+    return key
+
+
+def rate_limit(
+    rule: str,
+    key: Callable[[Request], Awaitable[str | None]] = client_ip
+) -> Callable[[Request], Awaitable[None]]:
+    """Dependency factory limiting a route by the RATE_LIMITS entry ``rule``.
+
+    Use as ``dependencies=[Depends(rate_limit("auth_token:ip"))]``. Requests
+    without a key (e.g. a missing form field) are not limited by the rule.
+    """
+    async def check(request: Request) -> None:
+        value = await key(request)
+        if value is not None:
+            await rate_limiter.check(rule, value)
+
+    return check
@@ -1,7 +1,9 @@
 from datetime import datetime
+from functools import lru_cache
 from typing import Any, Generic, TypeVar
 
-from pydantic import BaseModel, ConfigDict
+from fastapi.responses import Response
+from pydantic import BaseModel, ConfigDict, TypeAdapter
 
 T = TypeVar('T')
 
@@ -34,3 +36,23 @@ class PaginatedResponse(ResponseModel[T]):
     page: int
     size: int
     pages: int
+
+
+@lru_cache(maxsize=256)
+def _response_adapter(data_type: Any) -> TypeAdapter:
+    return TypeAdapter(ResponseModel[data_type])
+
+
+def render_response(data_type: Any, content: dict[str, Any], status_code: int = 200) -> Response:
+    """Serialise a ``ResponseModel[data_type]`` envelope straight to a response.
+
+    For handlers whose data shape is only known at request time (e.g. sparse
+    fieldsets), where the route's ``response_model`` can't be used. The
+    serializer for each data type is built once and cached.
+    """
+    adapter = _response_adapter(data_type)
+    return Response(
+        content=adapter.dump_json(adapter.validate_python(content)),
+        status_code=status_code,
+        media_type="application/json",
+    )
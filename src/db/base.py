@@ -1,8 +1,13 @@
+from typing import Annotated, AsyncIterator
+
+from fastapi import Depends
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
 from sqlalchemy import MetaData
 
 from src.core.config import settings
+from src.db.instrumentation import instrument_engine
+from src.db.slow_queries import SlowQueryLog
 
 # Naming convention for constraints and indexes
 POSTGRES_NAMING_CONVENTION = {
@@ -20,9 +25,17 @@ metadata = MetaData(naming_convention=POSTGRES_NAMING_CONVENTION)
 engine = create_async_engine(
     str(settings.ASYNC_DATABASE_URL),
     echo=settings.DEBUG,
-    future=True
+    future=True,
+    query_cache_size=settings.DB_QUERY_CACHE_SIZE,
+    connect_args={
+        "prepared_statement_cache_size": settings.DB_PREPARED_STATEMENT_CACHE_SIZE,
+    },
 )
 
+# Count statements per request and keep a log of slow ones
+slow_query_log = SlowQueryLog(engine)
+instrument_engine(engine.sync_engine, slow_query_log)
+
 # Create async session factory
 AsyncSessionLocal = sessionmaker(
     engine,
@@ -35,10 +48,51 @@ AsyncSessionLocal = sessionmaker(
 # Create declarative base
 Base = declarative_base(metadata=metadata)
 
+_MANUAL_COMMIT_KEY = "manual_commit"
+
+
 # Dependency to get async database session
-async def get_db() -> AsyncSession:
+async def get_db() -> AsyncIterator[AsyncSession]:
+    """Session for the request, run as a single unit of work.
+
+    The session checks out a pool connection on its first statement only.
+    Services flush rather than commit: everything is committed once after
+    the handler returns (before the response is sent) and rolled back if it
+    raises. Routes that commit themselves use ``get_db_manual_commit``.
+    """
     async with AsyncSessionLocal() as session:
         try:
             yield session
+            if not session.info.get(_MANUAL_COMMIT_KEY):
+                await session.commit()
         finally:
             await session.close()
+
+
+async def get_db_manual_commit(
+    db: Annotated[AsyncSession, Depends(get_db)]
+) -> AsyncSession:
+    """The request's session, without the commit at the end.
+
+    For services that commit in steps, e.g. bulk changes committed per chunk
+    so row locks are not held for the whole request. Uncommitted changes are
+    rolled back when the request ends.
+    """
+    db.info[_MANUAL_COMMIT_KEY] = True
+    return db
+
+
+async def release_connection(db: AsyncSession) -> None:
+    """End the session's transaction so its connection goes back to the pool.
+
+    For slow work that doesn't need the database, like password hashing,
+    after reads and before the request's writes. This commits, so it raises
+    if the session holds unflushed changes rather than committing them
+    halfway through the request; call it before any writes, as changes
+    already flushed would be committed too. The next statement checks out a
+    connection again.
+    """
+    if db.new or db.dirty or db.deleted:
+        raise RuntimeError("release_connection() would commit pending changes")
+    if db.in_transaction():
+        await db.commit()
@@ -0,0 +1,175 @@
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Iterator
+
+from fastapi import Request, Response
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.middleware.base import RequestResponseEndpoint
+
+from src.core.config import settings
+
+if TYPE_CHECKING:
+    from src.db.slow_queries import SlowQueryLog
+
+logger = logging.getLogger(__name__)
+
+_START_TIMES_KEY = "query_start_times"
+_CHECKOUT_KEY = "checkout"
+
+
+@dataclass
+class QueryStats:
+    """Statements executed (and time spent in the database) for a scope."""
+    count: int = 0
+    duration: float = 0.0  # seconds
+    statements: Counter = field(default_factory=Counter)
+    checkouts: int = 0  # pool connections checked out
+    connection_time: float = 0.0  # seconds pool connections were held
+    parent: "QueryStats | None" = field(default=None, repr=False)
+
+    def record(self, statement: str, duration: float) -> None:
+        """Record a statement here and in every enclosing scope."""
+        stats = self
+        while stats is not None:
+            stats.count += 1
+            stats.duration += duration
+            stats.statements[statement] += 1
+            stats = stats.parent
+
+    def record_checkout(self, held: float) -> None:
+        """Record a pool connection held for ``held`` seconds, here and above."""
+        stats = self
+        while stats is not None:
+            stats.checkouts += 1
+            stats.connection_time += held
+            stats = stats.parent
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """Statements executed at least ``threshold`` times (likely N+1)."""
+        return [
+            (statement, count)
+            for statement, count in self.statements.most_common()
+            if count >= threshold
+        ]
+
+
+_query_stats: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+def get_query_stats() -> QueryStats | None:
+    """Get the statistics of the innermost active ``track_queries`` scope."""
+    return _query_stats.get()
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Count statements executed in this block (and in tasks it starts).
+
+    Scopes nest: statements are also counted in every enclosing scope.
+    """
+    stats = QueryStats(parent=_query_stats.get())
+    token = _query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _query_stats.reset(token)
+
+
+@contextmanager
+def untracked() -> Iterator[None]:
+    """Don't count statements executed in this block (e.g. diagnostics)."""
+    token = _query_stats.set(None)
+    try:
+        yield
+    finally:
+        _query_stats.reset(token)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault(_START_TIMES_KEY, []).append(time.perf_counter())
+
+
+def _handle_error(exception_context: Any) -> None:
+    # after_cursor_execute is not called for failed statements
+    connection = exception_context.connection
+    if connection is not None and connection.info.get(_START_TIMES_KEY):
+        connection.info[_START_TIMES_KEY].pop()
+
+
+def _checkout(dbapi_connection, connection_record, connection_proxy) -> None:
+    # Attributed to the scope that checked the connection out, wherever it
+    # is returned
+    stats = _query_stats.get()
+    if stats is not None:
+        connection_record.info[_CHECKOUT_KEY] = (stats, time.perf_counter())
+
+
+def _checkin(dbapi_connection, connection_record) -> None:
+    checkout = connection_record.info.pop(_CHECKOUT_KEY, None)
+    if checkout is not None:
+        stats, checked_out_at = checkout
+        stats.record_checkout(time.perf_counter() - checked_out_at)
+
+
+def instrument_engine(engine: Engine, slow_query_log: "SlowQueryLog | None" = None) -> None:
+    """Attach statement timing to an engine (use ``async_engine.sync_engine``).
+
+    Every statement is counted in the active ``track_queries`` scopes and, if
+    a slow query log is given, passed to it with its duration. The time each
+    pool connection is held is recorded in the scope that checked it out.
+    """
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+        duration = time.perf_counter() - conn.info[_START_TIMES_KEY].pop()
+        stats = _query_stats.get()
+        if stats is not None:
+            stats.record(statement, duration)
+        if slow_query_log is not None:
+            slow_query_log.observe(conn, statement, parameters, duration, executemany)
+
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+    event.listen(engine, "checkout", _checkout)
+    event.listen(engine, "checkin", _checkin)
+
+
+async def query_budget_middleware(request: Request, call_next: RequestResponseEndpoint) -> Response:
+    """Count statements per request, report them and flag budget overruns.
+
+    In DEBUG the totals, and how long pool connections were held, are
+    exposed as ``Server-Timing`` headers. Requests
+    running more than SQL_QUERY_BUDGET statements, or repeating the same
+    statement SQL_REPEATED_QUERY_THRESHOLD times, are logged as warnings.
+    """
+    with track_queries() as stats:
+        response = await call_next(request)
+
+    path = request.url.path
+    if stats.count > settings.SQL_QUERY_BUDGET:
+        logger.warning(
+            "%s %s ran %d SQL statements (budget %d) in %.1f ms, holding "
+            "connections for %.1f ms",
+            request.method, path, stats.count, settings.SQL_QUERY_BUDGET,
+            stats.duration * 1000, stats.connection_time * 1000,
+        )
+    for statement, count in stats.repeated(settings.SQL_REPEATED_QUERY_THRESHOLD):
+        logger.warning(
+            "%s %s ran the same statement %d times (possible N+1): %s",
+            request.method, path, count, statement,
+        )
+
+    if settings.DEBUG:
+        response.headers.append(
+            "Server-Timing",
+            f'db;dur={stats.duration * 1000:.1f};desc="{stats.count} queries"',
+        )
+        response.headers.append(
+            "Server-Timing",
+            f'db-conn;dur={stats.connection_time * 1000:.1f};desc="{stats.checkouts} checkouts"',
+        )
+    return response
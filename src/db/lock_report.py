@@ -0,0 +1,260 @@
+"""Report the table locks each migration takes, from Alembic's offline SQL.
+
+Usage:
+    alembic upgrade head --sql | python -m src.db.lock_report
+    python -m src.db.lock_report upgrade.sql
+
+Nothing is executed. Every statement is mapped to the lock Postgres takes on
+its table, and statements that block reads or writes, scan or rewrite the
+table, or wait for a lock without a lock_timeout are flagged. The exit code
+is 1 when anything was flagged, so it can gate CI.
+"""
+import argparse
+import re
+import sys
+from dataclasses import dataclass, field
+from typing import Iterator
+
+ACCESS_SHARE = "ACCESS SHARE"
+ROW_EXCLUSIVE = "ROW EXCLUSIVE"
+SHARE_UPDATE_EXCLUSIVE = "SHARE UPDATE EXCLUSIVE"
+SHARE = "SHARE"
+SHARE_ROW_EXCLUSIVE = "SHARE ROW EXCLUSIVE"
+EXCLUSIVE = "EXCLUSIVE"
+ACCESS_EXCLUSIVE = "ACCESS EXCLUSIVE"
+
+# What each lock blocks for the application's own queries
+BLOCKS = {
+    ACCESS_SHARE: "nothing",
+    ROW_EXCLUSIVE: "nothing",
+    SHARE_UPDATE_EXCLUSIVE: "nothing",
+    SHARE: "writes",
+    SHARE_ROW_EXCLUSIVE: "writes",
+    EXCLUSIVE: "writes",
+    ACCESS_EXCLUSIVE: "reads and writes",
+}
+
+# Defaults evaluated per row force a table rewrite when adding a column
+_VOLATILE_DEFAULT = re.compile(
+    r"DEFAULT\s+.*\b(random|gen_random_uuid|uuid_generate_v\d|clock_timestamp|nextval)\s*\(",
+    re.IGNORECASE,
+)
+NOT_NULL_SCAN_WARNING = (
+    "scans the table under the lock unless a valid CHECK (column IS NOT NULL) "
+    "exists; use src.db.migrations.add_not_null"
+)
+
+_TABLE = r'((?:"[^"]+"|\w+)(?:\.(?:"[^"]+"|\w+))?)'
+_RUNNING = re.compile(r"--\s*Running\s+(upgrade|downgrade)\s+(.*)", re.IGNORECASE)
+_NOT_NULL_CHECK = re.compile(
+    r"ADD\s+CONSTRAINT\s+(\S+)\s+CHECK\s*\(\s*(\S+)\s+IS\s+NOT\s+NULL\s*\)", re.IGNORECASE
+)
+_SET_NOT_NULL = re.compile(r"ALTER\s+COLUMN\s+(\S+)\s+SET\s+NOT\s+NULL", re.IGNORECASE)
+
+
+@dataclass
+class StatementReport:
+    """The lock taken by one statement and what to look out for."""
+    migration: str | None
+    statement: str
+    lock: str | None = None
+    table: str | None = None
+    warnings: list[str] = field(default_factory=list)
+
+    @property
+    def blocks(self) -> str:
+        return BLOCKS.get(self.lock, "nothing")
+
+
+def split_statements(sql: str) -> Iterator[tuple[str | None, str]]:
+    """Yield (migration, statement) pairs from Alembic's offline output."""
+    migration = None
+    lines: list[str] = []
+    for line in sql.splitlines():
+        stripped = line.strip()
+        if not lines:
+            running = _RUNNING.match(stripped)
+            if running:
+                migration = f"{running[1]} {' '.join(running[2].split())}"
+                continue
+            if not stripped or stripped.startswith("--"):
+                continue
+        lines.append(line)
+        statement = "\n".join(lines)
+        # A ';' inside a $$-quoted function body does not end the statement
+        if stripped.endswith(";") and statement.count("$$") % 2 == 0:
+            yield migration, statement.strip().rstrip(";").strip()
+            lines = []
+    if lines:
+        yield migration, "\n".join(lines).strip()
+
+
+def _match_table(pattern: str, statement: str) -> str | None:
+    match = re.search(pattern + _TABLE, statement, re.IGNORECASE)
+    return match[1] if match else None
+
+
+def _alter_table(report: StatementReport, sql: str) -> None:
+    report.table = _match_table(r"^ALTER\s+TABLE\s+(?:IF\s+EXISTS\s+)?(?:ONLY\s+)?", sql)
+    not_valid = re.search(r"\bNOT\s+VALID\b", sql, re.IGNORECASE)
+
+    if re.search(r"\bVALIDATE\s+CONSTRAINT\b", sql, re.IGNORECASE):
+        report.lock = SHARE_UPDATE_EXCLUSIVE
+        return
+
+    if re.search(r"\b(FOREIGN\s+KEY|REFERENCES)\b", sql, re.IGNORECASE):
+        report.lock = SHARE_ROW_EXCLUSIVE
+        if not not_valid:
+            report.warnings.append(
+                "checks every existing row while blocking writes; add the foreign key "
+                "NOT VALID and VALIDATE CONSTRAINT it separately"
+            )
+        return
+
+    report.lock = ACCESS_EXCLUSIVE
+    if re.search(r"\bADD\s+(CONSTRAINT\s+\S+\s+)?CHECK\b", sql, re.IGNORECASE) and not not_valid:
+        report.warnings.append(
+            "scans the table under the lock; add the constraint NOT VALID and "
+            "VALIDATE CONSTRAINT it separately"
+        )
+    if re.search(r"\bSET\s+NOT\s+NULL\b", sql, re.IGNORECASE):
+        report.warnings.append(NOT_NULL_SCAN_WARNING)
+    if re.search(r"\bALTER\s+(COLUMN\s+)?\S+\s+(SET\s+DATA\s+)?TYPE\b", sql, re.IGNORECASE):
+        report.warnings.append("may rewrite the whole table under the lock")
+    if re.search(r"\bADD\s+(COLUMN\s+)?", sql, re.IGNORECASE) and _VOLATILE_DEFAULT.search(sql):
+        report.warnings.append(
+            "a volatile default rewrites the whole table under the lock; add the "
+            "column without it and backfill"
+        )
+    if re.search(r"\bADD\s+(CONSTRAINT\s+\S+\s+)?(PRIMARY\s+KEY|UNIQUE)\b", sql, re.IGNORECASE) \
+            and not re.search(r"\bUSING\s+INDEX\b", sql, re.IGNORECASE):
+        report.warnings.append(
+            "builds an index under the lock; create it concurrently first and "
+            "add the constraint USING INDEX"
+        )
+
+
+def classify(migration: str | None, statement: str) -> StatementReport:
+    """Work out the table lock a single statement takes."""
+    report = StatementReport(migration, statement)
+    sql = " ".join(statement.split())
+    upper = sql.upper()
+
+    if re.match(r"CREATE\s+(UNIQUE\s+)?INDEX\b", upper):
+        report.table = _match_table(r"\bON\s+(?:ONLY\s+)?", sql)
+        if " CONCURRENTLY " in f" {upper} ":
+            report.lock = SHARE_UPDATE_EXCLUSIVE
+        else:
+            report.lock = SHARE
+            report.warnings.append(
+                "blocks writes for the whole build; use "
+                "src.db.migrations.create_index_concurrently"
+            )
+    elif re.match(r"DROP\s+INDEX\b", upper):
+        if " CONCURRENTLY " in f" {upper} ":
+            report.lock = SHARE_UPDATE_EXCLUSIVE
+        else:
+            report.lock = ACCESS_EXCLUSIVE
+            report.warnings.append("use src.db.migrations.drop_index_concurrently")
+    elif re.match(r"REINDEX\b", upper):
+        report.lock = SHARE_UPDATE_EXCLUSIVE if "CONCURRENTLY" in upper else SHARE
+    elif re.match(r"ALTER\s+TABLE\b", upper):
+        _alter_table(report, sql)
+    elif re.match(r"(DROP\s+TABLE|TRUNCATE)\b", upper):
+        report.lock = ACCESS_EXCLUSIVE
+        report.table = _match_table(r"^(?:DROP\s+TABLE|TRUNCATE)\s+(?:TABLE\s+)?(?:IF\s+EXISTS\s+)?", sql)
+    elif re.match(r"LOCK\b", upper):
+        report.table = _match_table(r"^LOCK\s+(?:TABLE\s+)?(?:ONLY\s+)?", sql)
+        mode = re.search(r"\bIN\s+(.+?)\s+MODE\b", upper)
+        report.lock = mode[1] if mode else ACCESS_EXCLUSIVE
+    elif re.match(r"(UPDATE|DELETE|INSERT)\b", upper):
+        report.lock = ROW_EXCLUSIVE
+        report.table = _match_table(r"^(?:UPDATE|DELETE\s+FROM|INSERT\s+INTO)\s+(?:ONLY\s+)?", sql)
+        if re.match(r"(UPDATE|DELETE)\b", upper) and " WHERE " not in f" {upper} ":
+            report.warnings.append(
+                "changes every row in one transaction; use src.db.migrations.backfill"
+            )
+    elif re.match(r"VACUUM\b", upper):
+        report.lock = SHARE_UPDATE_EXCLUSIVE
+    return report
+
+
+def build_report(sql: str) -> list[StatementReport]:
+    """Classify every statement of an offline migration script."""
+    reports = []
+    session_timeout = local_timeout = False
+    # CHECK (column IS NOT NULL) constraints, by name, and the (table, column)
+    # pairs whose constraint was validated, so SET NOT NULL skips the scan
+    not_null_checks: dict[str, tuple[str | None, str]] = {}
+    checked_columns: set[tuple[str | None, str]] = set()
+
+    for migration, statement in split_statements(sql):
+        upper = " ".join(statement.split()).upper()
+
+        timeout = re.match(r"SET\s+(LOCAL\s+|SESSION\s+)?LOCK_TIMEOUT\s*(=|TO)\s*'?(\w+)", upper)
+        if timeout:
+            enabled = timeout[3] not in ("0", "DEFAULT")
+            if timeout[1] and timeout[1].strip() == "LOCAL":
+                local_timeout = enabled
+            else:
+                session_timeout = enabled
+            continue
+        if re.match(r"(COMMIT|ROLLBACK|END)\b", upper):
+            local_timeout = False
+            continue
+
+        report = classify(migration, statement)
+        if report.table and report.table.strip('"') == "alembic_version":
+            continue
+        if report.lock is None:
+            continue
+
+        check = _NOT_NULL_CHECK.search(statement)
+        if check:
+            not_null_checks[check[1]] = (report.table, check[2])
+        validated = re.search(r"VALIDATE\s+CONSTRAINT\s+(\S+)", statement, re.IGNORECASE)
+        if validated and validated[1] in not_null_checks:
+            checked_columns.add(not_null_checks[validated[1]])
+        set_not_null = _SET_NOT_NULL.search(statement)
+        if set_not_null and (report.table, set_not_null[1]) in checked_columns:
+            report.warnings.remove(NOT_NULL_SCAN_WARNING)
+
+        if report.blocks != "nothing" and not (session_timeout or local_timeout):
+            report.warnings.append(
+                "no lock_timeout: while waiting for the lock it blocks every query "
+                "queued behind it"
+            )
+        reports.append(report)
+    return reports
+
+
+def format_report(reports: list[StatementReport]) -> str:
+    lines = []
+    migration = object()
+    for report in reports:
+        if report.migration != migration:
+            migration = report.migration
+            lines.append(migration or "(no migration header)")
+        statement = " ".join(report.statement.split())
+        if len(statement) > 100:
+            statement = statement[:97] + "..."
+        lines.append(
+            f"  {report.lock:<22} {report.table or '-':<20} "
+            f"blocks {report.blocks:<16} {statement}"
+        )
+        lines.extend(f"      ! {warning}" for warning in report.warnings)
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("file", nargs="?", type=argparse.FileType(), default=sys.stdin)
+    args = parser.parse_args()
+
+    reports = build_report(args.file.read())
+    print(format_report(reports) or "No table locks taken.")
+    sys.exit(1 if any(report.warnings for report in reports) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+import logging
+import time
+from typing import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Helpers for migrations that must not lock large tables for long. Use them
+# in migration scripts next to ``op``; see alembic/templates/ for examples
+# and ``python -m src.db.lock_report`` to check what a migration will lock.
+
+
+def _quote(name: str) -> str:
+    return op.get_context().impl.dialect.identifier_preparer.quote(name)
+
+
+def set_lock_timeout(timeout_ms: int = settings.MIGRATION_LOCK_TIMEOUT_MS) -> None:
+    """Override the lock timeout for the rest of the current migration.
+
+    A DDL statement waiting for its lock blocks every query queued behind it,
+    so failing fast (and re-running the migration) is safer than waiting.
+    ``alembic/env.py`` already sets ``MIGRATION_LOCK_TIMEOUT_MS`` for the
+    whole run.
+    """
+    op.execute(f"SET LOCAL lock_timeout = {int(timeout_ms)}")
+
+
+def create_index_concurrently(
+    index_name: str,
+    table_name: str,
+    columns: Sequence[str],
+    *,
+    unique: bool = False,
+    where: str | None = None
+) -> None:
+    """Create an index with ``CREATE INDEX CONCURRENTLY``.
+
+    This only takes a SHARE UPDATE EXCLUSIVE lock, so reads and writes go on
+    during the build, but it cannot run in a transaction: the migration's
+    transaction is committed first. A failed concurrent build leaves an
+    invalid index behind, which is dropped so re-running the migration
+    retries the build.
+    """
+    context = op.get_context()
+    with context.autocommit_block():
+        if not context.as_sql:
+            invalid = op.get_bind().execute(
+                sa.text(
+                    "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+                    "WHERE c.relname = :name AND NOT i.indisvalid"
+                ),
+                {"name": index_name},
+            ).scalar()
+            if invalid:
+                logger.warning("Dropping invalid index %s from a failed build", index_name)
+                op.drop_index(index_name, postgresql_concurrently=True)
+
+        op.create_index(
+            index_name,
+            table_name,
+            list(columns),
+            unique=unique,
+            postgresql_where=sa.text(where) if where else None,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def drop_index_concurrently(index_name: str) -> None:
+    """Drop an index with ``DROP INDEX CONCURRENTLY`` (outside the transaction)."""
+    with op.get_context().autocommit_block():
+        op.drop_index(index_name, postgresql_concurrently=True, if_exists=True)
+
+
+def add_not_null(table_name: str, column_name: str) -> None:
+    """Make a column NOT NULL without holding an exclusive lock during the scan.
+
+    A ``CHECK (column IS NOT NULL) NOT VALID`` constraint is added and
+    validated under a SHARE UPDATE EXCLUSIVE lock; ``SET NOT NULL`` then uses
+    it instead of scanning the table (Postgres 12+), and it is dropped again.
+    """
+    table, column = _quote(table_name), _quote(column_name)
+    constraint = _quote(f"{table_name}_{column_name}_not_null")
+    op.execute(
+        f"ALTER TABLE {table} ADD CONSTRAINT {constraint} "
+        f"CHECK ({column} IS NOT NULL) NOT VALID"
+    )
+    # Every statement commits on its own, so the short ACCESS EXCLUSIVE locks
+    # are not held while the constraint is validated
+    with op.get_context().autocommit_block():
+        op.execute(f"ALTER TABLE {table} VALIDATE CONSTRAINT {constraint}")
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN {column} SET NOT NULL")
+        op.execute(f"ALTER TABLE {table} DROP CONSTRAINT {constraint}")
+
+
+def backfill(
+    table_name: str,
+    values: str,
+    where: str,
+    *,
+    key: str = "id",
+    batch_size: int = settings.MIGRATION_BACKFILL_BATCH_SIZE,
+    pause_seconds: float = settings.MIGRATION_BACKFILL_PAUSE_SECONDS
+) -> int:
+    """Update rows matching ``where`` with ``SET values`` in committed batches.
+
+    Each batch is an ``UPDATE ... WHERE key IN (SELECT key ... ORDER BY key
+    LIMIT n)`` committed on its own, so row locks are short-lived, and the
+    pause between batches throttles the write load (and replication lag).
+    ``where`` must stop matching a row once it is backfilled, e.g.
+    ``new_column IS NULL``: an interrupted backfill then resumes where it
+    stopped when the migration is re-run. Deploy code that writes the new
+    column before running the backfill.
+
+    In offline (``--sql``) mode a single batch is emitted, to be repeated
+    until it updates no rows. Returns the number of updated rows.
+    """
+    table, key_column = _quote(table_name), _quote(key)
+
+    def batch_query(after: bool) -> str:
+        condition = f"({where}) AND {key_column} > :after" if after else f"({where})"
+        return (
+            f"UPDATE {table} SET {values} WHERE {key_column} IN ("
+            f"SELECT {key_column} FROM {table} WHERE {condition} "
+            f"ORDER BY {key_column} LIMIT {int(batch_size)}"
+            f") RETURNING {key_column}"
+        )
+
+    context = op.get_context()
+    with context.autocommit_block():
+        if context.as_sql:
+            op.execute(batch_query(after=False))
+            return 0
+
+        bind = op.get_bind()
+        updated = 0
+        last_key = None
+        while True:
+            # Rows up to the last key were already handled; skipping them keeps
+            # later batches from rescanning the start of the index
+            result = bind.execute(
+                sa.text(batch_query(after=last_key is not None)),
+                {"after": last_key} if last_key is not None else {},
+            )
+            keys = result.scalars().all()
+            updated += len(keys)
+            logger.info("Backfilled %d rows of %s", updated, table_name)
+
+            if len(keys) < batch_size:
+                return updated
+            last_key = max(keys)
+            time.sleep(pause_seconds)
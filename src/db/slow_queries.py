@@ -0,0 +1,138 @@
+import asyncio
+import itertools
+import logging
+import random
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.core.config import settings
+from src.db.instrumentation import untracked
+
+logger = logging.getLogger(__name__)
+
+# Execution option marking connections whose statements must not be recorded
+SKIP_OPTION = "slow_query_log_skip"
+
+_EXPLAIN_PREFIX = "EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) "
+
+
+@dataclass
+class SlowQuery:
+    """A statement that ran longer than the threshold.
+
+    Parameter values are never kept, only their types.
+    """
+    id: int
+    statement: str
+    parameter_types: list[str]
+    duration_ms: float
+    executemany: bool
+    recorded_at: datetime = field(default_factory=datetime.utcnow)
+    plan: Any | None = None
+    explain_error: str | None = None
+
+
+def _redact(parameters: Any) -> list[str]:
+    if isinstance(parameters, dict):
+        return [f"{name}: {type(value).__name__}" for name, value in parameters.items()]
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return []
+
+
+class SlowQueryLog:
+    """Bounded in-memory log of slow statements with sampled EXPLAIN plans.
+
+    ``observe`` is called from the engine's cursor events (see
+    ``src.db.instrumentation.instrument_engine``). For a sampled fraction of
+    slow SELECTs, ``EXPLAIN (ANALYZE, BUFFERS)`` is run afterwards on a
+    separate connection, one at a time, so the request that triggered it is
+    not slowed down. EXPLAIN ANALYZE executes the query again, which is why
+    it is limited to SELECTs and off by default.
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine | None = None,
+        threshold_ms: float = settings.SLOW_QUERY_THRESHOLD_MS,
+        max_entries: int = settings.SLOW_QUERY_LOG_SIZE,
+        explain_sample_rate: float = settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE,
+        explain_timeout_ms: int = settings.SLOW_QUERY_EXPLAIN_TIMEOUT_MS,
+    ):
+        self.engine = engine
+        self.threshold_ms = threshold_ms
+        self.explain_sample_rate = explain_sample_rate
+        self.explain_timeout_ms = explain_timeout_ms
+        self._entries: deque[SlowQuery] = deque(maxlen=max_entries)
+        self._ids = itertools.count(1)
+        self._explaining = False
+        self._explain_task: asyncio.Task | None = None
+
+    def entries(self) -> list[SlowQuery]:
+        """Recorded slow queries, newest first."""
+        return list(reversed(self._entries))
+
+    def clear(self) -> None:
+        """Forget all recorded slow queries."""
+        self._entries.clear()
+
+    def observe(
+        self,
+        conn: Connection,
+        statement: str,
+        parameters: Any,
+        duration: float,
+        executemany: bool
+    ) -> None:
+        """Record a statement if it ran longer than the threshold."""
+        duration_ms = duration * 1000
+        if duration_ms < self.threshold_ms or conn.get_execution_options().get(SKIP_OPTION):
+            return
+
+        entry = SlowQuery(
+            id=next(self._ids),
+            statement=statement,
+            parameter_types=_redact(parameters),
+            duration_ms=duration_ms,
+            executemany=executemany,
+        )
+        self._entries.append(entry)
+        logger.warning("Slow query #%d (%.1f ms): %s", entry.id, duration_ms, statement)
+
+        if self._should_explain(statement, executemany):
+            self._explaining = True
+            self._explain_task = asyncio.get_running_loop().create_task(
+                self._explain(entry, statement, parameters)
+            )
+
+    def _should_explain(self, statement: str, executemany: bool) -> bool:
+        return (
+            self.engine is not None
+            and not self._explaining
+            and not executemany
+            and statement.lstrip().upper().startswith("SELECT")
+            and random.random() < self.explain_sample_rate
+        )
+
+    async def _explain(self, entry: SlowQuery, statement: str, parameters: Any) -> None:
+        try:
+            with untracked():
+                async with self.engine.connect() as conn:
+                    conn = await conn.execution_options(**{SKIP_OPTION: True})
+                    await conn.exec_driver_sql(
+                        f"SET LOCAL statement_timeout = {int(self.explain_timeout_ms)}"
+                    )
+                    result = await conn.exec_driver_sql(_EXPLAIN_PREFIX + statement, parameters)
+                    entry.plan = result.scalar()
+                    # Never keep side effects of the re-executed query
+                    await conn.rollback()
+        except Exception as exc:
+            entry.explain_error = str(exc)
+            logger.warning("EXPLAIN failed for slow query #%d: %s", entry.id, exc)
+        finally:
+            self._explaining = False
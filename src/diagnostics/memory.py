@@ -0,0 +1,211 @@
+import gc
+import linecache
+import os
+import random
+import threading
+import tracemalloc
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy.orm import Session
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from src.core.config import settings
+
+# Allocations made by tracemalloc itself and by reading source lines for
+# reports are noise in every diff
+_SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, linecache.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+)
+
+
+def start_tracing(frames: int = settings.MEMORY_TRACE_FRAMES) -> None:
+    """Start tracing allocations. Makes allocations noticeably slower."""
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+
+
+def stop_tracing() -> None:
+    """Stop tracing allocations and forget the traces."""
+    tracemalloc.stop()
+
+
+def rss_bytes() -> int | None:
+    """Resident set size of this process, or None where it can't be read."""
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def gc_stats(top: int = 20) -> dict[str, Any]:
+    """Garbage collector state and counts of live objects by type.
+
+    Walks every object tracked by the collector, so this takes a while on a
+    large heap. SQLAlchemy sessions are counted separately along with the
+    objects held in their identity maps, as leaked sessions keep every row
+    they loaded alive.
+    """
+    objects = gc.get_objects()
+    types = Counter(type(obj).__qualname__ for obj in objects)
+    sessions = [obj for obj in objects if isinstance(obj, Session)]
+    del objects
+
+    return {
+        "counts": list(gc.get_count()),
+        "thresholds": list(gc.get_threshold()),
+        "generations": gc.get_stats(),
+        "garbage": len(gc.garbage),
+        "objects": sum(types.values()),
+        "top_types": [{"type": name, "count": count} for name, count in types.most_common(top)],
+        "sessions": len(sessions),
+        "identity_map_size": sum(len(session.identity_map) for session in sessions),
+    }
+
+
+@dataclass
+class StoredSnapshot:
+    """A tracemalloc snapshot taken on request."""
+    id: int
+    snapshot: tracemalloc.Snapshot = field(repr=False)
+    traced_bytes: int
+    rss_bytes: int | None
+    taken_at: datetime = field(default_factory=datetime.utcnow)
+
+
+class SnapshotStore:
+    """Bounded in-memory store of tracemalloc snapshots to diff."""
+
+    def __init__(self, max_snapshots: int = settings.MEMORY_MAX_SNAPSHOTS):
+        self._snapshots: deque[StoredSnapshot] = deque(maxlen=max_snapshots)
+        self._next_id = 1
+
+    def take(self) -> StoredSnapshot:
+        """Snapshot the traced allocations. Tracing must have been started."""
+        snapshot = tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+        stored = StoredSnapshot(
+            id=self._next_id,
+            snapshot=snapshot,
+            traced_bytes=tracemalloc.get_traced_memory()[0],
+            rss_bytes=rss_bytes(),
+        )
+        self._next_id += 1
+        self._snapshots.append(stored)
+        return stored
+
+    def get(self, snapshot_id: int) -> StoredSnapshot | None:
+        return next((s for s in self._snapshots if s.id == snapshot_id), None)
+
+    def entries(self) -> list[StoredSnapshot]:
+        """Stored snapshots, newest first."""
+        return list(reversed(self._snapshots))
+
+    def clear(self) -> None:
+        self._snapshots.clear()
+
+
+def diff_snapshots(
+    base: StoredSnapshot,
+    current: StoredSnapshot,
+    group_by: str = "lineno",
+    limit: int = 20
+) -> list[dict[str, Any]]:
+    """Allocation sites that grew the most between two snapshots."""
+    stats = current.snapshot.compare_to(base.snapshot, group_by)
+    return [
+        {
+            "traceback": [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback],
+            "size_bytes": stat.size,
+            "size_diff_bytes": stat.size_diff,
+            "count": stat.count,
+            "count_diff": stat.count_diff,
+        }
+        for stat in stats[:limit]
+    ]
+
+
+@dataclass
+class RouteAllocations:
+    """Traced memory left allocated by sampled requests of a route."""
+    route: str
+    samples: int = 0
+    total_bytes: int = 0
+    max_bytes: int = 0
+
+
+class RouteAllocationStats:
+    """Net traced memory per route, aggregated over sampled requests."""
+
+    def __init__(self):
+        self._routes: dict[str, RouteAllocations] = {}
+        self._lock = threading.Lock()
+
+    def add(self, route: str, net_bytes: int) -> None:
+        with self._lock:
+            stats = self._routes.setdefault(route, RouteAllocations(route))
+            stats.samples += 1
+            stats.total_bytes += net_bytes
+            stats.max_bytes = max(stats.max_bytes, net_bytes)
+
+    def entries(self) -> list[RouteAllocations]:
+        """Routes, the ones retaining the most memory per request first."""
+        with self._lock:
+            routes = list(self._routes.values())
+        return sorted(routes, key=lambda r: r.total_bytes / r.samples, reverse=True)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._routes.clear()
+
+
+snapshot_store = SnapshotStore()
+route_allocations = RouteAllocationStats()
+
+
+class MemorySamplingMiddleware:
+    """Record the traced memory a sample of requests leaves allocated.
+
+    Only samples while tracemalloc is tracing. The difference in traced
+    memory before and after a request includes allocations of requests
+    running concurrently, so the numbers are only meaningful aggregated over
+    many samples: a route that leaks shows up with a total that keeps
+    growing.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        sample_rate: float = settings.MEMORY_ROUTE_SAMPLE_RATE,
+        stats: RouteAllocationStats = route_allocations
+    ):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.stats = stats
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or not tracemalloc.is_tracing()
+            or random.random() >= self.sample_rate
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        before = tracemalloc.get_traced_memory()[0]
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            if tracemalloc.is_tracing():
+                # The route template rather than the path, so ids don't
+                # split one route into many
+                route = scope.get("route")
+                path = getattr(route, "path", scope["path"])
+                self.stats.add(
+                    f"{scope['method']} {path}",
+                    tracemalloc.get_traced_memory()[0] - before,
+                )
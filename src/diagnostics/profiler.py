@@ -0,0 +1,290 @@
+import asyncio
+import logging
+import random
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from types import FrameType
+from typing import Any
+from uuid import uuid4
+
+from jose import JWTError, jwt
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+_AWAIT_FRAME = ("[await]", "", 0)
+
+
+def _frame_key(frame: FrameType) -> tuple[str, str, int]:
+    code = frame.f_code
+    return (getattr(code, "co_qualname", code.co_name), code.co_filename, code.co_firstlineno)
+
+
+def _await_chain(coro: Any) -> tuple[list[FrameType], Any]:
+    """Frames of a suspended coroutine chain (outermost first) and what it awaits."""
+    frames = []
+    while coro is not None:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None)
+        if frame is None:
+            break
+        frames.append(frame)
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None)
+    return frames, coro
+
+
+class ProfileSession:
+    """Samples collected for one request.
+
+    A sample is taken from the event loop thread's stack while the request's
+    task is running (CPU time) and from the task's suspended coroutine chain
+    while it is waiting (await time, e.g. on the database).
+    """
+
+    def __init__(self, task: asyncio.Task, root: FrameType, thread_id: int):
+        self.task = task
+        self.root = root
+        self.thread_id = thread_id
+        self.frames: dict[tuple[str, str, int], int] = {}
+        self.cpu_samples: list[list[int]] = []
+        self.cpu_weights: list[float] = []
+        self.await_samples: list[list[int]] = []
+        self.await_weights: list[float] = []
+
+    def _index(self, key: tuple[str, str, int]) -> int:
+        if key not in self.frames:
+            self.frames[key] = len(self.frames)
+        return self.frames[key]
+
+    def sample(self, thread_frame: FrameType | None, weight: float) -> None:
+        """Record one sample, weighted by the time since the previous one."""
+        stack = []
+        frame = thread_frame
+        while frame is not None:
+            stack.append(frame)
+            if frame is self.root:
+                stack.reverse()
+                self.cpu_samples.append([self._index(_frame_key(f)) for f in stack])
+                self.cpu_weights.append(weight)
+                return
+            frame = frame.f_back
+
+        frames, _ = _await_chain(self.task.get_coro())
+        if self.root in frames:
+            frames = frames[frames.index(self.root):]
+        self.await_samples.append(
+            [self._index(_frame_key(f)) for f in frames] + [self._index(_AWAIT_FRAME)]
+        )
+        self.await_weights.append(weight)
+
+    def to_speedscope(self, name: str) -> dict[str, Any]:
+        """Export the samples in speedscope's sampled profile format."""
+        def profile(kind: str, samples: list, weights: list) -> dict[str, Any]:
+            return {
+                "type": "sampled",
+                "name": f"{name} ({kind})",
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights,
+            }
+
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": settings.APP_NAME,
+            "activeProfileIndex": 0,
+            "shared": {
+                "frames": [
+                    {"name": func, "file": file, "line": line}
+                    for func, file, line in self.frames
+                ]
+            },
+            "profiles": [
+                profile("cpu", self.cpu_samples, self.cpu_weights),
+                profile("await", self.await_samples, self.await_weights),
+            ],
+        }
+
+
+class SamplingProfiler:
+    """Background thread sampling the stacks of active profile sessions."""
+
+    def __init__(self, interval_ms: float = settings.PROFILER_INTERVAL_MS):
+        self.interval = interval_ms / 1000
+        self._sessions: set[ProfileSession] = set()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self, task: asyncio.Task, root: FrameType) -> ProfileSession:
+        """Start sampling a task below the given root frame."""
+        session = ProfileSession(task, root, threading.get_ident())
+        with self._lock:
+            self._sessions.add(session)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="sampling-profiler", daemon=True
+                )
+                self._thread.start()
+        self._wakeup.set()
+        return session
+
+    def stop(self, session: ProfileSession) -> None:
+        """Stop sampling a session."""
+        with self._lock:
+            self._sessions.discard(session)
+
+    def _run(self) -> None:
+        last = time.perf_counter()
+        while True:
+            if not self._sessions:
+                self._wakeup.wait()
+                self._wakeup.clear()
+                last = time.perf_counter()
+                continue
+
+            time.sleep(self.interval)
+            now = time.perf_counter()
+            weight, last = (now - last) * 1000, now
+
+            frames = sys._current_frames()
+            with self._lock:
+                for session in self._sessions:
+                    session.sample(frames.get(session.thread_id), weight)
+
+
+@dataclass
+class StoredProfile:
+    """A finished request profile."""
+    id: str
+    method: str
+    path: str
+    status_code: int | None
+    duration_ms: float
+    cpu_ms: float
+    await_ms: float
+    speedscope: dict[str, Any] = field(repr=False)
+    recorded_at: datetime = field(default_factory=datetime.utcnow)
+
+
+class ProfileStore:
+    """Bounded in-memory store of recent profiles."""
+
+    def __init__(self, max_profiles: int = settings.PROFILER_MAX_PROFILES):
+        self._profiles: deque[StoredProfile] = deque(maxlen=max_profiles)
+
+    def add(self, profile: StoredProfile) -> None:
+        self._profiles.append(profile)
+
+    def get(self, profile_id: str) -> StoredProfile | None:
+        return next((p for p in self._profiles if p.id == profile_id), None)
+
+    def entries(self) -> list[StoredProfile]:
+        """Stored profiles, newest first."""
+        return list(reversed(self._profiles))
+
+
+profiler = SamplingProfiler()
+profile_store = ProfileStore()
+
+
+async def _is_superuser(headers: dict[bytes, bytes]) -> bool:
+    # Imported here as they pull in the database layer
+    from src.db.base import AsyncSessionLocal
+    from src.db.instrumentation import untracked
+    from src.users import service as users_service
+
+    scheme, _, token = headers.get(b"authorization", b"").decode("latin-1").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    try:
+        payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
+    except JWTError:
+        return False
+
+    with untracked():
+        async with AsyncSessionLocal() as db:
+            user = await users_service.get_by_id(db, payload.get("user_id"))
+    return bool(user and user["is_active"] and user["is_superuser"])
+
+
+class ProfilerMiddleware:
+    """Profile requests sent by a superuser with ``X-Profile: 1``, or a sample.
+
+    The profile ID is returned in ``X-Profile-Id``; the profile itself can be
+    fetched from ``/api/v1/diagnostics/profiles/{id}``. This is a plain ASGI
+    middleware so the request handler runs in the same task as ``__call__``,
+    which is used as the root of every sampled stack. Add it before other
+    middleware so it sits closest to the router.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        sample_rate: float = settings.PROFILER_SAMPLE_RATE,
+        profiler: SamplingProfiler = profiler,
+        store: ProfileStore = profile_store
+    ):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.profiler = profiler
+        self.store = store
+
+    async def _should_profile(self, scope: Scope) -> bool:
+        headers = dict(scope["headers"])
+        if headers.get(PROFILE_HEADER.lower().encode()) in (b"1", b"true"):
+            try:
+                return await _is_superuser(headers)
+            except Exception:
+                logger.exception("Failed to authorize profiling request")
+                return False
+        return random.random() < self.sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not await self._should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid4().hex
+        status_code = None
+
+        async def send_with_profile_id(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message = {
+                    **message,
+                    "headers": [
+                        *message.get("headers", []),
+                        (PROFILE_ID_HEADER.lower().encode(), profile_id.encode()),
+                    ],
+                }
+            await send(message)
+
+        session = self.profiler.start(asyncio.current_task(), sys._getframe())
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            self.profiler.stop(session)
+            name = f"{scope['method']} {scope['path']}"
+            self.store.add(StoredProfile(
+                id=profile_id,
+                method=scope["method"],
+                path=scope["path"],
+                status_code=status_code,
+                duration_ms=(time.perf_counter() - start) * 1000,
+                cpu_ms=sum(session.cpu_weights),
+                await_ms=sum(session.await_weights),
+                speedscope=session.to_speedscope(name),
+            ))
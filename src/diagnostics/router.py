@@ -0,0 +1,200 @@
+import os
+import tracemalloc
+
+from fastapi import APIRouter, Depends, Query, status
+
+from src.auth.audit import auth_event_writer
+from src.auth.dependencies import get_current_active_superuser
+from src.core.exceptions import MemoryTracingNotStartedException, NotFoundException
+from src.core.schemas import ResponseModel
+from src.db.base import slow_query_log
+from src.diagnostics import memory
+from src.diagnostics.profiler import profile_store
+from src.diagnostics.schemas import (
+    AllocationDiff,
+    AuthEventStats,
+    MemorySnapshotSummary,
+    MemoryStats,
+    ProfileSummary,
+    RouteAllocationsResponse,
+    SlowQueryResponse,
+    SnapshotGroupBy,
+    UsersListCacheStats,
+)
+from src.users.cache import users_list_cache
+
+router = APIRouter(
+    prefix="/diagnostics",
+    tags=["diagnostics"],
+    dependencies=[Depends(get_current_active_superuser)],
+)
+
+
+@router.get("/slow-queries", response_model=ResponseModel[list[SlowQueryResponse]])
+async def get_slow_queries() -> dict:
+    """Get recorded slow queries, newest first. Only for superusers."""
+    return {
+        "success": True,
+        "data": slow_query_log.entries()
+    }
+
+
+@router.delete("/slow-queries", status_code=status.HTTP_204_NO_CONTENT)
+async def clear_slow_queries() -> None:
+    """Clear recorded slow queries. Only for superusers."""
+    slow_query_log.clear()
+
+
+@router.get("/profiles", response_model=ResponseModel[list[ProfileSummary]])
+async def get_profiles() -> dict:
+    """Get recent request profiles, newest first. Only for superusers."""
+    return {
+        "success": True,
+        "data": profile_store.entries()
+    }
+
+
+@router.get("/profiles/{profile_id}")
+async def get_profile(profile_id: str) -> dict:
+    """Get a request profile in speedscope format. Only for superusers.
+
+    Open the file at https://www.speedscope.app to view it as a flame graph.
+    """
+    profile = profile_store.get(profile_id)
+    if profile is None:
+        raise NotFoundException()
+    return profile.speedscope
+
+
+@router.get("/auth-events", response_model=ResponseModel[AuthEventStats])
+async def get_auth_event_stats() -> dict:
+    """Get counters of the background auth event writer. Only for superusers."""
+    return {
+        "success": True,
+        "data": {
+            "buffered": auth_event_writer.buffered,
+            "written": auth_event_writer.written,
+            "dropped": auth_event_writer.dropped,
+            "failed": auth_event_writer.failed,
+        }
+    }
+
+
+@router.get("/users-cache", response_model=ResponseModel[UsersListCacheStats])
+async def get_users_cache_stats() -> dict:
+    """Get statistics of this worker's user listing cache. Only for superusers."""
+    return {
+        "success": True,
+        "data": {
+            "entries": len(users_list_cache),
+            "size_bytes": users_list_cache.size_bytes,
+            "max_bytes": users_list_cache.max_bytes,
+            "version": users_list_cache.version,
+            "hits": users_list_cache.hits,
+            "misses": users_list_cache.misses,
+            "evictions": users_list_cache.evictions,
+            "invalidations": users_list_cache.invalidations,
+        }
+    }
+
+
+@router.delete("/users-cache", status_code=status.HTTP_204_NO_CONTENT)
+async def clear_users_cache() -> None:
+    """Drop this worker's cached user listings. Only for superusers."""
+    users_list_cache.invalidate()
+
+
+# Memory statistics are per worker: with several workers, repeated requests
+# can land on different processes (compare the returned pid).
+
+@router.get("/memory", response_model=ResponseModel[MemoryStats])
+async def get_memory_stats() -> dict:
+    """Get memory use and garbage collector statistics. Only for superusers.
+
+    Counting live objects walks the whole heap and blocks the worker briefly.
+    """
+    traced_bytes, traced_peak_bytes = tracemalloc.get_traced_memory()
+    return {
+        "success": True,
+        "data": {
+            "pid": os.getpid(),
+            "rss_bytes": memory.rss_bytes(),
+            "tracing": tracemalloc.is_tracing(),
+            "traced_bytes": traced_bytes,
+            "traced_peak_bytes": traced_peak_bytes,
+            "gc": memory.gc_stats(),
+        }
+    }
+
+
+@router.post("/memory/tracing", status_code=status.HTTP_204_NO_CONTENT)
+async def start_memory_tracing() -> None:
+    """Start tracing allocations in this worker. Only for superusers."""
+    memory.start_tracing()
+
+
+@router.delete("/memory/tracing", status_code=status.HTTP_204_NO_CONTENT)
+async def stop_memory_tracing() -> None:
+    """Stop tracing allocations and drop snapshots and route statistics. Only for superusers."""
+    memory.stop_tracing()
+    memory.snapshot_store.clear()
+    memory.route_allocations.clear()
+
+
+@router.get("/memory/snapshots", response_model=ResponseModel[list[MemorySnapshotSummary]])
+async def get_memory_snapshots() -> dict:
+    """Get stored memory snapshots, newest first. Only for superusers."""
+    return {
+        "success": True,
+        "data": memory.snapshot_store.entries()
+    }
+
+
+@router.post(
+    "/memory/snapshots",
+    response_model=ResponseModel[MemorySnapshotSummary],
+    status_code=status.HTTP_201_CREATED
+)
+async def take_memory_snapshot() -> dict:
+    """Snapshot traced allocations to diff against later. Only for superusers."""
+    if not tracemalloc.is_tracing():
+        raise MemoryTracingNotStartedException()
+    return {
+        "success": True,
+        "data": memory.snapshot_store.take()
+    }
+
+
+@router.get(
+    "/memory/snapshots/{snapshot_id}/diff",
+    response_model=ResponseModel[list[AllocationDiff]]
+)
+async def diff_memory_snapshots(
+    snapshot_id: int,
+    base: int | None = Query(None, description="Snapshot to compare with, the one before by default"),
+    group_by: SnapshotGroupBy = "lineno",
+    limit: int = Query(20, ge=1, le=500)
+) -> dict:
+    """Get the allocation sites that grew the most since another snapshot. Only for superusers."""
+    current = memory.snapshot_store.get(snapshot_id)
+    if base is None:
+        base = max(
+            (s.id for s in memory.snapshot_store.entries() if s.id < snapshot_id),
+            default=None
+        )
+    base_snapshot = memory.snapshot_store.get(base) if base is not None else None
+    if current is None or base_snapshot is None:
+        raise NotFoundException()
+    return {
+        "success": True,
+        "data": memory.diff_snapshots(base_snapshot, current, group_by, limit)
+    }
+
+
+@router.get("/memory/routes", response_model=ResponseModel[list[RouteAllocationsResponse]])
+async def get_route_allocations() -> dict:
+    """Get memory left allocated by sampled requests, per route. Only for superusers."""
+    return {
+        "success": True,
+        "data": memory.route_allocations.entries()
+    }
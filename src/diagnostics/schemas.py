@@ -0,0 +1,104 @@
+from datetime import datetime
+from typing import Any, Literal
+
+from src.core.schemas import CustomModel
+
+
+class SlowQueryResponse(CustomModel):
+    """Schema for a recorded slow query."""
+    id: int
+    statement: str
+    parameter_types: list[str]
+    duration_ms: float
+    executemany: bool
+    recorded_at: datetime
+    plan: Any | None = None
+    explain_error: str | None = None
+
+
+class ProfileSummary(CustomModel):
+    """Schema for a stored request profile."""
+    id: str
+    method: str
+    path: str
+    status_code: int | None
+    duration_ms: float
+    cpu_ms: float
+    await_ms: float
+    recorded_at: datetime
+
+
+class AuthEventStats(CustomModel):
+    """Schema for the auth event writer's counters."""
+    buffered: int
+    written: int
+    dropped: int
+    failed: int
+
+
+class UsersListCacheStats(CustomModel):
+    """Schema for the user listing response cache's statistics."""
+    entries: int
+    size_bytes: int
+    max_bytes: int
+    version: int
+    hits: int
+    misses: int
+    evictions: int
+    invalidations: int
+
+
+class ObjectTypeCount(CustomModel):
+    """Schema for the number of live objects of a type."""
+    type: str
+    count: int
+
+
+class GcStats(CustomModel):
+    """Schema for garbage collector and live object statistics."""
+    counts: list[int]
+    thresholds: list[int]
+    generations: list[dict[str, int]]
+    garbage: int
+    objects: int
+    top_types: list[ObjectTypeCount]
+    sessions: int
+    identity_map_size: int
+
+
+class MemoryStats(CustomModel):
+    """Schema for the memory use of the worker serving the request."""
+    pid: int
+    rss_bytes: int | None
+    tracing: bool
+    traced_bytes: int
+    traced_peak_bytes: int
+    gc: GcStats
+
+
+class MemorySnapshotSummary(CustomModel):
+    """Schema for a stored tracemalloc snapshot."""
+    id: int
+    traced_bytes: int
+    rss_bytes: int | None
+    taken_at: datetime
+
+
+class AllocationDiff(CustomModel):
+    """Schema for the change in allocations at one site between snapshots."""
+    traceback: list[str]
+    size_bytes: int
+    size_diff_bytes: int
+    count: int
+    count_diff: int
+
+
+class RouteAllocationsResponse(CustomModel):
+    """Schema for traced memory left allocated by sampled requests of a route."""
+    route: str
+    samples: int
+    total_bytes: int
+    max_bytes: int
+
+
+SnapshotGroupBy = Literal["lineno", "filename", "traceback"]
@@ -2,11 +2,22 @@ from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
+from sqlalchemy.exc import DBAPIError
 import logging
 
 from src.core.config import settings
-from src.core.exceptions import DetailedHTTPException
+from src.core.deadlines import QUERY_CANCELED, request_deadline_middleware
+from src.core.exceptions import DeadlineExceededException, DetailedHTTPException
+from src.core.idempotency import IdempotencyMiddleware
+from src.core.openapi import load_cached_schema
+from src.core.ratelimit import rate_limiter
+from src.db.instrumentation import query_budget_middleware
+from src.diagnostics.memory import MemorySamplingMiddleware, start_tracing
+from src.diagnostics.profiler import ProfilerMiddleware
+from src.auth.audit import auth_event_writer
 from src.auth.router import router as auth_router
+from src.diagnostics.router import router as diagnostics_router
+from src.users.events import UserEventListener
 from src.users.router import router as users_router
 
 logging.basicConfig(level=logging.DEBUG)
@@ -16,8 +27,20 @@ logger = logging.getLogger(__name__)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Initialize anything needed at startup
+    if settings.RATE_LIMIT_ENABLED:
+        # Raises here rather than on each login if /dev/shm is unusable
+        rate_limiter.start()
+    user_event_listener = UserEventListener()
+    if settings.USER_EVENTS_LISTEN:
+        user_event_listener.start()
+    if settings.AUTH_EVENTS_ENABLED:
+        auth_event_writer.start()
+    if settings.MEMORY_TRACING_ENABLED:
+        start_tracing()
     yield
     # Clean up at shutdown
+    await user_event_listener.stop()
+    await auth_event_writer.stop()
 
 
 app = FastAPI(
@@ -25,6 +48,9 @@ app = FastAPI(
     description="API Template for FastAPI with PostgreSQL and JWT Authentication",
     version="1.0.0",
     lifespan=lifespan,
+    docs_url="/docs" if settings.DOCS_ENABLED else None,
+    redoc_url="/redoc" if settings.DOCS_ENABLED else None,
+    openapi_url="/openapi.json" if settings.DOCS_ENABLED else None,
 )
 
 # Global exception handler
@@ -36,9 +62,28 @@ async def detailed_http_exception_handler(request: Request, exc: DetailedHTTPExc
             "success": False,
             "message": exc.detail,
             "data": None
-        }
+        },
+        headers=exc.headers
     )
 
+
+@app.exception_handler(DBAPIError)
+async def database_error_handler(request: Request, exc: DBAPIError):
+    # Statements cancelled by the request deadline's statement_timeout
+    if getattr(exc.orig, "sqlstate", None) == QUERY_CANCELED:
+        return await detailed_http_exception_handler(request, DeadlineExceededException())
+    raise exc
+
+# Sampling profiler, added first so it wraps the router directly
+app.add_middleware(ProfilerMiddleware)
+
+# Memory left allocated per route, sampled while tracemalloc is tracing
+app.add_middleware(MemorySamplingMiddleware)
+
+# Replay responses for retried POSTs (inside CORS so replays get CORS headers)
+if settings.IDEMPOTENCY_ENABLED:
+    app.add_middleware(IdempotencyMiddleware)
+
 # Set up CORS
 logger.debug(f"CORS Configuration - Origins: {settings.CORS_ORIGINS}, Headers: {settings.CORS_HEADERS}")
 app.add_middleware(
@@ -46,7 +91,7 @@ app.add_middleware(
     allow_origins=settings.CORS_ORIGINS,
     allow_origin_regex=r"http:\/\/localhost:\d+",
     allow_credentials=True,
-    allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+    allow_methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
     allow_headers=settings.CORS_HEADERS,
     expose_headers=["*"]
 )
@@ -54,13 +99,20 @@ app.add_middleware(
 @app.middleware("http")
 async def add_cors_headers(request: Request, call_next):
     response = await call_next(request)
-    response.headers["Access-Control-Allow-Methods"] = "GET, POST, PUT, DELETE, OPTIONS"
+    response.headers["Access-Control-Allow-Methods"] = "GET, POST, PUT, PATCH, DELETE, OPTIONS"
     response.headers["Access-Control-Allow-Headers"] = ",".join(settings.CORS_HEADERS)
     return response
 
+# Count SQL statements per request
+app.middleware("http")(query_budget_middleware)
+
+# Request deadlines (outermost, so they count from the start of the request)
+app.middleware("http")(request_deadline_middleware)
+
 # Include routers
 app.include_router(auth_router, prefix="/api/v1")
 app.include_router(users_router, prefix="/api/v1")
+app.include_router(diagnostics_router, prefix="/api/v1")
 
 
 from src.core.schemas import ResponseModel
@@ -91,3 +143,8 @@ async def health_check():
             "version": "1.0.0"
         }
     )
+
+
+# Serve the schema built at image build time instead of generating it
+if settings.DOCS_ENABLED and settings.OPENAPI_SCHEMA_FILE:
+    load_cached_schema(app, settings.OPENAPI_SCHEMA_FILE)
@@ -0,0 +1,96 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Hashable
+from uuid import UUID
+
+from src.core.config import settings
+from src.users import events
+
+CACHE_HEADER = "X-Cache"
+
+
+@dataclass
+class CachedResponse:
+    """Serialised response body stored for a listing."""
+    body: bytes
+    created_at: float
+
+
+class UsersListCache:
+    """Per-process cache of serialised user listing responses.
+
+    Entries are keyed by the query parameters and a version of the users
+    table, which every user change event (from this worker, or another one
+    through LISTEN/NOTIFY) bumps, so a listing is never served after a change
+    was seen. The TTL bounds staleness for changes no event is seen for.
+    Least recently used entries are evicted once the bodies exceed
+    ``max_bytes``.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = settings.USERS_LIST_CACHE_MAX_BYTES,
+        ttl_seconds: float = settings.USERS_LIST_CACHE_TTL_SECONDS
+    ):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.version = 0
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries: OrderedDict[tuple, CachedResponse] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> bytes | None:
+        """Get a stored body for the current version, or None."""
+        entry_key = (self.version, key)
+        entry = self._entries.get(entry_key)
+        if entry is not None and time.monotonic() - entry.created_at > self.ttl_seconds:
+            self._remove(entry_key)
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(entry_key)
+        self.hits += 1
+        return entry.body
+
+    def set(self, key: Hashable, body: bytes, version: int) -> None:
+        """Store a body read at ``version`` (the version before querying).
+
+        Nothing is stored if the users changed in the meantime, as the body
+        may predate the change.
+        """
+        if version != self.version or len(body) > self.max_bytes:
+            return
+        entry_key = (version, key)
+        if entry_key in self._entries:
+            self._remove(entry_key)
+        self._entries[entry_key] = CachedResponse(body, time.monotonic())
+        self.size_bytes += len(body)
+        while self.size_bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def invalidate(self) -> None:
+        """Drop every entry; later reads see the new version."""
+        self.version += 1
+        self.invalidations += 1
+        self._entries.clear()
+        self.size_bytes = 0
+
+    def on_user_event(self, action: str, user_ids: list[UUID]) -> None:
+        # Any change can move users between pages, so every listing goes
+        self.invalidate()
+
+    def _remove(self, entry_key: tuple) -> None:
+        self.size_bytes -= len(self._entries.pop(entry_key).body)
+
+
+users_list_cache = UsersListCache()
+events.subscribe(users_list_cache.on_user_event)
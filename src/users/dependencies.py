@@ -0,0 +1,44 @@
+from typing import Annotated
+
+from fastapi import Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.exceptions import InvalidFieldsException
+from src.db.base import get_db
+from src.users.loader import UserLoader
+from src.users.schemas import UserResponse
+
+
+async def get_user_loader(
+    db: Annotated[AsyncSession, Depends(get_db)]
+) -> UserLoader:
+    """Dependency returning the request-scoped user loader.
+
+    FastAPI caches dependencies per request, so every dependant of the same
+    request shares one loader (and one database session).
+    """
+    return UserLoader(db)
+
+
+async def get_user_fields(
+    fields: Annotated[
+        str | None,
+        Query(description="Comma-separated user fields to return, e.g. id,email")
+    ] = None
+) -> tuple[str, ...] | None:
+    """Dependency parsing the ``fields`` query parameter of user endpoints.
+
+    Returns the requested fields in schema order (so equal field sets share
+    cached serializers), or None when all fields were requested.
+    """
+    if fields is None:
+        return None
+
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested - UserResponse.model_fields.keys()
+    if not requested or unknown:
+        raise InvalidFieldsException(
+            detail=f"Invalid fields: {', '.join(sorted(unknown)) or fields!r}. "
+                   f"Allowed: {', '.join(UserResponse.model_fields)}"
+        )
+    return tuple(name for name in UserResponse.model_fields if name in requested)
@@ -0,0 +1,213 @@
+import asyncio
+import json
+import logging
+from typing import Any, AsyncIterator, Callable, Sequence
+from uuid import UUID, uuid4
+
+import asyncpg
+from sqlalchemy import Text, bindparam, event, text
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+UserEventHandler = Callable[[str, list[UUID]], None]
+
+USER_CREATED = "created"
+USER_UPDATED = "updated"
+USER_DELETED = "deleted"
+# Events may have been missed (listener reconnected): drop everything cached
+USERS_RESYNC = "resync"
+
+# Identifies this process in notifications so it can skip its own events
+WORKER_ID = uuid4().hex
+
+# NOTIFY payloads are limited to 8000 bytes
+_IDS_PER_NOTIFICATION = 100
+
+_SESSION_INFO_KEY = "user_events"
+
+_NOTIFY_QUERY = text(
+    "SELECT pg_notify(:channel, payload) FROM unnest(:payloads) AS payload"
+).bindparams(bindparam("payloads", type_=ARRAY(Text)))
+
+_handlers: list[UserEventHandler] = []
+
+# Whether changes made by other workers currently reach this process
+_listening = False
+
+
+def subscribe(handler: UserEventHandler) -> Callable[[], None]:
+    """Register a handler called with (action, user_ids) after user writes.
+
+    Handlers run synchronously on the event loop, right after a transaction
+    in this process commits or when a change from another worker arrives
+    through ``UserEventListener``. They should be cheap (e.g. evicting cache
+    entries). Returns a function that removes the handler again.
+    """
+    _handlers.append(handler)
+    return lambda: _handlers.remove(handler)
+
+
+def is_listening() -> bool:
+    """Whether a ``UserEventListener`` is connected, so other workers' changes are seen."""
+    return _listening
+
+
+def dispatch(action: str, user_ids: list[UUID]) -> None:
+    """Call every registered handler for a change."""
+    for handler in list(_handlers):
+        try:
+            handler(action, user_ids)
+        except Exception:
+            logger.exception("User event handler %r failed", handler)
+
+
+async def iter_events(
+    max_queued: int = 100,
+    keepalive_seconds: float | None = None
+) -> AsyncIterator[tuple[str, list[UUID]] | None]:
+    """Yield (action, user_ids) for every change until the consumer stops.
+
+    If the consumer falls more than ``max_queued`` events behind, pending
+    events are replaced by a single ``USERS_RESYNC``. With
+    ``keepalive_seconds``, None is yielded whenever nothing happened for that
+    long.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max_queued)
+
+    def enqueue(action: str, user_ids: list[UUID]) -> None:
+        try:
+            queue.put_nowait((action, user_ids))
+        except asyncio.QueueFull:
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait((USERS_RESYNC, []))
+
+    unsubscribe = subscribe(enqueue)
+    try:
+        while True:
+            try:
+                yield await asyncio.wait_for(queue.get(), timeout=keepalive_seconds)
+            except asyncio.TimeoutError:
+                yield None
+    finally:
+        unsubscribe()
+
+
+def record(db: AsyncSession, action: str, user_ids: Sequence[UUID]) -> None:
+    """Queue a change on the session, published once it commits."""
+    if not user_ids:
+        return
+    db.info.setdefault(_SESSION_INFO_KEY, []).append((action, list(user_ids)))
+
+
+def _payloads(session_events: list[tuple[str, list[UUID]]]) -> list[str]:
+    payloads = []
+    for action, user_ids in session_events:
+        for start in range(0, len(user_ids), _IDS_PER_NOTIFICATION):
+            payloads.append(json.dumps({
+                "origin": WORKER_ID,
+                "action": action,
+                "ids": [str(user_id) for user_id in user_ids[start:start + _IDS_PER_NOTIFICATION]],
+            }))
+    return payloads
+
+
+@event.listens_for(Session, "before_commit")
+def _notify_other_workers(session: Session) -> None:
+    # NOTIFY is transactional: other workers only hear about committed changes
+    session_events = session.info.get(_SESSION_INFO_KEY)
+    if not session_events or not settings.USER_EVENTS_NOTIFY:
+        return
+    if session.bind is None or session.bind.dialect.name != "postgresql":
+        return
+    session.execute(
+        _NOTIFY_QUERY,
+        {"channel": settings.USER_EVENTS_CHANNEL, "payloads": _payloads(session_events)},
+    )
+
+
+@event.listens_for(Session, "after_commit")
+def _dispatch_committed(session: Session) -> None:
+    for action, user_ids in session.info.pop(_SESSION_INFO_KEY, []):
+        dispatch(action, user_ids)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back(session: Session) -> None:
+    session.info.pop(_SESSION_INFO_KEY, None)
+
+
+class UserEventListener:
+    """LISTENs for changes made by other workers and dispatches them locally.
+
+    Runs as a background task started from the application lifespan. The
+    connection is re-established after failures; since notifications sent in
+    the meantime are lost, a ``USERS_RESYNC`` event is dispatched after every
+    reconnect.
+    """
+
+    def __init__(
+        self,
+        dsn: str = str(settings.ASYNC_DATABASE_URL).replace("+asyncpg", ""),
+        channel: str = settings.USER_EVENTS_CHANNEL,
+        retry_seconds: float = 5.0
+    ):
+        self.dsn = dsn
+        self.channel = channel
+        self.retry_seconds = retry_seconds
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        """Start listening in the background."""
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop listening and close the connection."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _on_notification(self, conn: Any, pid: int, channel: str, payload: str) -> None:
+        try:
+            message = json.loads(payload)
+            if message["origin"] == WORKER_ID:
+                return
+            dispatch(message["action"], [UUID(user_id) for user_id in message["ids"]])
+        except Exception:
+            logger.exception("Invalid user event payload: %s", payload)
+
+    async def _run(self) -> None:
+        global _listening
+        connected_before = False
+        while True:
+            conn = None
+            try:
+                conn = await asyncpg.connect(self.dsn)
+                closed = asyncio.Event()
+                conn.add_termination_listener(lambda _: closed.set())
+                await conn.add_listener(self.channel, self._on_notification)
+                if connected_before:
+                    dispatch(USERS_RESYNC, [])
+                connected_before = True
+                _listening = True
+                logger.info("Listening for user events on %r", self.channel)
+                await closed.wait()
+                logger.warning("User event listener connection lost")
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("User event listener failed")
+            finally:
+                _listening = False
+                if conn is not None and not conn.is_closed():
+                    await conn.close()
+            await asyncio.sleep(self.retry_seconds)
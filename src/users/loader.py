@@ -0,0 +1,83 @@
+import asyncio
+from typing import Any, Iterable
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.config import settings
+from src.users import service
+
+
+class UserLoader:
+    """Request-scoped loader that coalesces user lookups by ID.
+
+    Every ``load`` call made in the same event loop iteration is collected
+    and resolved with a single ``service.get_many_by_ids`` query. Results are
+    memoised for the lifetime of the loader, so create one per request (see
+    ``src.users.dependencies.get_user_loader``) rather than sharing it.
+    """
+
+    def __init__(
+        self,
+        db: AsyncSession,
+        max_batch_size: int = settings.USERS_BATCH_GET_MAX_IDS
+    ):
+        self._db = db
+        self._max_batch_size = max_batch_size
+        self._cache: dict[UUID, asyncio.Future] = {}
+        self._queue: list[UUID] = []
+        self._dispatch_scheduled = False
+        # AsyncSession does not support concurrent operations
+        self._lock = asyncio.Lock()
+
+    def load(self, user_id: UUID) -> "asyncio.Future[dict[str, Any] | None]":
+        """Schedule a lookup and return a future for the user (or None)."""
+        future = self._cache.get(user_id)
+        if future is not None:
+            return future
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._cache[user_id] = future
+        self._queue.append(user_id)
+
+        if not self._dispatch_scheduled:
+            self._dispatch_scheduled = True
+            loop.call_soon(self._dispatch)
+
+        return future
+
+    async def load_many(self, user_ids: Iterable[UUID]) -> list[dict[str, Any] | None]:
+        """Load several users, returning them in the order requested."""
+        return list(await asyncio.gather(*(self.load(user_id) for user_id in user_ids)))
+
+    def prime(self, user: dict[str, Any]) -> None:
+        """Seed the cache with an already fetched user."""
+        if user["id"] not in self._cache:
+            future = asyncio.get_running_loop().create_future()
+            future.set_result(user)
+            self._cache[user["id"]] = future
+
+    def _dispatch(self) -> None:
+        self._dispatch_scheduled = False
+        queue, self._queue = self._queue, []
+
+        for start in range(0, len(queue), self._max_batch_size):
+            asyncio.ensure_future(self._resolve(queue[start:start + self._max_batch_size]))
+
+    async def _resolve(self, user_ids: list[UUID]) -> None:
+        try:
+            async with self._lock:
+                users = await service.get_many_by_ids(self._db, user_ids)
+        except Exception as exc:
+            for user_id in user_ids:
+                future = self._cache.pop(user_id)
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        found = {user["id"]: user for user in users}
+        for user_id in user_ids:
+            future = self._cache[user_id]
+            if not future.done():
+                future.set_result(found.get(user_id))
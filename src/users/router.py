@@ -1,18 +1,51 @@
-from typing import Annotated
+import json
+from typing import Annotated, AsyncIterator
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.auth.dependencies import get_current_active_superuser, get_current_user
-from src.core.schemas import ResponseModel
-from src.db.base import get_db
-from src.users import service
-from src.users.schemas import UserCreate, UserResponse, UserUpdate
+from src.auth.dependencies import (
+    get_current_active_superuser,
+    get_current_principal,
+    get_current_superuser_principal,
+    get_current_user,
+)
+from src.core.config import settings
+from src.core.deadlines import apply_deadline, request_timeout
+from src.core.schemas import ResponseModel, render_response
+from src.db.base import get_db, get_db_manual_commit
+from src.users import events, service
+from src.users.cache import CACHE_HEADER, users_list_cache
+from src.users.dependencies import get_user_fields, get_user_loader
+from src.users.loader import UserLoader
+from src.users.schemas import (
+    UserBatchGetRequest,
+    UserBatchGetResult,
+    UserBulkDeactivateFilter,
+    UserBulkFilter,
+    UserBulkPatchRequest,
+    UserBulkPatchResult,
+    UserBulkResult,
+    UserCreate,
+    UserResponse,
+    UserUpdate,
+    user_response_subset,
+)
 
 router = APIRouter(prefix="/users", tags=["users"])
 
 
+def check_user_access(current_user: dict, user_id: UUID) -> None:
+    """Only allow users to access their own data unless they're superusers."""
+    if current_user["id"] != user_id and not current_user["is_superuser"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+
+
 @router.post(
     "",
     response_model=ResponseModel[UserResponse],
@@ -34,40 +67,197 @@ async def create_user(
 @router.get(
     "",
     response_model=ResponseModel[list[UserResponse]],
-    dependencies=[Depends(get_current_active_superuser)],
+    dependencies=[Depends(get_current_superuser_principal)],
 )
 async def get_users(
     db: Annotated[AsyncSession, Depends(get_db)],
+    fields: Annotated[tuple[str, ...] | None, Depends(get_user_fields)],
     skip: int = 0,
     limit: int = 100,
+) -> Response:
+    """Get all users. Only for superusers.
+
+    Pages are served from a cache of serialised responses until a user
+    changes (see ``src.users.cache``).
+    """
+    key = (skip, limit, fields)
+    if settings.USERS_LIST_CACHE_ENABLED:
+        body = users_list_cache.get(key)
+        if body is not None:
+            return Response(
+                content=body,
+                media_type="application/json",
+                headers={CACHE_HEADER: "HIT"},
+            )
+
+    version = users_list_cache.version
+    await apply_deadline(db)
+    users = await service.get_multi(
+        db, skip=skip, limit=limit, fields=fields or service.USER_FIELDS
+    )
+    response = render_response(
+        list[user_response_subset(fields)] if fields else list[UserResponse],
+        {
+            "success": True,
+            "data": users
+        },
+    )
+    if settings.USERS_LIST_CACHE_ENABLED:
+        users_list_cache.set(key, response.body, version)
+        response.headers[CACHE_HEADER] = "MISS"
+    return response
+
+
+@router.post(":batchGet", response_model=ResponseModel[UserBatchGetResult])
+async def batch_get_users(
+    request_data: UserBatchGetRequest,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    loader: Annotated[UserLoader, Depends(get_user_loader)],
+    current_user: Annotated[dict, Depends(get_current_principal)],
+) -> dict:
+    """Get several users by ID in a single query."""
+    user_ids = list(dict.fromkeys(request_data.ids))
+    for user_id in user_ids:
+        check_user_access(current_user, user_id)
+
+    await apply_deadline(db)
+    users = await loader.load_many(user_ids)
+    return {
+        "success": True,
+        "data": {
+            "users": [user for user in users if user is not None],
+            "not_found": [
+                user_id for user_id, user in zip(user_ids, users) if user is None
+            ],
+        }
+    }
+
+
+@router.post(
+    ":bulkDeactivate",
+    response_model=ResponseModel[UserBulkResult],
+    dependencies=[Depends(request_timeout(settings.REQUEST_TIMEOUT_MAX_MS))],
+)
+async def bulk_deactivate_users(
+    user_filter: UserBulkDeactivateFilter,
+    db: Annotated[AsyncSession, Depends(get_db_manual_commit)],
+    current_user: Annotated[dict, Depends(get_current_active_superuser)],
+) -> dict:
+    """Deactivate users by ID list or filter. Only for superusers."""
+    ids = await service.bulk_deactivate(
+        db,
+        user_ids=user_filter.ids,
+        created_before=user_filter.created_before,
+        exclude_ids=[current_user["id"]],
+        chunk_size=user_filter.chunk_size,
+    )
+    return {
+        "success": True,
+        "message": "Users deactivated successfully",
+        "data": {"count": len(ids), "ids": ids}
+    }
+
+
+@router.post(
+    ":bulkDelete",
+    response_model=ResponseModel[UserBulkResult],
+    dependencies=[Depends(request_timeout(settings.REQUEST_TIMEOUT_MAX_MS))],
+)
+async def bulk_delete_users(
+    user_filter: UserBulkFilter,
+    db: Annotated[AsyncSession, Depends(get_db_manual_commit)],
+    current_user: Annotated[dict, Depends(get_current_active_superuser)],
 ) -> dict:
-    """Get all users. Only for superusers."""
-    users = await service.get_multi(db, skip=skip, limit=limit)
+    """Delete users by ID list or filter. Only for superusers."""
+    ids = await service.bulk_delete(
+        db,
+        user_ids=user_filter.ids,
+        created_before=user_filter.created_before,
+        is_active=user_filter.is_active,
+        exclude_ids=[current_user["id"]],
+        chunk_size=user_filter.chunk_size,
+    )
     return {
         "success": True,
-        "data": users
+        "message": "Users deleted successfully",
+        "data": {"count": len(ids), "ids": ids}
     }
 
 
+@router.patch(
+    ":bulk",
+    response_model=ResponseModel[UserBulkPatchResult],
+    dependencies=[Depends(request_timeout(settings.REQUEST_TIMEOUT_MAX_MS))],
+)
+async def bulk_patch_users(
+    request_data: UserBulkPatchRequest,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    current_user: Annotated[dict, Depends(get_current_active_superuser)],
+) -> dict:
+    """Apply partial updates to many users at once. Only for superusers.
+
+    Superusers cannot change their own ``is_active`` or ``is_superuser`` here.
+    """
+    updates = []
+    statuses = {}
+    for item in request_data.users:
+        changes = item.model_dump(exclude_unset=True)
+        if item.id == current_user["id"] and changes.keys() & {"is_active", "is_superuser"}:
+            statuses[item.id] = "forbidden"
+        else:
+            updates.append(changes)
+
+    statuses.update(await service.bulk_update(db, updates))
+    results = [
+        {"id": item.id, "status": statuses[item.id]} for item in request_data.users
+    ]
+    return {
+        "success": True,
+        "message": "Users updated successfully",
+        "data": {
+            "updated": sum(result["status"] == "updated" for result in results),
+            "results": results,
+        }
+    }
+
+
+@router.get("/events", dependencies=[Depends(get_current_active_superuser)])
+async def stream_user_events() -> StreamingResponse:
+    """Stream user changes from all workers as server-sent events. Only for superusers."""
+    async def stream() -> AsyncIterator[str]:
+        async for change in events.iter_events(keepalive_seconds=15):
+            if change is None:
+                yield ": keep-alive\n\n"
+                continue
+            action, user_ids = change
+            data = json.dumps({"ids": [str(user_id) for user_id in user_ids]})
+            yield f"event: {action}\ndata: {data}\n\n"
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
+
+
 @router.get("/{user_id}", response_model=ResponseModel[UserResponse])
 async def get_user(
     user_id: UUID,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[dict, Depends(get_current_user)],
-) -> dict:
+    current_user: Annotated[dict, Depends(get_current_principal)],
+    fields: Annotated[tuple[str, ...] | None, Depends(get_user_fields)],
+) -> dict | Response:
     """Get user by ID."""
-    # Only allow users to get their own data unless they're superusers
-    if current_user["id"] != user_id and not current_user["is_superuser"]:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not enough permissions"
-        )
-    
-    user = await service.get_by_id(db, user_id)
-    return {
+    check_user_access(current_user, user_id)
+    await apply_deadline(db)
+    user = await service.get_by_id(db, user_id, fields=fields or service.USER_FIELDS)
+    content = {
         "success": True,
         "data": user
     }
+    if fields:
+        return render_response(user_response_subset(fields), content)
+    return content
 
 
 @router.put("/{user_id}", response_model=ResponseModel[UserResponse])
@@ -78,13 +268,7 @@ async def update_user(
     current_user: Annotated[dict, Depends(get_current_user)],
 ) -> dict:
     """Update user."""
-    # Only allow users to update their own data unless they're superusers
-    if current_user["id"] != user_id and not current_user["is_superuser"]:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not enough permissions"
-        )
-    
+    check_user_access(current_user, user_id)
     user = await service.update(db, user_id, user_data)
     return {
         "success": True,
@@ -100,11 +284,5 @@ async def delete_user(
     current_user: Annotated[dict, Depends(get_current_user)],
 ) -> None:
     """Delete user."""
-    # Only allow users to delete their own account unless they're superusers
-    if current_user["id"] != user_id and not current_user["is_superuser"]:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not enough permissions"
-        )
-    
+    check_user_access(current_user, user_id)
     await service.delete(db, user_id)
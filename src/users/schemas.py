@@ -1,8 +1,10 @@
 from datetime import datetime
+from functools import lru_cache
 from uuid import UUID
 
-from pydantic import EmailStr, Field
+from pydantic import EmailStr, Field, create_model, model_validator
 
+from src.core.config import settings
 from src.core.schemas import CustomModel
 
 
@@ -40,6 +42,120 @@ class UserResponse(UserInDB):
     pass
 
 
+@lru_cache(maxsize=128)
+def user_response_subset(fields: tuple[str, ...]) -> type[CustomModel]:
+    """Schema with only the given ``UserResponse`` fields (sparse fieldsets).
+
+    Models are cached per field set, so their validators and serializers are
+    only built once.
+    """
+    return create_model(
+        f"UserResponse[{','.join(fields)}]",
+        __base__=CustomModel,
+        **{
+            name: (UserResponse.model_fields[name].annotation, ...)
+            for name in fields
+        },
+    )
+
+
+class UserBatchGetRequest(CustomModel):
+    """Schema for fetching several users by ID."""
+    ids: list[UUID] = Field(..., min_length=1, max_length=settings.USERS_BATCH_GET_MAX_IDS)
+
+
+class UserBatchGetResult(CustomModel):
+    """Schema for batch get results."""
+    users: list[UserResponse]
+    not_found: list[UUID] = []
+
+
+class UserBulkFilter(CustomModel):
+    """Schema selecting users for bulk operations.
+
+    Criteria are combined with AND; at least one is required so an empty
+    body can never match the whole table.
+    """
+    ids: list[UUID] | None = Field(None, min_length=1)
+    created_before: datetime | None = None
+    is_active: bool | None = None
+    chunk_size: int = Field(1000, ge=1, le=10000)
+
+    @model_validator(mode="after")
+    def validate_has_criteria(self) -> "UserBulkFilter":
+        """Reject filters without any criteria."""
+        if self.ids is None and self.created_before is None and self.is_active is None:
+            raise ValueError("At least one of ids, created_before or is_active is required")
+        return self
+
+
+class UserBulkDeactivateFilter(UserBulkFilter):
+    """Schema selecting users to deactivate.
+
+    Only active users are deactivated, so ``is_active`` can't narrow the
+    selection: it is rejected, and ids or created_before is required.
+    """
+
+    @model_validator(mode="after")
+    def validate_deactivate_criteria(self) -> "UserBulkDeactivateFilter":
+        """Reject is_active and filters without ids or created_before."""
+        if self.is_active is not None:
+            raise ValueError("is_active can't be used to select users to deactivate")
+        if self.ids is None and self.created_before is None:
+            raise ValueError("At least one of ids or created_before is required")
+        return self
+
+
+class UserBulkResult(CustomModel):
+    """Schema for bulk operation results."""
+    count: int
+    ids: list[UUID]
+
+
+class UserBulkPatchItem(UserUpdate):
+    """Schema for one user's changes in a bulk partial update."""
+    id: UUID
+    is_active: bool | None = None
+    is_superuser: bool | None = None
+
+    @model_validator(mode="after")
+    def validate_changes(self) -> "UserBulkPatchItem":
+        """Require at least one change and no nulls for required columns."""
+        changed = self.model_fields_set - {"id"}
+        if not changed:
+            raise ValueError("At least one field to update is required")
+        for name in ("email", "password", "is_active", "is_superuser"):
+            if name in changed and getattr(self, name) is None:
+                raise ValueError(f"{name} cannot be null")
+        return self
+
+
+class UserBulkPatchRequest(CustomModel):
+    """Schema for bulk partial updates, one entry per user."""
+    users: list[UserBulkPatchItem] = Field(
+        ..., min_length=1, max_length=settings.USERS_BULK_PATCH_MAX_ITEMS
+    )
+
+    @model_validator(mode="after")
+    def validate_unique_ids(self) -> "UserBulkPatchRequest":
+        """Reject several entries for the same user."""
+        if len({user.id for user in self.users}) != len(self.users):
+            raise ValueError("Each user may only appear once")
+        return self
+
+
+class UserBulkPatchItemResult(CustomModel):
+    """Schema for the outcome of one user's update."""
+    id: UUID
+    status: str  # updated, not_found, email_taken or forbidden
+
+
+class UserBulkPatchResult(CustomModel):
+    """Schema for bulk partial update results, in request order."""
+    updated: int
+    results: list[UserBulkPatchItemResult]
+
+
 # Auth schemas
 class Token(CustomModel):
     """Schema for authentication token."""
@@ -1,76 +1,156 @@
-from typing import Any
+import asyncio
+from collections import Counter
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Sequence
 from uuid import UUID
 
-from sqlalchemy import select
+from sqlalchemy import (
+    Integer,
+    Select,
+    String,
+    any_,
+    bindparam,
+    column,
+    delete as sql_delete,
+    func,
+    select,
+    update as sql_update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.auth.utils import get_password_hash
 from src.core.exceptions import UserAlreadyExistsException, UserNotFoundException
+from src.db.base import release_connection
+from src.users import events
 from src.users.models import User
 from src.users.schemas import UserCreate, UserUpdate
 
 
-async def get_by_id(db: AsyncSession, user_id: UUID) -> dict[str, Any] | None:
-    """Get user by ID."""
-    query = select(User).where(User.id == user_id)
-    result = await db.execute(query)
-    user = result.scalar_one_or_none()
+# Fields returned for a user (everything but the password hash)
+USER_FIELDS = (
+    "id",
+    "email",
+    "first_name",
+    "last_name",
+    "is_active",
+    "is_superuser",
+    "created_at",
+    "updated_at",
+)
+
+
+# Hot statements are built once and executed with bound parameters, so
+# SQLAlchemy can reuse the compiled form from its cache without rebuilding
+# the statement on every call, and asyncpg reuses its prepared statement.
+
+@lru_cache(maxsize=128)
+def _user_columns(fields: tuple[str, ...]) -> tuple:
+    return tuple(getattr(User, field) for field in fields)
+
+
+@lru_cache(maxsize=128)
+def _select_by_id(fields: tuple[str, ...]) -> Select:
+    return select(*_user_columns(fields)).where(User.id == bindparam("user_id"))
+
+
+@lru_cache(maxsize=128)
+def _select_page(fields: tuple[str, ...]) -> Select:
+    return (
+        select(*_user_columns(fields))
+        .offset(bindparam("skip", type_=Integer))
+        .limit(bindparam("limit", type_=Integer))
+    )
+
+
+_SELECT_MANY_BY_IDS = select(*_user_columns(USER_FIELDS)).where(
+    User.id == any_(bindparam("user_ids", type_=ARRAY(PG_UUID(as_uuid=True))))
+)
+
+_SELECT_BY_EMAIL = select(*_user_columns(USER_FIELDS + ("hashed_password",))).where(
+    User.email == bindparam("email")
+)
+
+_SELECT_IDS_BY_EMAILS = select(User.email, User.id).where(
+    User.email == any_(bindparam("emails", type_=ARRAY(String)))
+)
+
+# ORM entity for read-modify-write paths
+_SELECT_USER_FOR_WRITE = select(User).where(User.id == bindparam("user_id"))
+
+UNIQUE_VIOLATION = "23505"  # SQLSTATE; users.email is the only unique column
+
+
+async def get_by_id(
+    db: AsyncSession,
+    user_id: UUID,
+    fields: tuple[str, ...] = USER_FIELDS
+) -> dict[str, Any] | None:
+    """Get user by ID, selecting only the given fields."""
+    result = await db.execute(_select_by_id(fields), {"user_id": user_id})
+    user = result.one_or_none()
     
     if user is None:
         return None
         
-    return {
-        "id": user.id,
-        "email": user.email,
-        "first_name": user.first_name,
-        "last_name": user.last_name,
-        "is_active": user.is_active,
-        "is_superuser": user.is_superuser,
-        "created_at": user.created_at,
-        "updated_at": user.updated_at,
-    }
+    return dict(user._mapping)
+
+
+async def get_many_by_ids(
+    db: AsyncSession,
+    user_ids: Sequence[UUID]
+) -> list[dict[str, Any]]:
+    """Get users by a list of IDs in a single query.
+
+    The ids are sent as one array parameter (``id = ANY($1)``) so the
+    statement text is the same whatever the number of ids. Missing ids are
+    simply absent from the result, which is in no particular order.
+    """
+    if not user_ids:
+        return []
+
+    result = await db.execute(_SELECT_MANY_BY_IDS, {"user_ids": list(user_ids)})
+
+    return [dict(user._mapping) for user in result]
 
 
 async def get_by_email(db: AsyncSession, email: str) -> dict[str, Any] | None:
     """Get user by email."""
-    query = select(User).where(User.email == email)
-    result = await db.execute(query)
-    user = result.scalar_one_or_none()
+    result = await db.execute(_SELECT_BY_EMAIL, {"email": email})
+    user = result.one_or_none()
     
     if user is None:
         return None
         
-    return {
-        "id": user.id,
-        "email": user.email,
-        "first_name": user.first_name,
-        "last_name": user.last_name,
-        "is_active": user.is_active,
-        "is_superuser": user.is_superuser,
-        "hashed_password": user.hashed_password,
-        "created_at": user.created_at,
-        "updated_at": user.updated_at,
-    }
+    return dict(user._mapping)
 
 
 async def create(db: AsyncSession, user_data: UserCreate) -> dict[str, Any]:
-    """Create new user."""
+    """Create new user. Committed with the request's unit of work."""
     # Check if user with this email already exists
     if await get_by_email(db, user_data.email):
         raise UserAlreadyExistsException()
     
+    # Don't hold a pool connection while hashing
+    await release_connection(db)
+    hashed_password = get_password_hash(user_data.password)
+    
     # Create new user
     db_user = User(
         email=user_data.email,
-        hashed_password=get_password_hash(user_data.password),
+        hashed_password=hashed_password,
         first_name=user_data.first_name,
         last_name=user_data.last_name,
         is_active=user_data.is_active,
     )
     
     db.add(db_user)
-    await db.commit()
-    await db.refresh(db_user)
+    await db.flush()
+    events.record(db, events.USER_CREATED, [db_user.id])
     
     return await get_by_id(db, db_user.id)
 
@@ -80,64 +160,320 @@ async def update(
     user_id: UUID,
     user_data: UserUpdate
 ) -> dict[str, Any]:
-    """Update user."""
+    """Update user. Committed with the request's unit of work."""
+    update_data = user_data.model_dump(exclude_unset=True)
+    
     # Get existing user
-    query = select(User).where(User.id == user_id)
-    result = await db.execute(query)
+    result = await db.execute(_SELECT_USER_FOR_WRITE, {"user_id": user_id})
     user = result.scalar_one_or_none()
     
     if user is None:
         raise UserNotFoundException()
     
-    # Update user fields
-    update_data = user_data.model_dump(exclude_unset=True)
-    
+    # Only hash for users that exist, without holding a pool connection;
+    # the user is loaded again as it may have changed in the meantime
     if "password" in update_data:
+        await release_connection(db)
         update_data["hashed_password"] = get_password_hash(update_data.pop("password"))
+        result = await db.execute(_SELECT_USER_FOR_WRITE, {"user_id": user_id})
+        user = result.scalar_one_or_none()
+        if user is None:
+            raise UserNotFoundException()
     
+    # Update user fields
     for field, value in update_data.items():
         setattr(user, field, value)
     
-    await db.commit()
-    await db.refresh(user)
+    await db.flush()
+    events.record(db, events.USER_UPDATED, [user.id])
     
     return await get_by_id(db, user.id)
 
 
+async def update_password_hash(
+    db: AsyncSession,
+    user_id: UUID,
+    hashed_password: str
+) -> None:
+    """Replace a stored password hash, e.g. after a cost upgrade.
+
+    This is not a user-visible change, so ``updated_at`` is left as is and no
+    change event is recorded. The caller commits.
+    """
+    query = (
+        sql_update(User)
+        .where(User.id == user_id)
+        .values(hashed_password=hashed_password, updated_at=User.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+    await db.execute(query)
+
+
+async def record_logins(db: AsyncSession, last_logins: dict[UUID, datetime]) -> None:
+    """Set ``last_login_at`` for several users in one statement.
+
+    Like ``update_password_hash`` this is not a user-visible change, so
+    ``updated_at`` is kept and no event is recorded. The caller commits.
+    """
+    logins = values(
+        column("id", User.__table__.c.id.type),
+        column("logged_in_at", User.__table__.c.last_login_at.type),
+        name="logins",
+    ).data(list(last_logins.items()))
+    query = (
+        sql_update(User)
+        .where(User.id == logins.c.id)
+        .values(
+            last_login_at=func.greatest(User.last_login_at, logins.c.logged_in_at),
+            updated_at=User.updated_at,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    await db.execute(query)
+
+
 async def get_multi(
     db: AsyncSession,
     *,
     skip: int = 0,
-    limit: int = 100
+    limit: int = 100,
+    fields: tuple[str, ...] = USER_FIELDS
 ) -> list[dict[str, Any]]:
-    """Get multiple users with pagination."""
-    query = select(User).offset(skip).limit(limit)
-    result = await db.execute(query)
-    users = result.scalars().all()
+    """Get multiple users with pagination, selecting only the given fields."""
+    result = await db.execute(_select_page(fields), {"skip": skip, "limit": limit})
     
-    return [
-        {
-            "id": user.id,
-            "email": user.email,
-            "first_name": user.first_name,
-            "last_name": user.last_name,
-            "is_active": user.is_active,
-            "is_superuser": user.is_superuser,
-            "created_at": user.created_at,
-            "updated_at": user.updated_at,
-        }
-        for user in users
-    ]
+    return [dict(user._mapping) for user in result]
 
 
 async def delete(db: AsyncSession, user_id: UUID) -> None:
-    """Delete user."""
-    query = select(User).where(User.id == user_id)
-    result = await db.execute(query)
+    """Delete user. Committed with the request's unit of work."""
+    result = await db.execute(_SELECT_USER_FOR_WRITE, {"user_id": user_id})
     user = result.scalar_one_or_none()
     
     if user is None:
         raise UserNotFoundException()
     
     await db.delete(user)
-    await db.commit()
+    await db.flush()
+    events.record(db, events.USER_DELETED, [user.id])
+
+
+def _bulk_conditions(
+    *,
+    user_ids: Sequence[UUID] | None = None,
+    created_before: datetime | None = None,
+    is_active: bool | None = None,
+    exclude_ids: Sequence[UUID] = (),
+) -> list:
+    """Build WHERE conditions for bulk operations."""
+    conditions = []
+    if user_ids is not None:
+        conditions.append(
+            User.id == any_(
+                bindparam("user_ids", list(user_ids), type_=ARRAY(PG_UUID(as_uuid=True)))
+            )
+        )
+    if created_before is not None:
+        conditions.append(User.created_at < created_before)
+    if is_active is not None:
+        conditions.append(User.is_active.is_(is_active))
+    if exclude_ids:
+        conditions.append(User.id.not_in(list(exclude_ids)))
+    return conditions
+
+
+async def bulk_deactivate(
+    db: AsyncSession,
+    *,
+    user_ids: Sequence[UUID] | None = None,
+    created_before: datetime | None = None,
+    exclude_ids: Sequence[UUID] = (),
+    chunk_size: int = 1000,
+) -> list[UUID]:
+    """Deactivate matching users in set-based chunks.
+
+    Each chunk is a single ``UPDATE ... WHERE id IN (SELECT ... LIMIT n)
+    RETURNING id`` committed on its own, so row locks are held only for one
+    chunk at a time; use it with ``get_db_manual_commit``. Returns the IDs of
+    the deactivated users.
+    """
+    conditions = _bulk_conditions(
+        user_ids=user_ids,
+        created_before=created_before,
+        is_active=True,
+        exclude_ids=exclude_ids,
+    )
+    affected: list[UUID] = []
+
+    while True:
+        chunk = select(User.id).where(*conditions).limit(chunk_size).scalar_subquery()
+        query = (
+            sql_update(User)
+            .where(User.id.in_(chunk))
+            .values(is_active=False, updated_at=datetime.utcnow())
+            .returning(User.id)
+            .execution_options(synchronize_session=False)
+        )
+        result = await db.execute(query)
+        ids = list(result.scalars().all())
+
+        events.record(db, events.USER_UPDATED, ids)
+        await db.commit()
+        affected.extend(ids)
+
+        if len(ids) < chunk_size:
+            return affected
+
+
+async def bulk_delete(
+    db: AsyncSession,
+    *,
+    user_ids: Sequence[UUID] | None = None,
+    created_before: datetime | None = None,
+    is_active: bool | None = None,
+    exclude_ids: Sequence[UUID] = (),
+    chunk_size: int = 1000,
+) -> list[UUID]:
+    """Delete matching users in set-based chunks.
+
+    Works like ``bulk_deactivate`` with ``DELETE ... RETURNING id``. Returns
+    the IDs of the deleted users.
+    """
+    conditions = _bulk_conditions(
+        user_ids=user_ids,
+        created_before=created_before,
+        is_active=is_active,
+        exclude_ids=exclude_ids,
+    )
+    affected: list[UUID] = []
+
+    while True:
+        chunk = select(User.id).where(*conditions).limit(chunk_size).scalar_subquery()
+        query = (
+            sql_delete(User)
+            .where(User.id.in_(chunk))
+            .returning(User.id)
+            .execution_options(synchronize_session=False)
+        )
+        result = await db.execute(query)
+        ids = list(result.scalars().all())
+
+        events.record(db, events.USER_DELETED, ids)
+        await db.commit()
+        affected.extend(ids)
+
+        if len(ids) < chunk_size:
+            return affected
+
+
+async def _update_group(
+    db: AsyncSession,
+    fields: tuple[str, ...],
+    rows: list[dict[str, Any]],
+    updated_at: datetime
+) -> set[UUID]:
+    """Set ``fields`` of several users in one statement; the IDs updated."""
+    names = ("id", *fields)
+    patch = values(
+        *(column(name, User.__table__.c[name].type) for name in names),
+        name="patch",
+    ).data([tuple(row[name] for name in names) for row in rows])
+    query = (
+        sql_update(User)
+        .where(User.id == patch.c.id)
+        .values({**{name: patch.c[name] for name in fields}, "updated_at": updated_at})
+        .returning(User.id)
+        .execution_options(synchronize_session=False)
+    )
+    result = await db.execute(query)
+    return set(result.scalars().all())
+
+
+async def _update_group_emails(
+    db: AsyncSession,
+    fields: tuple[str, ...],
+    rows: list[dict[str, Any]],
+    updated_at: datetime,
+    results: dict[UUID, str]
+) -> set[UUID]:
+    """``_update_group`` for rows changing emails another writer may take.
+
+    An email taken since ``bulk_update`` checked them fails the statement,
+    so the group is retried one user at a time and the users whose email
+    conflicts are marked ``email_taken`` in ``results``. Savepoints keep the
+    failed statements from aborting the request's transaction.
+    """
+    try:
+        async with db.begin_nested():
+            return await _update_group(db, fields, rows, updated_at)
+    except IntegrityError as exc:
+        if getattr(exc.orig, "sqlstate", None) != UNIQUE_VIOLATION:
+            raise
+
+    updated: set[UUID] = set()
+    for row in rows:
+        try:
+            async with db.begin_nested():
+                updated |= await _update_group(db, fields, [row], updated_at)
+        except IntegrityError as exc:
+            if getattr(exc.orig, "sqlstate", None) != UNIQUE_VIOLATION:
+                raise
+            results[row["id"]] = "email_taken"
+    return updated
+
+
+async def bulk_update(
+    db: AsyncSession,
+    updates: Sequence[dict[str, Any]]
+) -> dict[UUID, str]:
+    """Apply per-user partial updates with one UPDATE per set of fields.
+
+    ``updates`` are dicts with the user's ``id`` and the fields to change; a
+    ``password`` is hashed in worker threads so several hashes run in
+    parallel. Users changing the same fields are updated together with
+    ``UPDATE users ... FROM (VALUES ...) AS patch WHERE users.id = patch.id``
+    and everything is committed with the request's unit of work. Returns a
+    status per user ID:
+    ``updated``, ``not_found`` or ``email_taken``.
+    """
+    results: dict[UUID, str] = {}
+    rows = [dict(row) for row in updates]
+
+    with_password = [row for row in rows if "password" in row]
+    if with_password:
+        await release_connection(db)
+    hashes = await asyncio.gather(*(
+        asyncio.to_thread(get_password_hash, row["password"]) for row in with_password
+    ))
+    for row, hashed_password in zip(with_password, hashes):
+        del row["password"]
+        row["hashed_password"] = hashed_password
+
+    # One taken email would fail the whole statement, so check them upfront
+    emails = Counter(row["email"] for row in rows if "email" in row)
+    if emails:
+        result = await db.execute(_SELECT_IDS_BY_EMAILS, {"emails": list(emails)})
+        owners = dict(result.all())
+        for row in rows:
+            email = row.get("email")
+            if email and (emails[email] > 1 or owners.get(email, row["id"]) != row["id"]):
+                results[row["id"]] = "email_taken"
+
+    groups: dict[tuple[str, ...], list[dict[str, Any]]] = {}
+    for row in rows:
+        if row["id"] not in results:
+            fields = tuple(sorted(name for name in row if name != "id"))
+            groups.setdefault(fields, []).append(row)
+
+    updated_at = datetime.utcnow()
+    for fields, group in groups.items():
+        if "email" in fields:
+            updated = await _update_group_emails(db, fields, group, updated_at, results)
+        else:
+            updated = await _update_group(db, fields, group, updated_at)
+
+        events.record(db, events.USER_UPDATED, list(updated))
+        for row in group:
+            results.setdefault(row["id"], "updated" if row["id"] in updated else "not_found")
+
+    return results
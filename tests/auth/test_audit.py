@@ -0,0 +1,116 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.exc import DataError
+
+from src.auth.audit import LOGIN_FAILED, LOGIN_SUCCEEDED, AuthEventRecord, AuthEventWriter
+
+
+@pytest.fixture
+def session():
+    """Fixture for a mocked database session used as a context manager."""
+    session = AsyncMock()
+    session.__aenter__.return_value = session
+    return session
+
+
+@patch("src.users.service.record_logins")
+async def test_events_are_written_in_batches(mock_record_logins, session):
+    """Test a full batch is written at once, with last logins in the same transaction."""
+    writer = AuthEventWriter(batch_size=2, flush_seconds=60, session_factory=lambda: session)
+    user_id = uuid4()
+    writer.start()
+    try:
+        writer.record(AuthEventRecord(LOGIN_FAILED, "a@example.com", reason="bad_password"))
+        writer.record(AuthEventRecord(LOGIN_SUCCEEDED, "a@example.com", user_id=user_id))
+        await asyncio.sleep(0.01)
+
+        assert writer.written == 2
+        rows = session.execute.await_args_list[0].args[1]
+        assert [row["type"] for row in rows] == [LOGIN_FAILED, LOGIN_SUCCEEDED]
+        assert list(mock_record_logins.await_args.args[1]) == [user_id]
+        session.commit.assert_awaited_once()
+    finally:
+        await writer.stop()
+
+
+async def test_full_buffer_drops_events(session):
+    """Test events beyond the buffer size are dropped and counted."""
+    writer = AuthEventWriter(
+        max_buffered=2, batch_size=10, flush_seconds=60, session_factory=lambda: session
+    )
+    writer.start()
+    for _ in range(5):
+        writer.record(AuthEventRecord(LOGIN_FAILED, "a@example.com"))
+
+    assert writer.buffered == 2
+    assert writer.dropped == 3
+
+    await writer.stop()
+
+    assert writer.buffered == 0
+    assert writer.written == 2
+
+
+async def test_failed_write_is_counted(session):
+    """Test events of a batch that could not be written are counted as failed."""
+    session.execute.side_effect = RuntimeError("database down")
+    writer = AuthEventWriter(flush_seconds=60, session_factory=lambda: session)
+    writer.start()
+    writer.record(AuthEventRecord(LOGIN_FAILED, "a@example.com"))
+
+    await writer.stop()
+
+    assert writer.failed == 1
+    assert writer.written == 0
+
+
+async def test_oversized_fields_are_cut_to_fit(session):
+    """Test a huge username or address can't fail the INSERT of a batch."""
+    writer = AuthEventWriter(flush_seconds=60, session_factory=lambda: session)
+    writer.start()
+    writer.record(AuthEventRecord(LOGIN_FAILED, "x" * 300 + "\x00", ip_address="1" * 100))
+
+    await writer.stop()
+
+    [row] = session.execute.await_args.args[1]
+    assert row["email"] == "x" * 255
+    assert len(row["ip_address"]) == 45
+    assert writer.written == 1
+
+
+async def test_bad_row_does_not_drop_the_batch(session):
+    """Test a batch failing on one row is retried row by row."""
+    def execute(statement, rows):
+        if any(row["reason"] == "bad" for row in rows):
+            raise DataError("INSERT", {}, Exception("value too long"))
+
+    session.execute.side_effect = execute
+    writer = AuthEventWriter(flush_seconds=60, session_factory=lambda: session)
+    writer.start()
+    for reason in ("bad_password", "bad", "unknown_email"):
+        writer.record(AuthEventRecord(LOGIN_FAILED, "a@example.com", reason=reason))
+
+    await writer.stop()
+
+    assert (writer.written, writer.failed) == (2, 1)
+
+
+@patch("src.auth.service.auth_event_writer")
+@patch("src.users.service.get_by_email")
+async def test_failed_login_is_recorded(mock_get_by_email, mock_writer, mock_db):
+    """Test authentication failures are recorded with their reason."""
+    from src.auth import service
+    from src.core.exceptions import AuthFailedException
+
+    mock_get_by_email.return_value = None
+
+    with pytest.raises(AuthFailedException):
+        await service.authenticate_user(mock_db, "nobody@example.com", "x", "10.0.0.1")
+
+    event = mock_writer.record.call_args.args[0]
+    assert (event.type, event.email, event.reason, event.ip_address) == (
+        LOGIN_FAILED, "nobody@example.com", "unknown_email", "10.0.0.1"
+    )
@@ -48,3 +48,178 @@ async def test_read_users_me_unauthorized(mock_get_current_user, client):
     response = await client.get("/api/v1/auth/me")
     assert response.status_code == 401
     assert response.json() == {"detail": "Not authenticated"}
+
+
+@patch("src.users.service.update_password_hash")
+@patch("src.users.service.get_by_email")
+async def test_authenticate_user_rehashes_stale_hash(
+    mock_get_by_email, mock_update_password_hash, mock_user, mock_db
+):
+    """Test a hash made with a lower cost is upgraded on successful login."""
+    from src.auth import service
+    from src.auth.utils import build_pwd_context
+
+    stale_hash = build_pwd_context(bcrypt_rounds=4).hash("password123")
+    mock_get_by_email.return_value = {**mock_user, "hashed_password": stale_hash}
+
+    with patch("src.auth.utils.pwd_context", build_pwd_context(bcrypt_rounds=5)):
+        user = await service.authenticate_user(mock_db, "test@example.com", "password123")
+
+    mock_update_password_hash.assert_awaited_once()
+    new_hash = mock_update_password_hash.await_args.args[2]
+    assert new_hash.startswith("$2b$05$")
+    assert user["hashed_password"] == new_hash
+
+
+@patch("src.users.service.update_password_hash")
+@patch("src.users.service.get_by_email")
+async def test_authenticate_user_keeps_current_hash(
+    mock_get_by_email, mock_update_password_hash, mock_user, mock_db
+):
+    """Test an up-to-date hash is not rewritten."""
+    from src.auth import service
+    from src.auth.utils import build_pwd_context
+
+    context = build_pwd_context(bcrypt_rounds=4)
+    mock_get_by_email.return_value = {
+        **mock_user, "hashed_password": context.hash("password123")
+    }
+
+    with patch("src.auth.utils.pwd_context", context):
+        await service.authenticate_user(mock_db, "test@example.com", "password123")
+
+    mock_update_password_hash.assert_not_awaited()
+
+
+@pytest.fixture
+def claims_token(mock_user):
+    """Fixture for a claims token of the mock user."""
+    import time
+    from datetime import datetime
+    from src.auth.claims import build_claims
+    from src.auth.utils import create_access_token
+
+    user = {**mock_user, "updated_at": datetime(2025, 2, 14, 20, 0)}
+    return create_access_token({"user_id": user["id"], **build_claims(user, time.time())})
+
+
+@pytest.fixture
+def claims_trusted():
+    """Fixture enabling claims tokens with a connected event listener.
+
+    Restores the revocations the test records, which are module-global.
+    """
+    from src.auth.claims import revocations
+
+    changed_at = revocations._changed_at.copy()
+    resynced_at = revocations._resynced_at
+    with (
+        patch("src.core.config.settings.AUTH_CLAIMS_TOKENS_ENABLED", True),
+        patch("src.users.events.is_listening", return_value=True),
+    ):
+        yield
+    revocations._changed_at = changed_at
+    revocations._resynced_at = resynced_at
+
+
+@patch("src.users.service.get_by_id")
+async def test_principal_trusts_fresh_claims(
+    mock_get_by_id, claims_token, claims_trusted, mock_user, mock_db
+):
+    """Test a fresh claims token is authorized without loading the user."""
+    from uuid import UUID
+    from src.auth.dependencies import get_current_principal
+
+    principal = await get_current_principal(claims_token, mock_db)
+
+    mock_get_by_id.assert_not_awaited()
+    assert principal == {
+        "id": UUID(mock_user["id"]),
+        "is_active": True,
+        "is_superuser": False,
+        "version": "2025-02-14T20:00:00",
+    }
+
+
+@patch("src.users.service.get_by_id")
+async def test_principal_rechecks_changed_user(
+    mock_get_by_id, claims_token, claims_trusted, mock_user, mock_db
+):
+    """Test claims issued before a change to the user fall back to the database."""
+    from uuid import UUID
+    from src.auth.dependencies import get_current_principal
+    from src.users import events
+
+    mock_get_by_id.return_value = {**mock_user, "is_superuser": True}
+    events.dispatch(events.USER_UPDATED, [UUID(mock_user["id"])])
+
+    principal = await get_current_principal(claims_token, mock_db)
+
+    mock_get_by_id.assert_awaited_once()
+    assert principal["is_superuser"] is True
+
+
+@patch("src.users.service.get_by_id")
+async def test_principal_ignores_claims_when_disabled(mock_get_by_id, claims_token, mock_user, mock_db):
+    """Test claims are not trusted unless claims tokens are enabled."""
+    from src.auth.dependencies import get_current_principal
+
+    mock_get_by_id.return_value = mock_user
+    principal = await get_current_principal(claims_token, mock_db)
+
+    mock_get_by_id.assert_awaited_once()
+    assert principal == mock_user
+
+
+@patch("src.users.service.get_by_id")
+async def test_principal_ignores_claims_without_listener(
+    mock_get_by_id, claims_token, mock_user, mock_db
+):
+    """Test claims are not trusted when other workers' changes aren't being received."""
+    from src.auth.dependencies import get_current_principal
+
+    mock_get_by_id.return_value = mock_user
+    with (
+        patch("src.core.config.settings.AUTH_CLAIMS_TOKENS_ENABLED", True),
+        patch("src.users.events.is_listening", return_value=False),
+    ):
+        principal = await get_current_principal(claims_token, mock_db)
+
+    mock_get_by_id.assert_awaited_once()
+    assert principal == mock_user
+
+
+@patch("src.users.service.get_by_id")
+@patch("src.auth.service.verify_and_update_password")
+@patch("src.users.service.get_by_email")
+async def test_claims_exclude_changes_during_login(
+    mock_get_by_email, mock_verify, mock_get_by_id, claims_trusted, mock_user, mock_db
+):
+    """Test a change seen after the user was read invalidates the issued claims."""
+    from datetime import datetime
+    from uuid import UUID
+    from src.auth import service
+    from src.auth.dependencies import get_current_principal
+    from src.users import events
+
+    user = {
+        **mock_user,
+        "id": UUID(mock_user["id"]),
+        "is_superuser": True,
+        "hashed_password": "hash",
+        "updated_at": datetime(2025, 2, 14, 20, 0),
+    }
+    mock_get_by_email.return_value = user
+    mock_get_by_id.return_value = mock_user
+
+    def demote_while_verifying(password, hashed_password):
+        events.dispatch(events.USER_UPDATED, [user["id"]])
+        return True, None
+
+    mock_verify.side_effect = demote_while_verifying
+
+    token = await service.login(mock_db, user["email"], "password123")
+    principal = await get_current_principal(token["access_token"], mock_db)
+
+    mock_get_by_id.assert_awaited_once()
+    assert principal["is_superuser"] is False
@@ -1,14 +1,36 @@
 import pytest
-from unittest.mock import AsyncMock
+from contextlib import contextmanager
+from unittest.mock import AsyncMock, MagicMock
 from httpx import AsyncClient
 from fastapi import FastAPI
+from src.core.ratelimit import MemoryRateLimitBackend, rate_limiter
+from src.db.instrumentation import track_queries
+from src.users.cache import users_list_cache
 from src.main import app as fastapi_app
 
 
+@pytest.fixture(autouse=True)
+def fresh_rate_limits():
+    """Fixture giving every test empty rate limit buckets, kept in memory."""
+    rate_limiter._backend = MemoryRateLimitBackend()
+    yield
+    rate_limiter._backend = None
+
+
+@pytest.fixture(autouse=True)
+def empty_users_cache():
+    """Fixture so no test is served user listings cached by another."""
+    users_list_cache.invalidate()
+
+
 @pytest.fixture
 def mock_db():
     """Fixture for mocking the database session."""
-    return AsyncMock()
+    db = AsyncMock()
+    db.in_transaction = MagicMock(return_value=True)  # not a coroutine
+    db.info = {}
+    db.new, db.dirty, db.deleted = set(), set(), set()
+    return db
 
 
 @pytest.fixture
@@ -65,3 +87,17 @@ async def client(mock_token):
         headers={"Authorization": f"Bearer {mock_token['access_token']}"}
     ) as ac:
         yield ac
+
+
+@pytest.fixture
+def assert_max_queries():
+    """Fixture asserting the maximum number of SQL statements run in a block."""
+    @contextmanager
+    def _assert_max_queries(limit: int):
+        with track_queries() as stats:
+            yield stats
+        assert stats.count <= limit, (
+            f"{stats.count} SQL statements executed, expected at most {limit}:\n"
+            + "\n".join(f"{count}x {statement}" for statement, count in stats.statements.items())
+        )
+    return _assert_max_queries
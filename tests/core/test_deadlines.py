@@ -0,0 +1,133 @@
+import asyncio
+import time
+from unittest.mock import patch
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.responses import JSONResponse
+from httpx import AsyncClient, ASGITransport
+
+from src.core.deadlines import (
+    apply_deadline,
+    get_remaining,
+    request_deadline_middleware,
+    request_timeout,
+    within_deadline,
+)
+from src.core.exceptions import DeadlineExceededException
+
+
+@pytest.fixture
+async def client():
+    """Fixture to create a client for an app using request deadlines."""
+    app = FastAPI()
+    app.middleware("http")(request_deadline_middleware)
+
+    @app.get("/remaining")
+    async def remaining() -> dict:
+        return {"remaining": get_remaining()}
+
+    @app.get("/slow", dependencies=[Depends(request_timeout(50))])
+    async def slow() -> dict:
+        await within_deadline(asyncio.sleep(1))
+        return {}
+
+    @app.exception_handler(DeadlineExceededException)
+    async def deadline_handler(request, exc):
+        return JSONResponse(status_code=exc.status_code, content={"message": exc.detail})
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app),
+        base_url="http://test"
+    ) as client:
+        yield client
+
+
+async def test_requests_get_default_deadline(client):
+    """Test every request runs with the configured deadline."""
+    from src.core.config import settings
+
+    response = await client.get("/remaining")
+
+    remaining = response.json()["remaining"]
+    assert 0 < remaining <= settings.REQUEST_TIMEOUT_MS / 1000
+
+
+async def test_header_deadline_is_capped(client):
+    """Test clients can change the deadline only up to the maximum."""
+    from src.core.config import settings
+
+    short = await client.get("/remaining", headers={"X-Request-Timeout-Ms": "500"})
+    long = await client.get("/remaining", headers={"X-Request-Timeout-Ms": "999999999"})
+
+    assert 0 < short.json()["remaining"] <= 0.5
+    assert long.json()["remaining"] <= settings.REQUEST_TIMEOUT_MAX_MS / 1000
+
+
+async def test_expired_deadline_returns_504(client):
+    """Test awaits guarded by within_deadline give up at the route's deadline."""
+    response = await client.get("/slow")
+
+    assert response.status_code == 504
+    assert response.json() == {"message": "Request deadline exceeded"}
+
+
+async def test_no_deadline_outside_requests():
+    """Test code outside a request runs without a deadline."""
+    assert get_remaining() is None
+    assert await within_deadline(asyncio.sleep(0, result=1)) == 1
+
+
+async def test_apply_deadline_renews_statement_timeout(mock_db):
+    """Test the timeout set when the transaction began is renewed with the time left."""
+    from src.core import deadlines
+
+    token = deadlines._deadline.set(time.monotonic() + 2)
+    try:
+        mock_db.info[deadlines._TIMEOUT_SET_AT_KEY] = time.monotonic()
+        await apply_deadline(mock_db)
+        mock_db.execute.assert_not_awaited()
+
+        mock_db.info[deadlines._TIMEOUT_SET_AT_KEY] = time.monotonic() - 1
+        await apply_deadline(mock_db)
+        statement = str(mock_db.execute.await_args.args[0])
+        assert statement.startswith("SET LOCAL statement_timeout = ")
+        assert 0 < int(statement.rsplit(" ", 1)[1]) <= 2000
+
+        deadlines._deadline.set(time.monotonic() - 1)
+        with pytest.raises(DeadlineExceededException):
+            await apply_deadline(mock_db)
+    finally:
+        deadlines._deadline.reset(token)
+
+
+@patch("src.users.service.get_by_id")
+async def test_cancelled_statement_returns_504(mock_get_by_id, mock_db):
+    """Test statements cancelled by statement_timeout are reported as a 504."""
+    from uuid import UUID
+    from sqlalchemy.exc import DBAPIError
+    from src.auth.dependencies import get_current_principal
+    from src.db.base import get_db
+    from src.main import app
+
+    class QueryCanceledError(Exception):
+        sqlstate = "57014"
+
+    user_id = UUID("123e4567-e89b-12d3-a456-426614174000")
+    mock_get_by_id.side_effect = DBAPIError("SELECT", {}, QueryCanceledError())
+    app.dependency_overrides[get_db] = lambda: mock_db
+    app.dependency_overrides[get_current_principal] = lambda: {
+        "id": user_id,
+        "is_superuser": False,
+    }
+    try:
+        async with AsyncClient(
+            transport=ASGITransport(app=app),
+            base_url="http://test"
+        ) as client:
+            response = await client.get(f"/api/v1/users/{user_id}")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 504
+    assert response.json()["message"] == "Request deadline exceeded"
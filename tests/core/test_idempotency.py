@@ -0,0 +1,145 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from httpx import AsyncClient, ASGITransport
+
+from src.core.idempotency import IdempotencyMiddleware, MemoryIdempotencyStore
+
+
+@pytest.fixture
+def calls():
+    """Fixture counting how often the handler runs."""
+    return []
+
+
+@pytest.fixture
+async def client(calls):
+    """Fixture to create a client for an app using the middleware."""
+    app = FastAPI()
+    app.add_middleware(IdempotencyMiddleware, store=MemoryIdempotencyStore())
+
+    @app.post("/items", status_code=201)
+    async def create_item(item: dict) -> dict:
+        calls.append(item)
+        await asyncio.sleep(0.01)
+        return {"number": len(calls), **item}
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app),
+        base_url="http://test"
+    ) as client:
+        yield client
+
+
+async def test_retry_is_replayed(client, calls):
+    """Test a retried request returns the stored response without rerunning."""
+    headers = {"Idempotency-Key": "abc"}
+    first = await client.post("/items", json={"name": "a"}, headers=headers)
+    second = await client.post("/items", json={"name": "a"}, headers=headers)
+
+    assert first.status_code == second.status_code == 201
+    assert first.json() == second.json() == {"number": 1, "name": "a"}
+    assert second.headers["idempotent-replayed"] == "true"
+    assert len(calls) == 1
+
+
+async def test_concurrent_duplicates_wait_for_first(client, calls):
+    """Test concurrent duplicates share the in-flight result."""
+    headers = {"Idempotency-Key": "abc"}
+    responses = await asyncio.gather(*(
+        client.post("/items", json={"name": "a"}, headers=headers)
+        for _ in range(3)
+    ))
+
+    assert len(calls) == 1
+    assert {response.json()["number"] for response in responses} == {1}
+
+
+@pytest.mark.parametrize("failure", ["server_error", "exception"])
+async def test_waiters_rerun_a_failed_first_request(failure):
+    """Test one duplicate waiting on a request that failed reruns it for all."""
+    calls = []
+    app = FastAPI()
+    app.add_middleware(IdempotencyMiddleware, store=MemoryIdempotencyStore())
+
+    @app.post("/items", status_code=201)
+    async def create_item(item: dict) -> dict:
+        calls.append(item)
+        if len(calls) == 1:
+            await asyncio.sleep(0.02)
+            if failure == "exception":
+                raise RuntimeError("boom")
+            raise HTTPException(status_code=503)
+        await asyncio.sleep(0.01)
+        return {"number": len(calls)}
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app, raise_app_exceptions=False),
+        base_url="http://test"
+    ) as client:
+        headers = {"Idempotency-Key": "abc"}
+        first = asyncio.create_task(client.post("/items", json={}, headers=headers))
+        await asyncio.sleep(0.005)
+        waiters = await asyncio.gather(*(
+            client.post("/items", json={}, headers=headers) for _ in range(2)
+        ))
+        first = await first
+
+    assert first.status_code in (500, 503)
+    assert [response.status_code for response in waiters] == [201, 201]
+    assert [response.json()["number"] for response in waiters] == [2, 2]
+    assert ["idempotent-replayed" in response.headers for response in waiters] == [False, True]
+    assert len(calls) == 2
+
+
+async def test_concurrent_duplicates_wait_while_store_is_read(calls):
+    """Test duplicates wait for the first even when reading the store yields."""
+    class SlowStore(MemoryIdempotencyStore):
+        # Like a query: reads what was stored when it started, returns later
+        delays = [0, 0.03, 0.03]
+
+        async def get(self, key):
+            stored = await super().get(key)
+            await asyncio.sleep(self.delays.pop(0))
+            return stored
+
+    app = FastAPI()
+    app.add_middleware(IdempotencyMiddleware, store=SlowStore())
+
+    @app.post("/items", status_code=201)
+    async def create_item(item: dict) -> dict:
+        calls.append(item)
+        await asyncio.sleep(0.01)
+        return {"number": len(calls)}
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app),
+        base_url="http://test"
+    ) as client:
+        headers = {"Idempotency-Key": "abc"}
+        responses = await asyncio.gather(*(
+            client.post("/items", json={}, headers=headers) for _ in range(3)
+        ))
+
+    assert [response.status_code for response in responses] == [201] * 3
+    assert len(calls) == 1
+
+
+async def test_key_reused_with_different_body(client, calls):
+    """Test reusing a key for a different body is rejected."""
+    headers = {"Idempotency-Key": "abc"}
+    await client.post("/items", json={"name": "a"}, headers=headers)
+    response = await client.post("/items", json={"name": "b"}, headers=headers)
+
+    assert response.status_code == 422
+    assert response.json()["success"] is False
+    assert len(calls) == 1
+
+
+async def test_requests_without_key_are_not_stored(client, calls):
+    """Test requests without the header always run the handler."""
+    await client.post("/items", json={"name": "a"})
+    await client.post("/items", json={"name": "a"})
+
+    assert len(calls) == 2
@@ -0,0 +1,66 @@
+import json
+from unittest.mock import patch
+
+from fastapi import FastAPI
+from httpx import AsyncClient, ASGITransport
+
+from src.core.openapi import build_schema, load_cached_schema
+
+
+def make_app() -> FastAPI:
+    app = FastAPI(title="Test")
+
+    @app.get("/items")
+    async def list_items() -> list[str]:
+        return []
+
+    return app
+
+
+async def test_cached_schema_is_served(tmp_path):
+    """Test a prebuilt schema is served without generating it."""
+    path = tmp_path / "openapi.json"
+    schema = build_schema(make_app())
+    schema["info"]["title"] = "Prebuilt"
+    path.write_text(json.dumps(schema))
+
+    app = make_app()
+    assert load_cached_schema(app, str(path))
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app),
+        base_url="http://test"
+    ) as client:
+        response = await client.get("/openapi.json")
+
+    assert response.json()["info"]["title"] == "Prebuilt"
+
+
+def test_stale_schema_is_ignored(tmp_path):
+    """Test a schema built for other routes falls back to generating it."""
+    path = tmp_path / "openapi.json"
+    path.write_text(json.dumps(build_schema(make_app())))
+
+    app = make_app()
+
+    @app.get("/other")
+    async def other() -> dict:
+        return {}
+
+    assert not load_cached_schema(app, str(path))
+    assert not load_cached_schema(app, str(tmp_path / "missing.json"))
+    assert "/other" in app.openapi()["paths"]
+
+
+def test_schema_built_with_other_settings_is_ignored(tmp_path):
+    """Test a schema built with other schema settings or app metadata is not served."""
+    path = tmp_path / "openapi.json"
+    path.write_text(json.dumps(build_schema(make_app())))
+
+    with patch("src.core.config.settings.USERS_BATCH_GET_MAX_IDS", 5):
+        assert not load_cached_schema(make_app(), str(path))
+
+    app = make_app()
+    app.title = "Renamed"
+    assert not load_cached_schema(app, str(path))
+    assert load_cached_schema(make_app(), str(path))
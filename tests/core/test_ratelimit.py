@@ -0,0 +1,172 @@
+import multiprocessing
+import os
+from unittest.mock import patch
+
+import pytest
+from httpx import AsyncClient, ASGITransport
+
+from src.core.ratelimit import (
+    MemoryRateLimitBackend,
+    RateLimit,
+    RateLimiter,
+    SharedMemoryRateLimitBackend,
+    rate_limiter,
+)
+from src.main import app
+
+
+def test_parse_rate_limit():
+    """Test limits are parsed from their settings format."""
+    assert RateLimit.parse("5/minute") == RateLimit(5, 60)
+    assert RateLimit.parse("100/hours") == RateLimit(100, 3600)
+    with pytest.raises(ValueError):
+        RateLimit.parse("5 per minute")
+    for value in ("0/minute", "-1/minute"):
+        with pytest.raises(ValueError):
+            RateLimit.parse(value)
+
+
+async def test_bucket_refills_over_time():
+    """Test a bucket allows its capacity at once, then refills."""
+    backend = MemoryRateLimitBackend()
+    limit = RateLimit(2, 60)
+
+    with patch("src.core.ratelimit.time.time", return_value=1000.0):
+        assert await backend.hit("k", limit) == 0
+        assert await backend.hit("k", limit) == 0
+        assert await backend.hit("k", limit) == pytest.approx(30)
+        assert await backend.hit("other", limit) == 0
+
+    with patch("src.core.ratelimit.time.time", return_value=1030.0):
+        assert await backend.hit("k", limit) == 0
+
+
+async def test_shared_memory_buckets_survive_reopening(tmp_path):
+    """Test buckets are kept in the file, not in the backend object."""
+    path = str(tmp_path / "limits")
+    limit = RateLimit(1, 3600)
+
+    first = SharedMemoryRateLimitBackend(path, slots=1024, stripes=4)
+    assert await first.hit("k", limit) == 0
+    second = SharedMemoryRateLimitBackend(path, slots=1024, stripes=4)
+    assert await second.hit("k", limit) > 0
+    first.close()
+    second.close()
+
+
+async def test_shared_memory_layouts_use_separate_files(tmp_path):
+    """Test opening another layout never resizes a file that is in use."""
+    path = str(tmp_path / "limits")
+    limit = RateLimit(1, 3600)
+
+    first = SharedMemoryRateLimitBackend(path, slots=1024, stripes=4)
+    assert await first.hit("k", limit) == 0
+    second = SharedMemoryRateLimitBackend(path, slots=4096, stripes=8)
+    assert second.path != first.path
+    assert await second.hit("k", limit) == 0
+    # Still mapped and intact, where a shrunk file would crash with SIGBUS
+    assert await first.hit("k", limit) > 0
+    assert await first.hit("other", limit) == 0
+    first.close()
+    second.close()
+
+
+def test_shared_memory_refuses_mismatched_file(tmp_path):
+    """Test a file not written with the expected layout is left alone."""
+    backend = SharedMemoryRateLimitBackend(str(tmp_path / "limits"), slots=1024, stripes=4)
+    backend.close()
+    with open(backend.path, "r+b") as file:
+        file.write(b"\0" * 16)
+
+    with pytest.raises(RuntimeError):
+        SharedMemoryRateLimitBackend(str(tmp_path / "limits"), slots=1024, stripes=4)
+    assert os.path.getsize(backend.path) == backend.size
+
+
+async def test_shared_memory_reuses_slots_when_full(tmp_path):
+    """Test more keys than slots are accepted, evicting old buckets."""
+    backend = SharedMemoryRateLimitBackend(str(tmp_path / "limits"), slots=8, stripes=1)
+    limit = RateLimit(1, 3600)
+
+    for i in range(100):
+        assert await backend.hit(f"key-{i}", limit) == 0
+    assert await backend.hit("key-99", limit) > 0
+    backend.close()
+
+
+def _hit_many(path: str, hits: int, allowed) -> None:
+    import asyncio
+
+    async def run() -> int:
+        backend = SharedMemoryRateLimitBackend(path, slots=1024, stripes=4)
+        limit = RateLimit(100, 10**9)
+        return sum([await backend.hit("shared", limit) == 0 for _ in range(hits)])
+
+    count = asyncio.run(run())
+    with allowed.get_lock():
+        allowed.value += count
+
+
+def test_shared_memory_is_shared_between_processes(tmp_path):
+    """Test workers on one host draw from the same bucket without losing updates."""
+    path = str(tmp_path / "limits")
+    SharedMemoryRateLimitBackend(path, slots=1024, stripes=4).close()
+
+    context = multiprocessing.get_context("fork")
+    allowed = context.Value("i", 0)
+    processes = [
+        context.Process(target=_hit_many, args=(path, 100, allowed)) for _ in range(4)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    assert allowed.value == 100
+
+
+async def test_backend_errors_let_requests_through():
+    """Test a broken backend does not block requests."""
+    class BrokenBackend(MemoryRateLimitBackend):
+        async def hit(self, key, limit):
+            raise OSError("no shared memory")
+
+    limiter = RateLimiter({"rule": "1/minute"}, BrokenBackend)
+
+    await limiter.check("rule", "k")
+    await limiter.check("rule", "k")
+
+
+async def test_backend_that_cannot_be_created_fails_loudly():
+    """Test limits aren't silently skipped when the backend can't be created."""
+    def broken_backend():
+        raise RuntimeError("Rate limit file has another layout")
+
+    limiter = RateLimiter({"rule": "1/minute"}, broken_backend)
+
+    with pytest.raises(RuntimeError):
+        limiter.start()
+    with pytest.raises(RuntimeError):
+        await limiter.check("rule", "k")
+
+
+@patch("src.auth.service.login")
+async def test_login_is_limited_per_email(mock_login):
+    """Test too many logins for one email get a 429 with Retry-After."""
+    mock_login.return_value = {"access_token": "token", "token_type": "bearer"}
+    limit = rate_limiter.limits["auth_token:email"]
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        responses = [
+            await client.post(
+                "/api/v1/auth/token",
+                data={"username": email, "password": "wrong"},
+            )
+            for email in ["Victim@example.com", "victim@example.com"] * limit.capacity
+        ]
+
+    statuses = [response.status_code for response in responses]
+    assert statuses[:limit.capacity] == [200] * limit.capacity
+    assert statuses[-1] == 429
+    assert int(responses[-1].headers["retry-after"]) > 0
+    assert mock_login.await_count == limit.capacity
@@ -0,0 +1,75 @@
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import create_engine, text
+import pytest
+
+from src.db.instrumentation import instrument_engine, track_queries
+from src.main import app
+
+
+@pytest.fixture
+def engine():
+    """Fixture for an instrumented in-memory engine."""
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+    yield engine
+    engine.dispose()
+
+
+def test_track_queries_counts_statements(engine):
+    """Test statements are counted in nested scopes."""
+    with engine.connect() as conn:
+        with track_queries() as outer:
+            conn.execute(text("SELECT 1"))
+            with track_queries() as inner:
+                conn.execute(text("SELECT 2"))
+                conn.execute(text("SELECT 2"))
+
+    assert outer.count == 3
+    assert inner.count == 2
+    assert inner.repeated(2) == [("SELECT 2", 2)]
+    assert outer.duration >= inner.duration > 0
+
+
+def test_statements_outside_scope_are_ignored(engine):
+    """Test nothing is recorded without an active scope."""
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        with track_queries() as stats:
+            pass
+
+    assert stats.count == 0
+
+
+def test_connection_hold_time_is_recorded(engine):
+    """Test the time a pool connection is held counts in the scope that checked it out."""
+    with track_queries() as stats:
+        conn = engine.connect()
+    conn.execute(text("SELECT 1"))
+    conn.close()
+
+    assert stats.checkouts == 1
+    assert stats.connection_time > 0
+    assert stats.count == 0
+
+
+def test_assert_max_queries_fails_over_budget(engine, assert_max_queries):
+    """Test the fixture fails when the budget is exceeded."""
+    with engine.connect() as conn:
+        with pytest.raises(AssertionError, match="expected at most 1"):
+            with assert_max_queries(1):
+                conn.execute(text("SELECT 1"))
+                conn.execute(text("SELECT 2"))
+
+
+async def test_server_timing_header():
+    """Test the per-request totals are exposed in debug mode."""
+    async with AsyncClient(
+        transport=ASGITransport(app=app),
+        base_url="http://test"
+    ) as client:
+        response = await client.get("/api/v1/health")
+
+    assert response.headers.get_list("server-timing") == [
+        'db;dur=0.0;desc="0 queries"',
+        'db-conn;dur=0.0;desc="0 checkouts"',
+    ]
@@ -0,0 +1,82 @@
+import io
+
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+
+from src.db.lock_report import (
+    ACCESS_EXCLUSIVE,
+    SHARE,
+    SHARE_UPDATE_EXCLUSIVE,
+    build_report,
+    split_statements,
+)
+from src.db.migrations import add_not_null, backfill, create_index_concurrently
+
+
+def render_offline(*steps) -> str:
+    """Run migration helpers in offline mode and return the emitted SQL."""
+    output = io.StringIO()
+    context = MigrationContext.configure(
+        dialect_name="postgresql",
+        opts={"as_sql": True, "output_buffer": output, "transaction_per_migration": True},
+    )
+    with Operations.context(context), context.begin_transaction():
+        for step in steps:
+            step()
+    return output.getvalue()
+
+
+def test_create_index_concurrently_runs_outside_transaction():
+    """Test the index is built concurrently after committing the migration."""
+    sql = render_offline(
+        lambda: create_index_concurrently("users_created_at_idx", "users", ["created_at"])
+    )
+
+    statements = [statement for _, statement in split_statements(sql)]
+    create = next(s for s in statements if s.startswith("CREATE INDEX"))
+    assert "CONCURRENTLY IF NOT EXISTS users_created_at_idx ON users (created_at)" in create
+    assert statements[statements.index(create) - 1] == "COMMIT"
+
+
+def test_backfill_emits_batched_update_offline():
+    """Test a backfill is rendered as one resumable batch in offline mode."""
+    sql = render_offline(
+        lambda: backfill("users", "first_name = ''", "first_name IS NULL", batch_size=500)
+    )
+
+    assert (
+        "UPDATE users SET first_name = '' WHERE id IN (SELECT id FROM users "
+        "WHERE (first_name IS NULL) ORDER BY id LIMIT 500) RETURNING id"
+    ) in sql
+
+
+def test_lock_report_flags_blocking_statements():
+    """Test plain DDL on a table is reported with the locks it takes."""
+    reports = build_report(
+        "-- Running upgrade  -> abc123\n\n"
+        "CREATE INDEX users_email_idx ON users (email);\n\n"
+        "ALTER TABLE users ALTER COLUMN email SET NOT NULL;\n\n"
+        "INSERT INTO alembic_version (version_num) VALUES ('abc123');\n"
+    )
+
+    assert [(r.migration, r.lock, r.table) for r in reports] == [
+        ("upgrade -> abc123", SHARE, "users"),
+        ("upgrade -> abc123", ACCESS_EXCLUSIVE, "users"),
+    ]
+    assert any("create_index_concurrently" in w for w in reports[0].warnings)
+    assert any("add_not_null" in w for w in reports[1].warnings)
+    assert all(any("lock_timeout" in w for w in r.warnings) for r in reports)
+
+
+def test_lock_report_accepts_toolkit_migrations():
+    """Test migrations written with the helpers pass the lock report."""
+    sql = render_offline(
+        lambda: create_index_concurrently("users_created_at_idx", "users", ["created_at"]),
+        lambda: backfill("users", "first_name = ''", "first_name IS NULL"),
+        lambda: add_not_null("users", "first_name"),
+    )
+
+    reports = build_report("SET lock_timeout = 5000;\n" + sql)
+
+    assert reports[0].lock == SHARE_UPDATE_EXCLUSIVE
+    assert [r.warnings for r in reports] == [[] for _ in reports]
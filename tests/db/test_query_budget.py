@@ -0,0 +1,124 @@
+"""Per-route SQL statement budgets.
+
+These run against the database configured in ASYNC_DATABASE_URL and are
+skipped when it is not reachable. When a change legitimately needs more
+statements, raise the route's budget here in the same change.
+"""
+import asyncio
+from uuid import uuid4
+
+import pytest
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import delete, text, update
+
+from src.auth.utils import create_access_token
+from src.db.base import AsyncSessionLocal, Base, engine
+from src.main import app
+from src.users import service
+from src.users.models import User
+from src.users.schemas import UserCreate
+
+PASSWORD = "password123"
+
+# (method, path, caller, body, max statements). Every transaction started
+# during a request also runs SET LOCAL statement_timeout for its deadline
+# (renewed by apply_deadline only when set more than 50 ms earlier).
+ROUTE_QUERY_BUDGETS = [
+    ("POST", "/api/v1/auth/token", None, "login", 2),
+    ("GET", "/api/v1/auth/me", "user", None, 2),
+    ("POST", "/api/v1/users", None, "new_user", 6),
+    ("GET", "/api/v1/users", "admin", None, 3),
+    ("POST", "/api/v1/users:batchGet", "user", "own_ids", 3),
+    ("POST", "/api/v1/users:bulkDeactivate", "admin", "user_ids", 4),
+    ("POST", "/api/v1/users:bulkDelete", "admin", "user_ids", 4),
+    ("PATCH", "/api/v1/users:bulk", "admin", "patch", 4),
+    ("GET", "/api/v1/users/{user_id}", "user", None, 3),
+    ("PUT", "/api/v1/users/{user_id}", "user", "update", 6),
+    ("DELETE", "/api/v1/users/{user_id}", "user", None, 5),
+]
+
+
+async def _database_available() -> bool:
+    try:
+        async with engine.connect() as conn:
+            await asyncio.wait_for(conn.execute(text("SELECT 1")), timeout=2)
+        return True
+    except Exception:
+        return False
+
+
+@pytest.fixture
+async def users():
+    """Fixture creating a regular user and a superuser in the database."""
+    if not await _database_available():
+        await engine.dispose()
+        pytest.skip("database not available")
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with AsyncSessionLocal() as db:
+        user = await service.create(
+            db, UserCreate(email=f"budget-{uuid4().hex}@example.com", password=PASSWORD)
+        )
+        admin = await service.create(
+            db, UserCreate(email=f"budget-{uuid4().hex}@example.com", password=PASSWORD)
+        )
+        await db.execute(
+            update(User).where(User.id == admin["id"]).values(is_superuser=True)
+        )
+        await db.commit()
+
+    yield {"user": user, "admin": admin}
+
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(User).where(User.id.in_([user["id"], admin["id"]])))
+        await db.commit()
+    await engine.dispose()
+
+
+@pytest.fixture
+async def client():
+    """Fixture to create a FastAPI test client."""
+    async with AsyncClient(
+        transport=ASGITransport(app=app),
+        base_url="http://test"
+    ) as client:
+        yield client
+
+
+@pytest.mark.parametrize("method,path,caller,body,budget", ROUTE_QUERY_BUDGETS)
+async def test_route_query_budget(
+    method, path, caller, body, budget, users, client, assert_max_queries
+):
+    """Test each route stays within its SQL statement budget."""
+    user = users["user"]
+    request = {"headers": {}}
+    if caller:
+        token = create_access_token({"user_id": str(users[caller]["id"])})
+        request["headers"]["Authorization"] = f"Bearer {token}"
+
+    if body == "login":
+        request["data"] = {"username": user["email"], "password": PASSWORD}
+    elif body == "new_user":
+        request["json"] = {"email": f"budget-{uuid4().hex}@example.com", "password": PASSWORD}
+    elif body == "own_ids":
+        request["json"] = {"ids": [str(user["id"])]}
+    elif body == "user_ids":
+        request["json"] = {"ids": [str(user["id"])]}
+    elif body == "patch":
+        request["json"] = {"users": [{"id": str(user["id"]), "first_name": "Bulk"}]}
+    elif body == "update":
+        request["json"] = {"first_name": "Budget"}
+
+    with assert_max_queries(budget):
+        response = await client.request(
+            method, path.format(user_id=user["id"]), **request
+        )
+
+    assert response.status_code < 400, response.text
+
+    if body == "new_user":
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(User).where(User.email == request["json"]["email"]))
+            await db.commit()
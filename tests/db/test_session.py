@@ -0,0 +1,84 @@
+from typing import Annotated
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi import Depends, FastAPI
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.exceptions import BadRequestException
+from src.db.base import get_db, get_db_manual_commit, release_connection
+
+
+@pytest.fixture
+def session():
+    """Fixture for a mocked session returned by AsyncSessionLocal."""
+    session = AsyncMock()
+    session.__aenter__.return_value = session
+    session.info = {}
+    with patch("src.db.base.AsyncSessionLocal", MagicMock(return_value=session)):
+        yield session
+
+
+def make_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/ok")
+    async def ok(db: Annotated[AsyncSession, Depends(get_db)]) -> dict:
+        await db.flush()
+        return {}
+
+    @app.post("/fail")
+    async def fail(db: Annotated[AsyncSession, Depends(get_db)]) -> dict:
+        await db.flush()
+        raise BadRequestException()
+
+    @app.post("/manual")
+    async def manual(db: Annotated[AsyncSession, Depends(get_db_manual_commit)]) -> dict:
+        return {}
+
+    return app
+
+
+async def post(path: str) -> int:
+    async with AsyncClient(transport=ASGITransport(app=make_app()), base_url="http://test") as client:
+        return (await client.post(path)).status_code
+
+
+async def test_request_is_committed_once(session):
+    """Test the request's changes are committed once, after the handler."""
+    assert await post("/ok") == 200
+    session.commit.assert_awaited_once()
+    session.close.assert_awaited()
+
+
+async def test_failed_request_is_not_committed(session):
+    """Test nothing is committed when the handler raises."""
+    assert await post("/fail") == 400
+    session.commit.assert_not_awaited()
+    session.close.assert_awaited()
+
+
+async def test_manual_commit_opts_out(session):
+    """Test routes using get_db_manual_commit are not committed for them."""
+    assert await post("/manual") == 200
+    session.commit.assert_not_awaited()
+
+
+async def test_release_connection_only_ends_open_transactions(mock_db):
+    """Test releasing a session without a transaction does nothing."""
+    mock_db.in_transaction.return_value = False
+    await release_connection(mock_db)
+    mock_db.commit.assert_not_awaited()
+
+    mock_db.in_transaction.return_value = True
+    await release_connection(mock_db)
+    mock_db.commit.assert_awaited_once()
+
+
+async def test_release_connection_refuses_pending_changes(mock_db):
+    """Test releasing a session does not commit changes made so far."""
+    mock_db.dirty = {object()}
+    with pytest.raises(RuntimeError):
+        await release_connection(mock_db)
+    mock_db.commit.assert_not_awaited()
@@ -0,0 +1,65 @@
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import create_engine, text
+import pytest
+
+from src.auth.dependencies import get_current_active_superuser
+from src.db.base import slow_query_log
+from src.db.instrumentation import instrument_engine
+from src.db.slow_queries import SlowQueryLog
+from src.main import app
+
+
+def test_slow_queries_are_recorded_redacted():
+    """Test statements over the threshold are kept without parameter values."""
+    log = SlowQueryLog(threshold_ms=0, max_entries=2)
+    engine = create_engine("sqlite://")
+    instrument_engine(engine, log)
+
+    with engine.connect() as conn:
+        conn.execute(text("SELECT :secret"), {"secret": "hunter2"})
+        conn.execute(text("SELECT 2"))
+        conn.execute(text("SELECT 3"))
+    engine.dispose()
+
+    entries = log.entries()
+    assert [entry.statement for entry in entries] == ["SELECT 3", "SELECT 2"]
+    assert "hunter2" not in repr(log._entries)
+
+
+def test_fast_queries_are_ignored():
+    """Test statements under the threshold are not recorded."""
+    log = SlowQueryLog(threshold_ms=60_000)
+    engine = create_engine("sqlite://")
+    instrument_engine(engine, log)
+
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    engine.dispose()
+
+    assert log.entries() == []
+
+
+async def test_slow_queries_endpoint():
+    """Test superusers can list recorded slow queries."""
+    log = SlowQueryLog(threshold_ms=0)
+    engine = create_engine("sqlite://")
+    instrument_engine(engine, log)
+    with engine.connect() as conn:
+        conn.exec_driver_sql("SELECT ?", (1,))
+    engine.dispose()
+
+    slow_query_log._entries.extend(log._entries)
+    app.dependency_overrides[get_current_active_superuser] = lambda: {"is_superuser": True}
+    try:
+        async with AsyncClient(
+            transport=ASGITransport(app=app),
+            base_url="http://test"
+        ) as client:
+            response = await client.get("/api/v1/diagnostics/slow-queries")
+    finally:
+        app.dependency_overrides.clear()
+        slow_query_log.clear()
+
+    assert response.status_code == 200
+    assert response.json()["data"][0]["statement"] == "SELECT ?"
+    assert response.json()["data"][0]["parameter_types"] == ["int"]
@@ -0,0 +1,97 @@
+import tracemalloc
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy.orm import Session
+
+from src.auth.dependencies import get_current_active_superuser
+from src.diagnostics.memory import (
+    MemorySamplingMiddleware,
+    RouteAllocationStats,
+    SnapshotStore,
+    diff_snapshots,
+    gc_stats,
+)
+from src.main import app
+
+
+@pytest.fixture
+def tracing():
+    """Fixture tracing allocations for the duration of a test."""
+    tracemalloc.start(5)
+    try:
+        yield
+    finally:
+        tracemalloc.stop()
+
+
+def test_snapshot_diff_finds_new_allocations(tracing):
+    """Test the diff between snapshots points at the line that allocated."""
+    store = SnapshotStore()
+    base = store.take()
+    retained = [bytearray(1024) for _ in range(1000)]
+    current = store.take()
+
+    diff = diff_snapshots(base, current, limit=5)
+
+    assert diff[0]["size_diff_bytes"] >= 1000 * 1024
+    assert __file__ in diff[0]["traceback"][0]
+    assert len(retained) == 1000
+
+
+def test_snapshot_store_is_bounded(tracing):
+    """Test only the most recent snapshots are kept."""
+    store = SnapshotStore(max_snapshots=2)
+    ids = [store.take().id for _ in range(3)]
+
+    assert [s.id for s in store.entries()] == ids[:0:-1]
+    assert store.get(ids[0]) is None
+
+
+def test_gc_stats_count_sessions():
+    """Test live sessions are counted."""
+    session = Session()
+
+    stats = gc_stats()
+
+    assert stats["sessions"] >= 1
+    assert stats["objects"] >= stats["top_types"][0]["count"]
+    session.close()
+
+
+async def test_route_allocations_are_sampled_per_route(tracing):
+    """Test sampled requests are grouped by route template."""
+    stats = RouteAllocationStats()
+    leaked = []
+    test_app = FastAPI()
+    test_app.add_middleware(MemorySamplingMiddleware, sample_rate=1.0, stats=stats)
+
+    @test_app.get("/items/{item_id}")
+    async def leak(item_id: int) -> dict:
+        leaked.append(bytearray(100_000))
+        return {"id": item_id}
+
+    async with AsyncClient(transport=ASGITransport(app=test_app), base_url="http://test") as client:
+        for item_id in range(3):
+            await client.get(f"/items/{item_id}")
+
+    [route] = stats.entries()
+    assert route.route == "GET /items/{item_id}"
+    assert route.samples == 3
+    assert route.total_bytes >= 3 * 100_000
+
+
+async def test_snapshot_requires_tracing():
+    """Test snapshots can only be taken while tracing."""
+    app.dependency_overrides[get_current_active_superuser] = lambda: {"is_superuser": True}
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            response = await client.post("/api/v1/diagnostics/memory/snapshots")
+            stats = await client.get("/api/v1/diagnostics/memory")
+
+        assert response.status_code == 400
+        assert stats.status_code == 200
+        assert stats.json()["data"]["tracing"] is False
+    finally:
+        app.dependency_overrides.clear()
@@ -0,0 +1,71 @@
+import asyncio
+import time
+from unittest.mock import patch
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient, ASGITransport
+
+from src.diagnostics.profiler import ProfileStore, ProfilerMiddleware, SamplingProfiler
+
+
+def busy_wait(seconds: float) -> None:
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def make_app(store: ProfileStore, sample_rate: float) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(
+        ProfilerMiddleware,
+        sample_rate=sample_rate,
+        profiler=SamplingProfiler(interval_ms=1),
+        store=store,
+    )
+
+    @app.get("/work")
+    async def work() -> dict:
+        busy_wait(0.05)
+        await asyncio.sleep(0.05)
+        return {"done": True}
+
+    return app
+
+
+@pytest.fixture
+def store():
+    """Fixture for an empty profile store."""
+    return ProfileStore()
+
+
+async def test_sampled_request_is_profiled(store):
+    """Test CPU and await time are sampled separately."""
+    async with AsyncClient(
+        transport=ASGITransport(app=make_app(store, sample_rate=1.0)),
+        base_url="http://test"
+    ) as client:
+        response = await client.get("/work")
+
+    profile = store.get(response.headers["x-profile-id"])
+    assert profile.status_code == 200
+    assert profile.cpu_ms > 0
+    assert profile.await_ms > 0
+
+    frames = [frame["name"] for frame in profile.speedscope["shared"]["frames"]]
+    cpu, awaits = profile.speedscope["profiles"]
+    assert any(frames[sample[-1]] == "busy_wait" for sample in cpu["samples"])
+    assert any(frames[sample[-1]] == "[await]" for sample in awaits["samples"])
+
+
+async def test_profile_header_requires_superuser(store):
+    """Test the X-Profile header is ignored for non-superusers."""
+    with patch("src.diagnostics.profiler._is_superuser", return_value=False):
+        async with AsyncClient(
+            transport=ASGITransport(app=make_app(store, sample_rate=0.0)),
+            base_url="http://test"
+        ) as client:
+            response = await client.get("/work", headers={"X-Profile": "1"})
+
+    assert "x-profile-id" not in response.headers
+    assert store.entries() == []
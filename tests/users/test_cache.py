@@ -0,0 +1,99 @@
+from unittest.mock import patch
+from uuid import uuid4
+
+from httpx import AsyncClient, ASGITransport
+
+from src.auth.dependencies import get_current_superuser_principal
+from src.db.base import get_db
+from src.main import app
+from src.users import events
+from src.users.cache import UsersListCache, users_list_cache
+
+
+def test_hits_and_misses_are_counted():
+    """Test stored bodies are served for the same key only."""
+    cache = UsersListCache()
+    cache.set("page-1", b"[1]", cache.version)
+
+    assert cache.get("page-1") == b"[1]"
+    assert cache.get("page-2") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_user_change_invalidates():
+    """Test any user change event drops every stored page."""
+    cache = UsersListCache()
+    cache.set("page-1", b"[1]", cache.version)
+
+    cache.on_user_event(events.USER_UPDATED, [uuid4()])
+
+    assert cache.get("page-1") is None
+    assert cache.size_bytes == 0
+    assert cache.invalidations == 1
+
+
+def test_body_read_before_a_change_is_not_stored():
+    """Test a page queried before a change that happened meanwhile is not stored."""
+    cache = UsersListCache()
+    version = cache.version
+    cache.on_user_event(events.USER_DELETED, [uuid4()])
+
+    cache.set("page-1", b"[stale]", version)
+
+    assert cache.get("page-1") is None
+
+
+def test_least_recently_used_are_evicted_by_size():
+    """Test entries are evicted once the bodies exceed max_bytes."""
+    cache = UsersListCache(max_bytes=10)
+    cache.set("a", b"aaaa", cache.version)
+    cache.set("b", b"bbbb", cache.version)
+    cache.get("a")
+    cache.set("c", b"cccc", cache.version)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == b"aaaa"
+    assert cache.size_bytes == 8
+    assert cache.evictions == 1
+
+
+def test_entries_expire():
+    """Test entries are not served after their TTL."""
+    cache = UsersListCache(ttl_seconds=30)
+    with patch("src.users.cache.time.monotonic", return_value=100.0):
+        cache.set("page-1", b"[1]", cache.version)
+    with patch("src.users.cache.time.monotonic", return_value=131.0):
+        assert cache.get("page-1") is None
+    assert len(cache) == 0
+
+
+@patch("src.users.service.get_multi")
+async def test_listing_is_served_from_cache_until_a_change(mock_get_multi, mock_db):
+    """Test repeated listings skip the query until a user changes."""
+    mock_get_multi.return_value = [{
+        "id": str(uuid4()),
+        "email": "user@example.com",
+        "is_active": True,
+        "is_superuser": False,
+        "created_at": "2025-02-14T20:00:00",
+        "updated_at": "2025-02-14T20:00:00",
+    }]
+    app.dependency_overrides[get_db] = lambda: mock_db
+    app.dependency_overrides[get_current_superuser_principal] = lambda: {"is_superuser": True}
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            first = await client.get("/api/v1/users")
+            second = await client.get("/api/v1/users")
+            other_page = await client.get("/api/v1/users", params={"skip": 1})
+            events.dispatch(events.USER_CREATED, [uuid4()])
+            after_change = await client.get("/api/v1/users")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert first.status_code == 200
+    assert second.content == first.content
+    assert [r.headers["x-cache"] for r in (first, second, other_page, after_change)] == [
+        "MISS", "HIT", "MISS", "MISS"
+    ]
+    assert mock_get_multi.await_count == 3
+    assert users_list_cache.hits == 1
@@ -0,0 +1,83 @@
+import asyncio
+import json
+from uuid import uuid4
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.users import events
+
+
+async def test_events_dispatched_after_commit():
+    """Test recorded changes reach subscribers only once the session commits."""
+    received = []
+    unsubscribe = events.subscribe(lambda action, ids: received.append((action, ids)))
+    user_id = uuid4()
+    try:
+        async with AsyncSession() as session:
+            events.record(session, events.USER_UPDATED, [user_id])
+            assert received == []
+            await session.commit()
+    finally:
+        unsubscribe()
+
+    assert received == [(events.USER_UPDATED, [user_id])]
+
+
+async def test_events_discarded_on_rollback():
+    """Test recorded changes are dropped when the session rolls back."""
+    received = []
+    unsubscribe = events.subscribe(lambda action, ids: received.append((action, ids)))
+    try:
+        async with AsyncSession() as session:
+            await session.begin()
+            events.record(session, events.USER_DELETED, [uuid4()])
+            await session.rollback()
+            await session.commit()
+    finally:
+        unsubscribe()
+
+    assert received == []
+
+
+def test_notifications_from_other_workers_are_dispatched():
+    """Test the listener dispatches other workers' events and skips its own."""
+    received = []
+    unsubscribe = events.subscribe(lambda action, ids: received.append((action, ids)))
+    user_id = uuid4()
+    listener = events.UserEventListener()
+    try:
+        for origin in (events.WORKER_ID, "other-worker"):
+            listener._on_notification(None, 1, "user_changes", json.dumps({
+                "origin": origin, "action": events.USER_DELETED, "ids": [str(user_id)]
+            }))
+    finally:
+        unsubscribe()
+
+    assert received == [(events.USER_DELETED, [user_id])]
+
+
+def test_notification_payloads_are_chunked():
+    """Test large changes are split to stay under the NOTIFY payload limit."""
+    payloads = events._payloads([(events.USER_UPDATED, [uuid4() for _ in range(250)])])
+
+    assert len(payloads) == 3
+    assert all(len(payload) < 8000 for payload in payloads)
+
+
+async def test_iter_events_resyncs_slow_consumers():
+    """Test a consumer that falls behind gets a single resync event."""
+    stream = events.iter_events(max_queued=2)
+    pending = asyncio.ensure_future(stream.__anext__())
+    await asyncio.sleep(0)
+
+    for _ in range(3):
+        events.dispatch(events.USER_UPDATED, [uuid4()])
+    user_id = uuid4()
+    events.dispatch(events.USER_DELETED, [user_id])
+
+    first = await pending
+    second = await stream.__anext__()
+    await stream.aclose()
+
+    assert first == (events.USERS_RESYNC, [])
+    assert second == (events.USER_DELETED, [user_id])
@@ -0,0 +1,45 @@
+import asyncio
+from unittest.mock import patch
+from uuid import uuid4
+
+from src.users.loader import UserLoader
+
+
+@patch("src.users.service.get_many_by_ids")
+async def test_loader_coalesces_concurrent_loads(mock_get_many_by_ids, mock_db):
+    """Test loads issued in the same loop iteration share one query."""
+    first_id, second_id = uuid4(), uuid4()
+    mock_get_many_by_ids.return_value = [{"id": first_id}]
+    loader = UserLoader(mock_db)
+
+    first, second, again = await asyncio.gather(
+        loader.load(first_id), loader.load(second_id), loader.load(first_id)
+    )
+
+    assert first == again == {"id": first_id}
+    assert second is None
+    mock_get_many_by_ids.assert_awaited_once_with(mock_db, [first_id, second_id])
+
+
+@patch("src.users.service.get_many_by_ids")
+async def test_loader_splits_large_batches(mock_get_many_by_ids, mock_db):
+    """Test batches larger than max_batch_size are split."""
+    mock_get_many_by_ids.return_value = []
+    loader = UserLoader(mock_db, max_batch_size=2)
+
+    await loader.load_many([uuid4() for _ in range(5)])
+
+    assert mock_get_many_by_ids.await_count == 3
+
+
+@patch("src.users.service.get_many_by_ids")
+async def test_loader_caches_results(mock_get_many_by_ids, mock_db):
+    """Test a user is only fetched once per loader."""
+    user_id = uuid4()
+    mock_get_many_by_ids.return_value = [{"id": user_id}]
+    loader = UserLoader(mock_db)
+
+    await loader.load(user_id)
+    await loader.load(user_id)
+
+    mock_get_many_by_ids.assert_awaited_once()
@@ -124,3 +124,308 @@ async def test_delete_user(mock_delete, mock_get_current_user, mock_user, mock_d
     )
 
     assert response.status_code == 204
+
+
+@patch("src.users.service.get_many_by_ids")
+async def test_batch_get_users(mock_get_many_by_ids, mock_db, client):
+    """Test batch get resolves all ids with a single query."""
+    from uuid import UUID
+    from src.auth.dependencies import get_current_principal
+    from src.db.base import get_db
+
+    found_id = UUID("123e4567-e89b-12d3-a456-426614174000")
+    missing_id = UUID("456e4567-e89b-12d3-a456-426614174000")
+    mock_get_many_by_ids.return_value = [
+        {
+            "id": found_id,
+            "email": "user1@example.com",
+            "is_active": True,
+            "is_superuser": False,
+            "created_at": "2025-02-14T20:00:00",
+            "updated_at": "2025-02-14T20:00:00"
+        }
+    ]
+    app.dependency_overrides[get_db] = lambda: mock_db
+    app.dependency_overrides[get_current_principal] = lambda: {
+        "id": UUID("123e4567-e89b-12d3-a456-426614174001"),
+        "is_superuser": True,
+    }
+    try:
+        response = await client.post(
+            "/api/v1/users:batchGet",
+            json={"ids": [str(found_id), str(missing_id), str(found_id)]},
+        )
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    assert mock_get_many_by_ids.await_count == 1
+    assert mock_get_many_by_ids.await_args.args[1] == [found_id, missing_id]
+    assert [user["id"] for user in response.json()["data"]["users"]] == [str(found_id)]
+    assert response.json()["data"]["not_found"] == [str(missing_id)]
+
+
+async def test_batch_get_users_forbidden(mock_db, client):
+    """Test batch get applies the per-user permission rule to every id."""
+    from uuid import UUID
+    from src.auth.dependencies import get_current_principal
+    from src.db.base import get_db
+
+    own_id = UUID("123e4567-e89b-12d3-a456-426614174000")
+    app.dependency_overrides[get_db] = lambda: mock_db
+    app.dependency_overrides[get_current_principal] = lambda: {
+        "id": own_id,
+        "is_superuser": False,
+    }
+    try:
+        response = await client.post(
+            "/api/v1/users:batchGet",
+            json={"ids": [str(own_id), "456e4567-e89b-12d3-a456-426614174000"]},
+        )
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 403
+
+
+@patch("src.users.service.bulk_deactivate")
+async def test_bulk_deactivate_users(mock_bulk_deactivate, mock_db, client):
+    """Test bulk deactivate excludes the caller and returns affected ids."""
+    from uuid import UUID
+    from src.auth.dependencies import get_current_active_superuser
+    from src.db.base import get_db
+
+    admin_id = UUID("123e4567-e89b-12d3-a456-426614174001")
+    affected_id = UUID("123e4567-e89b-12d3-a456-426614174000")
+    mock_bulk_deactivate.return_value = [affected_id]
+    app.dependency_overrides[get_db] = lambda: mock_db
+    app.dependency_overrides[get_current_active_superuser] = lambda: {
+        "id": admin_id,
+        "is_superuser": True,
+    }
+    try:
+        response = await client.post(
+            "/api/v1/users:bulkDeactivate",
+            json={"created_before": "2025-01-01T00:00:00", "chunk_size": 500},
+        )
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    assert response.json()["data"] == {"count": 1, "ids": [str(affected_id)]}
+    assert mock_bulk_deactivate.await_args.kwargs["exclude_ids"] == [admin_id]
+    assert mock_bulk_deactivate.await_args.kwargs["chunk_size"] == 500
+
+
+async def test_bulk_delete_users_requires_criteria(mock_db, client):
+    """Test bulk delete rejects an empty filter."""
+    from src.auth.dependencies import get_current_active_superuser
+    from src.db.base import get_db
+
+    app.dependency_overrides[get_db] = lambda: mock_db
+    app.dependency_overrides[get_current_active_superuser] = lambda: {
+        "id": "123e4567-e89b-12d3-a456-426614174001",
+        "is_superuser": True,
+    }
+    try:
+        response = await client.post("/api/v1/users:bulkDelete", json={})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 422
+
+
+@patch("src.users.service.bulk_deactivate")
+async def test_bulk_deactivate_users_rejects_is_active(mock_bulk_deactivate, mock_db, client):
+    """Test is_active alone can't select users to deactivate (it would match everyone)."""
+    from src.auth.dependencies import get_current_active_superuser
+    from src.db.base import get_db
+
+    app.dependency_overrides[get_db] = lambda: mock_db
+    app.dependency_overrides[get_current_active_superuser] = lambda: {
+        "id": "123e4567-e89b-12d3-a456-426614174001",
+        "is_superuser": True,
+    }
+    try:
+        responses = [
+            await client.post("/api/v1/users:bulkDeactivate", json=body)
+            for body in (
+                {"is_active": False},
+                {"is_active": True},
+                {"is_active": True, "created_before": "2025-01-01T00:00:00"},
+            )
+        ]
+    finally:
+        app.dependency_overrides.clear()
+
+    assert [response.status_code for response in responses] == [422, 422, 422]
+    mock_bulk_deactivate.assert_not_awaited()
+
+
+@patch("src.users.service.get_by_id")
+async def test_get_user_sparse_fields(mock_get_by_id, mock_db, client):
+    """Test ?fields narrows both the query and the response."""
+    from uuid import UUID
+    from src.auth.dependencies import get_current_principal
+    from src.db.base import get_db
+
+    user_id = UUID("123e4567-e89b-12d3-a456-426614174000")
+    mock_get_by_id.return_value = {"id": user_id, "email": "test@example.com"}
+    app.dependency_overrides[get_db] = lambda: mock_db
+    app.dependency_overrides[get_current_principal] = lambda: {
+        "id": user_id,
+        "is_superuser": False,
+    }
+    try:
+        response = await client.get(
+            f"/api/v1/users/{user_id}", params={"fields": "email, id,email"}
+        )
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "success": True,
+        "message": None,
+        "data": {"id": str(user_id), "email": "test@example.com"},
+    }
+    assert mock_get_by_id.await_args.kwargs["fields"] == ("email", "id")
+
+
+async def test_get_users_invalid_fields(mock_db, client):
+    """Test unknown fields are rejected."""
+    from src.auth.dependencies import get_current_superuser_principal
+    from src.db.base import get_db
+
+    app.dependency_overrides[get_db] = lambda: mock_db
+    app.dependency_overrides[get_current_superuser_principal] = lambda: {"is_superuser": True}
+    try:
+        response = await client.get(
+            "/api/v1/users", params={"fields": "id,hashed_password"}
+        )
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 422
+    assert response.json()["success"] is False
+    assert "hashed_password" in response.json()["message"]
+
+
+@patch("src.users.service.bulk_update")
+async def test_bulk_patch_users(mock_bulk_update, mock_db, client):
+    """Test bulk patch returns per-user results and protects the caller's flags."""
+    from uuid import UUID
+    from src.auth.dependencies import get_current_active_superuser
+    from src.db.base import get_db
+
+    admin_id = UUID("123e4567-e89b-12d3-a456-426614174001")
+    user_id = UUID("123e4567-e89b-12d3-a456-426614174000")
+    missing_id = UUID("456e4567-e89b-12d3-a456-426614174000")
+    mock_bulk_update.return_value = {user_id: "updated", missing_id: "not_found"}
+    app.dependency_overrides[get_db] = lambda: mock_db
+    app.dependency_overrides[get_current_active_superuser] = lambda: {
+        "id": admin_id,
+        "is_superuser": True,
+    }
+    try:
+        response = await client.patch(
+            "/api/v1/users:bulk",
+            json={"users": [
+                {"id": str(admin_id), "is_active": False},
+                {"id": str(user_id), "is_active": False, "first_name": None},
+                {"id": str(missing_id), "last_name": "Doe"},
+            ]},
+        )
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    assert response.json()["data"] == {
+        "updated": 1,
+        "results": [
+            {"id": str(admin_id), "status": "forbidden"},
+            {"id": str(user_id), "status": "updated"},
+            {"id": str(missing_id), "status": "not_found"},
+        ],
+    }
+    assert mock_bulk_update.await_args.args[1] == [
+        {"id": user_id, "is_active": False, "first_name": None},
+        {"id": missing_id, "last_name": "Doe"},
+    ]
+
+
+@patch("src.users.service.get_password_hash", return_value="hashed")
+async def test_bulk_update_groups_by_fields(mock_get_password_hash, mock_db):
+    """Test users changing the same fields share one UPDATE ... FROM (VALUES ...)."""
+    from unittest.mock import MagicMock
+    from uuid import uuid4
+    from src.users import service
+
+    first, second, third = uuid4(), uuid4(), uuid4()
+    results = [MagicMock(), MagicMock()]
+    results[0].scalars.return_value.all.return_value = [first, second]
+    results[1].scalars.return_value.all.return_value = []
+    mock_db.execute.side_effect = results
+    mock_db.info = {}
+
+    statuses = await service.bulk_update(mock_db, [
+        {"id": first, "is_active": False},
+        {"id": second, "is_active": True},
+        {"id": third, "password": "password123"},
+    ])
+
+    assert statuses == {first: "updated", second: "updated", third: "not_found"}
+    assert mock_db.execute.await_count == 2
+    statement = str(mock_db.execute.await_args_list[1].args[0])
+    assert "hashed_password=patch.hashed_password" in statement
+    assert "FROM (VALUES" in statement
+    # Only to release the connection before hashing; get_db commits the updates
+    mock_db.commit.assert_awaited_once()
+
+
+@patch("src.users.service.get_password_hash", return_value="hashed")
+async def test_update_missing_user_does_not_hash(mock_get_password_hash, mock_db):
+    """Test a password for an unknown user is not hashed before the 404."""
+    from unittest.mock import MagicMock
+    from uuid import uuid4
+    from src.core.exceptions import UserNotFoundException
+    from src.users import service
+    from src.users.schemas import UserUpdate
+
+    result = MagicMock()
+    result.scalar_one_or_none.return_value = None
+    mock_db.execute.return_value = result
+
+    with pytest.raises(UserNotFoundException):
+        await service.update(mock_db, uuid4(), UserUpdate(password="password123"))
+
+    mock_get_password_hash.assert_not_called()
+    mock_db.commit.assert_not_awaited()
+
+
+async def test_bulk_update_marks_emails_taken_concurrently(mock_db):
+    """Test an email taken after the upfront check only fails its own user."""
+    from unittest.mock import MagicMock
+    from uuid import uuid4
+    from sqlalchemy.exc import IntegrityError
+    from src.users import service
+
+    class UniqueViolation(Exception):
+        sqlstate = service.UNIQUE_VIOLATION
+
+    first, second = uuid4(), uuid4()
+    owners, updated = MagicMock(), MagicMock()
+    owners.all.return_value = []
+    updated.scalars.return_value.all.return_value = [first]
+    conflict = IntegrityError("UPDATE", {}, UniqueViolation())
+    mock_db.execute.side_effect = [owners, conflict, updated, conflict]
+    mock_db.begin_nested = MagicMock()
+    mock_db.begin_nested.return_value.__aexit__.return_value = False  # don't swallow errors
+
+    statuses = await service.bulk_update(mock_db, [
+        {"id": first, "email": "first@example.com"},
+        {"id": second, "email": "second@example.com"},
+    ])
+
+    assert statuses == {first: "updated", second: "email_taken"}
+    assert mock_db.begin_nested.call_count == 3